@@ -483,8 +483,11 @@ namespace airlib_rpclib
             msr::airlib::ImageCaptureBase::ImageType image_type;
             bool pixels_as_float;
             bool compress;
+            //when set, float pixels are returned as raw bytes in image_data_uint8 instead of a msgpack float array
+            //clients that don't send this field get the old behavior
+            bool float_as_bytes = false;
 
-            MSGPACK_DEFINE_ARRAY(camera_name, image_type, pixels_as_float, compress);
+            MSGPACK_DEFINE_ARRAY(camera_name, image_type, pixels_as_float, compress, float_as_bytes);
 
             ImageRequest()
             {
@@ -605,6 +608,21 @@ namespace airlib_rpclib
 
                 return response_adapter;
             }
+
+            //moves float pixels into image_data_uint8 for the requests which asked for float_as_bytes
+            //data is copied as is, i.e. little-endian on all supported platforms
+            static void packFloatAsBytes(const std::vector<ImageRequest>& request_adapter,
+                                         std::vector<ImageResponse>& response_adapter)
+            {
+                for (size_t i = 0; i < request_adapter.size() && i < response_adapter.size(); ++i) {
+                    auto& item = response_adapter[i];
+                    if (request_adapter[i].float_as_bytes && item.pixels_as_float) {
+                        const auto* bytes = reinterpret_cast<const uint8_t*>(item.image_data_float.data());
+                        item.image_data_uint8.assign(bytes, bytes + item.image_data_float.size() * sizeof(float));
+                        item.image_data_float.clear();
+                    }
+                }
+            }
         };
 
         struct LidarData
@@ -146,7 +146,9 @@ namespace airlib
 
         pimpl_->server.bind("simGetImages", [&](const std::vector<RpcLibAdaptorsBase::ImageRequest>& request_adapter, const std::string& vehicle_name, bool external) -> vector<RpcLibAdaptorsBase::ImageResponse> {
             const auto& response = getWorldSimApi()->getImages(RpcLibAdaptorsBase::ImageRequest::to(request_adapter), vehicle_name, external);
-            return RpcLibAdaptorsBase::ImageResponse::from(response);
+            auto response_adapter = RpcLibAdaptorsBase::ImageResponse::from(response);
+            RpcLibAdaptorsBase::ImageResponse::packFloatAsBytes(request_adapter, response_adapter);
+            return response_adapter;
         });
 
         pimpl_->server.bind("simGetImage", [&](const std::string& camera_name, ImageCaptureBase::ImageType type, const std::string& vehicle_name, bool external) -> vector<uint8_t> {
@@ -1,5 +1,8 @@
 from .client import *
 from .utils import *
 from .types import *
+from .image_writer import ImageWriter
+from . import recording
+from . import geometry
 
 __version__ = "1.8.1"
@@ -0,0 +1,2 @@
+from .client import VehicleClient, MultirotorClient, CarClient
+from .rpc import AsyncRpcClient, RpcServer
@@ -0,0 +1,537 @@
+"""
+asyncio versions of `airsim.VehicleClient`, `airsim.MultirotorClient` and `airsim.CarClient`
+
+Every RPC of the blocking clients is available under the same name and with the same arguments.
+Methods are coroutines, except the `*Async` movement methods which send the command immediately and return
+an `asyncio.Future` resolved when the task completes, same as the `join()`-able futures of the blocking clients.
+All calls share one connection and can be in flight concurrently, e.g. with `asyncio.gather`.
+"""
+import logging
+import sys
+
+from ..types import *
+from .. import client as _blocking
+from .rpc import AsyncRpcClient
+
+class VehicleClient:
+    def __init__(self, ip = "", port = 41451, timeout_value = 3600):
+        if (ip == ""):
+            ip = "127.0.0.1"
+        self.client = AsyncRpcClient(ip, port, timeout = timeout_value)
+
+    async def connect(self):
+        """
+        Open the connection to the simulator, otherwise it is opened by the first call
+        """
+        await self.client.connect()
+
+    async def close(self):
+        """
+        Close the connection, pending calls fail with `ConnectionError`
+        """
+        await self.client.close()
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+#----------------------------------- Common vehicle APIs ---------------------------------------------
+    async def reset(self):
+        await self.client.call('reset')
+
+    async def ping(self):
+        return await self.client.call('ping')
+
+    def getClientVersion(self):
+        return 1 # sync with C++ client
+
+    async def getServerVersion(self):
+        return await self.client.call('getServerVersion')
+
+    def getMinRequiredServerVersion(self):
+        return 1 # sync with C++ client
+
+    async def getMinRequiredClientVersion(self):
+        return await self.client.call('getMinRequiredClientVersion')
+
+#basic flight control
+    async def enableApiControl(self, is_enabled, vehicle_name = ''):
+        await self.client.call('enableApiControl', is_enabled, vehicle_name)
+
+    async def isApiControlEnabled(self, vehicle_name = ''):
+        return await self.client.call('isApiControlEnabled', vehicle_name)
+
+    async def armDisarm(self, arm, vehicle_name = ''):
+        return await self.client.call('armDisarm', arm, vehicle_name)
+
+    async def simPause(self, is_paused):
+        await self.client.call('simPause', is_paused)
+
+    async def simIsPause(self):
+        return await self.client.call("simIsPaused")
+
+    async def simContinueForTime(self, seconds):
+        await self.client.call('simContinueForTime', seconds)
+
+    async def simContinueForFrames(self, frames):
+        await self.client.call('simContinueForFrames', frames)
+
+    async def getHomeGeoPoint(self, vehicle_name = ''):
+        return GeoPoint.from_msgpack(await self.client.call('getHomeGeoPoint', vehicle_name))
+
+    async def confirmConnection(self):
+        if await self.ping():
+            print("Connected!")
+        else:
+             print("Ping returned false!")
+        server_ver = await self.getServerVersion()
+        client_ver = self.getClientVersion()
+        server_min_ver = self.getMinRequiredServerVersion()
+        client_min_ver = await self.getMinRequiredClientVersion()
+
+        ver_info = "Client Ver:" + str(client_ver) + " (Min Req: " + str(client_min_ver) + \
+              "), Server Ver:" + str(server_ver) + " (Min Req: " + str(server_min_ver) + ")"
+
+        if server_ver < server_min_ver:
+            print(ver_info, file=sys.stderr)
+            print("AirSim server is of older version and not supported by this client. Please upgrade!")
+        elif client_ver < client_min_ver:
+            print(ver_info, file=sys.stderr)
+            print("AirSim client is of older version and not supported by this server. Please upgrade!")
+        else:
+            print(ver_info)
+        print('')
+
+    async def simSetLightIntensity(self, light_name, intensity):
+        return await self.client.call("simSetLightIntensity", light_name, intensity)
+
+    async def simSwapTextures(self, tags, tex_id = 0, component_id = 0, material_id = 0):
+        return await self.client.call("simSwapTextures", tags, tex_id, component_id, material_id)
+
+    async def simSetObjectMaterial(self, object_name, material_name, component_id = 0):
+        return await self.client.call("simSetObjectMaterial", object_name, material_name, component_id)
+
+    async def simSetObjectMaterialFromTexture(self, object_name, texture_path, component_id = 0):
+        return await self.client.call("simSetObjectMaterialFromTexture", object_name, texture_path, component_id)
+
+#time - of - day control
+    async def simSetTimeOfDay(self, is_enabled, start_datetime = "", is_start_datetime_dst = False, celestial_clock_speed = 1, update_interval_secs = 60, move_sun = True):
+        await self.client.call('simSetTimeOfDay', is_enabled, start_datetime, is_start_datetime_dst, celestial_clock_speed, update_interval_secs, move_sun)
+
+#weather
+    async def simEnableWeather(self, enable):
+        await self.client.call('simEnableWeather', enable)
+
+    async def simSetWeatherParameter(self, param, val):
+        await self.client.call('simSetWeatherParameter', param, val)
+
+#camera control
+    async def simGetImage(self, camera_name, image_type, vehicle_name = '', external = False):
+#todo : in future remove below, it's only for compatibility to pre v1.2
+        camera_name = str(camera_name)
+
+#because this method returns std::vector < uint8>, msgpack decides to encode it as a string unfortunately.
+        result = await self.client.call('simGetImage', camera_name, image_type, vehicle_name, external)
+        if (result == "" or result == "\0"):
+            return None
+        return result
+
+    async def simGetImages(self, requests, vehicle_name = '', external = False, as_numpy = False):
+        responses_raw = await self.client.call('simGetImages', requests, vehicle_name, external)
+        decode = ImageResponse.from_msgpack_numpy if as_numpy else ImageResponse.from_msgpack
+        return [decode(response_raw) for response_raw in responses_raw]
+
+#CinemAirSim
+    async def simGetPresetLensSettings(self, camera_name, vehicle_name = '', external = False):
+        result = await self.client.call('simGetPresetLensSettings', camera_name, vehicle_name, external)
+        if (result == "" or result == "\0"):
+            return None
+        return result
+
+    async def simGetLensSettings(self, camera_name, vehicle_name = '', external = False):
+        result = await self.client.call('simGetLensSettings', camera_name, vehicle_name, external)
+        if (result == "" or result == "\0"):
+            return None
+        return result
+
+    async def simSetPresetLensSettings(self, preset_lens_settings, camera_name, vehicle_name = '', external = False):
+        await self.client.call("simSetPresetLensSettings", preset_lens_settings, camera_name, vehicle_name, external)
+
+    async def simGetPresetFilmbackSettings(self, camera_name, vehicle_name = '', external = False):
+        result = await self.client.call('simGetPresetFilmbackSettings', camera_name, vehicle_name, external)
+        if (result == "" or result == "\0"):
+            return None
+        return result
+
+    async def simSetPresetFilmbackSettings(self, preset_filmback_settings, camera_name, vehicle_name = '', external = False):
+        await self.client.call("simSetPresetFilmbackSettings", preset_filmback_settings, camera_name, vehicle_name, external)
+
+    async def simGetFilmbackSettings(self, camera_name, vehicle_name = '', external = False):
+        result = await self.client.call('simGetFilmbackSettings', camera_name, vehicle_name, external)
+        if (result == "" or result == "\0"):
+            return None
+        return result
+
+    async def simSetFilmbackSettings(self, sensor_width, sensor_height, camera_name, vehicle_name = '', external = False):
+        return await self.client.call("simSetFilmbackSettings", sensor_width, sensor_height, camera_name, vehicle_name, external)
+
+    async def simGetFocalLength(self, camera_name, vehicle_name = '', external = False):
+        return await self.client.call("simGetFocalLength", camera_name, vehicle_name, external)
+
+    async def simSetFocalLength(self, focal_length, camera_name, vehicle_name = '', external = False):
+        await self.client.call("simSetFocalLength", focal_length, camera_name, vehicle_name, external)
+
+    async def simEnableManualFocus(self, enable, camera_name, vehicle_name = '', external = False):
+        await self.client.call("simEnableManualFocus", enable, camera_name, vehicle_name, external)
+
+    async def simGetFocusDistance(self, camera_name, vehicle_name = '', external = False):
+        return await self.client.call("simGetFocusDistance", camera_name, vehicle_name, external)
+
+    async def simSetFocusDistance(self, focus_distance, camera_name, vehicle_name = '', external = False):
+        await self.client.call("simSetFocusDistance", focus_distance, camera_name, vehicle_name, external)
+
+    async def simGetFocusAperture(self, camera_name, vehicle_name = '', external = False):
+        return await self.client.call("simGetFocusAperture", camera_name, vehicle_name, external)
+
+    async def simSetFocusAperture(self, focus_aperture, camera_name, vehicle_name = '', external = False):
+        await self.client.call("simSetFocusAperture", focus_aperture, camera_name, vehicle_name, external)
+
+    async def simEnableFocusPlane(self, enable, camera_name, vehicle_name = '', external = False):
+        await self.client.call("simEnableFocusPlane", enable, camera_name, vehicle_name, external)
+
+    async def simGetCurrentFieldOfView(self, camera_name, vehicle_name = '', external = False):
+        return await self.client.call("simGetCurrentFieldOfView", camera_name, vehicle_name, external)
+
+#End CinemAirSim
+    async def simTestLineOfSightToPoint(self, point, vehicle_name = ''):
+        return await self.client.call('simTestLineOfSightToPoint', point, vehicle_name)
+
+    async def simTestLineOfSightBetweenPoints(self, point1, point2):
+        return await self.client.call('simTestLineOfSightBetweenPoints', point1, point2)
+
+    async def simGetWorldExtents(self):
+        responses_raw = await self.client.call('simGetWorldExtents')
+        return [GeoPoint.from_msgpack(response_raw) for response_raw in responses_raw]
+
+    async def simRunConsoleCommand(self, command):
+        return await self.client.call('simRunConsoleCommand', command)
+
+    async def simGetMeshPositionVertexBuffers(self):
+        responses_raw = await self.client.call('simGetMeshPositionVertexBuffers')
+        return [MeshPositionVertexBuffersResponse.from_msgpack(response_raw) for response_raw in responses_raw]
+
+    async def simGetCollisionInfo(self, vehicle_name = ''):
+        return CollisionInfo.from_msgpack(await self.client.call('simGetCollisionInfo', vehicle_name))
+
+    async def simSetVehiclePose(self, pose, ignore_collision, vehicle_name = ''):
+        await self.client.call('simSetVehiclePose', pose, ignore_collision, vehicle_name)
+
+    async def simGetVehiclePose(self, vehicle_name = ''):
+        pose = await self.client.call('simGetVehiclePose', vehicle_name)
+        return Pose.from_msgpack(pose)
+
+    async def simSetTraceLine(self, color_rgba, thickness=1.0, vehicle_name = ''):
+        await self.client.call('simSetTraceLine', color_rgba, thickness, vehicle_name)
+
+    async def simGetObjectPose(self, object_name):
+        pose = await self.client.call('simGetObjectPose', object_name)
+        return Pose.from_msgpack(pose)
+
+    async def simSetObjectPose(self, object_name, pose, teleport = True):
+        return await self.client.call('simSetObjectPose', object_name, pose, teleport)
+
+    async def simGetObjectScale(self, object_name):
+        scale = await self.client.call('simGetObjectScale', object_name)
+        return Vector3r.from_msgpack(scale)
+
+    async def simSetObjectScale(self, object_name, scale_vector):
+        return await self.client.call('simSetObjectScale', object_name, scale_vector)
+
+    async def simListSceneObjects(self, name_regex = '.*'):
+        return await self.client.call('simListSceneObjects', name_regex)
+
+    async def simListSceneObjectsByTag(self, tag_regex = '.*'):
+        return await self.client.call('simListSceneObjectsByTag', tag_regex)
+
+    async def simLoadLevel(self, level_name):
+        return await self.client.call('simLoadLevel', level_name)
+
+    async def simListAssets(self):
+        return await self.client.call('simListAssets')
+
+    async def simSpawnObject(self, object_name, asset_name, pose, scale, physics_enabled=False, is_blueprint=False):
+        return await self.client.call('simSpawnObject', object_name, asset_name, pose, scale, physics_enabled, is_blueprint)
+
+    async def simDestroyObject(self, object_name):
+        return await self.client.call('simDestroyObject', object_name)
+
+    async def simSetSegmentationObjectID(self, mesh_name, object_id, is_name_regex = False):
+        return await self.client.call('simSetSegmentationObjectID', mesh_name, object_id, is_name_regex)
+
+    async def simGetSegmentationObjectID(self, mesh_name):
+        return await self.client.call('simGetSegmentationObjectID', mesh_name)
+
+    async def simAddDetectionFilterMeshName(self, camera_name, image_type, mesh_name, vehicle_name = '', external = False):
+        await self.client.call('simAddDetectionFilterMeshName', camera_name, image_type, mesh_name, vehicle_name, external)
+
+    async def simSetDetectionFilterRadius(self, camera_name, image_type, radius_cm, vehicle_name = '', external = False):
+        await self.client.call('simSetDetectionFilterRadius', camera_name, image_type, radius_cm, vehicle_name, external)
+
+    async def simClearDetectionMeshNames(self, camera_name, image_type, vehicle_name = '', external = False):
+        await self.client.call('simClearDetectionMeshNames', camera_name, image_type, vehicle_name, external)
+
+    async def simGetDetections(self, camera_name, image_type, vehicle_name = '', external = False):
+        responses_raw = await self.client.call('simGetDetections', camera_name, image_type, vehicle_name, external)
+        return [DetectionInfo.from_msgpack(response_raw) for response_raw in responses_raw]
+
+    async def simPrintLogMessage(self, message, message_param = "", severity = 0):
+        await self.client.call('simPrintLogMessage', message, message_param, severity)
+
+    async def simGetCameraInfo(self, camera_name, vehicle_name = '', external=False):
+#TODO : below str() conversion is only needed for legacy reason and should be removed in future
+        return CameraInfo.from_msgpack(await self.client.call('simGetCameraInfo', str(camera_name), vehicle_name, external))
+
+    async def simGetDistortionParams(self, camera_name, vehicle_name = '', external = False):
+        return await self.client.call('simGetDistortionParams', str(camera_name), vehicle_name, external)
+
+    async def simSetDistortionParams(self, camera_name, distortion_params, vehicle_name = '', external = False):
+        for param_name, value in distortion_params.items():
+            await self.simSetDistortionParam(camera_name, param_name, value, vehicle_name, external)
+
+    async def simSetDistortionParam(self, camera_name, param_name, value, vehicle_name = '', external = False):
+        await self.client.call('simSetDistortionParam', str(camera_name), param_name, value, vehicle_name, external)
+
+    async def simSetCameraPose(self, camera_name, pose, vehicle_name = '', external = False):
+#TODO : below str() conversion is only needed for legacy reason and should be removed in future
+        await self.client.call('simSetCameraPose', str(camera_name), pose, vehicle_name, external)
+
+    async def simSetCameraFov(self, camera_name, fov_degrees, vehicle_name = '', external = False):
+#TODO : below str() conversion is only needed for legacy reason and should be removed in future
+        await self.client.call('simSetCameraFov', str(camera_name), fov_degrees, vehicle_name, external)
+
+    async def simGetGroundTruthKinematics(self, vehicle_name = ''):
+        kinematics_state = await self.client.call('simGetGroundTruthKinematics', vehicle_name)
+        return KinematicsState.from_msgpack(kinematics_state)
+
+    async def simSetKinematics(self, state, ignore_collision, vehicle_name = ''):
+        await self.client.call('simSetKinematics', state, ignore_collision, vehicle_name)
+
+    async def simGetGroundTruthEnvironment(self, vehicle_name = ''):
+        env_state = await self.client.call('simGetGroundTruthEnvironment', vehicle_name)
+        return EnvironmentState.from_msgpack(env_state)
+
+#sensor APIs
+    async def getImuData(self, imu_name = '', vehicle_name = ''):
+        return ImuData.from_msgpack(await self.client.call('getImuData', imu_name, vehicle_name))
+
+    async def getBarometerData(self, barometer_name = '', vehicle_name = ''):
+        return BarometerData.from_msgpack(await self.client.call('getBarometerData', barometer_name, vehicle_name))
+
+    async def getMagnetometerData(self, magnetometer_name = '', vehicle_name = ''):
+        return MagnetometerData.from_msgpack(await self.client.call('getMagnetometerData', magnetometer_name, vehicle_name))
+
+    async def getGpsData(self, gps_name = '', vehicle_name = ''):
+        return GpsData.from_msgpack(await self.client.call('getGpsData', gps_name, vehicle_name))
+
+    async def getDistanceSensorData(self, distance_sensor_name = '', vehicle_name = ''):
+        return DistanceSensorData.from_msgpack(await self.client.call('getDistanceSensorData', distance_sensor_name, vehicle_name))
+
+    async def getLidarData(self, lidar_name = '', vehicle_name = ''):
+        return LidarData.from_msgpack(await self.client.call('getLidarData', lidar_name, vehicle_name))
+
+    async def simGetLidarSegmentation(self, lidar_name = '', vehicle_name = ''):
+        logging.warning("simGetLidarSegmentation API is deprecated, use getLidarData() API instead")
+        return (await self.getLidarData(lidar_name, vehicle_name)).segmentation
+
+#Plotting APIs
+    async def simFlushPersistentMarkers(self):
+        await self.client.call('simFlushPersistentMarkers')
+
+    async def simPlotPoints(self, points, color_rgba=[1.0, 0.0, 0.0, 1.0], size = 10.0, duration = -1.0, is_persistent = False):
+        await self.client.call('simPlotPoints', points, color_rgba, size, duration, is_persistent)
+
+    async def simPlotLineStrip(self, points, color_rgba=[1.0, 0.0, 0.0, 1.0], thickness = 5.0, duration = -1.0, is_persistent = False):
+        await self.client.call('simPlotLineStrip', points, color_rgba, thickness, duration, is_persistent)
+
+    async def simPlotLineList(self, points, color_rgba=[1.0, 0.0, 0.0, 1.0], thickness = 5.0, duration = -1.0, is_persistent = False):
+        await self.client.call('simPlotLineList', points, color_rgba, thickness, duration, is_persistent)
+
+    async def simPlotArrows(self, points_start, points_end, color_rgba=[1.0, 0.0, 0.0, 1.0], thickness = 5.0, arrow_size = 2.0, duration = -1.0, is_persistent = False):
+        await self.client.call('simPlotArrows', points_start, points_end, color_rgba, thickness, arrow_size, duration, is_persistent)
+
+    async def simPlotStrings(self, strings, positions, scale = 5, color_rgba=[1.0, 0.0, 0.0, 1.0], duration = -1.0):
+        await self.client.call('simPlotStrings', strings, positions, scale, color_rgba, duration)
+
+    async def simPlotTransforms(self, poses, scale = 5.0, thickness = 5.0, duration = -1.0, is_persistent = False):
+        await self.client.call('simPlotTransforms', poses, scale, thickness, duration, is_persistent)
+
+    async def simPlotTransformsWithNames(self, poses, names, tf_scale = 5.0, tf_thickness = 5.0, text_scale = 10.0, text_color_rgba = [1.0, 0.0, 0.0, 1.0], duration = -1.0):
+        await self.client.call('simPlotTransformsWithNames', poses, names, tf_scale, tf_thickness, text_scale, text_color_rgba, duration)
+
+    async def cancelLastTask(self, vehicle_name = ''):
+        await self.client.call('cancelLastTask', vehicle_name)
+
+#Recording APIs
+    async def startRecording(self):
+        await self.client.call('startRecording')
+
+    async def stopRecording(self):
+        await self.client.call('stopRecording')
+
+    async def isRecording(self):
+        return await self.client.call('isRecording')
+
+    async def simSetWind(self, wind):
+        await self.client.call('simSetWind', wind)
+
+    async def simCreateVoxelGrid(self, position, x, y, z, res, of):
+        return await self.client.call('simCreateVoxelGrid', position, x, y, z, res, of)
+
+#Add new vehicle via RPC
+    async def simAddVehicle(self, vehicle_name, vehicle_type, pose, pawn_path = ""):
+        return await self.client.call('simAddVehicle', vehicle_name, vehicle_type, pose, pawn_path)
+
+    async def listVehicles(self):
+        return await self.client.call('listVehicles')
+
+    async def getSettingsString(self):
+        return await self.client.call('getSettingsString')
+
+    async def simSetExtForce(self, ext_force):
+        await self.client.call('simSetExtForce', ext_force)
+
+    async def simFindLookAtRotation(self, object_name, vehicle_name = ''):
+        return await self.client.call('simFindLookAtRotation', vehicle_name, object_name)
+
+# -----------------------------------  Multirotor APIs ---------------------------------------------
+class MultirotorClient(VehicleClient):
+    def __init__(self, ip = "", port = 41451, timeout_value = 3600):
+        super().__init__(ip, port, timeout_value)
+
+    def takeoffAsync(self, timeout_sec = 20, vehicle_name = ''):
+        return self.client.call_async('takeoff', timeout_sec, vehicle_name)
+
+    def landAsync(self, timeout_sec = 60, vehicle_name = ''):
+        return self.client.call_async('land', timeout_sec, vehicle_name)
+
+    def goHomeAsync(self, timeout_sec = 3e+38, vehicle_name = ''):
+        return self.client.call_async('goHome', timeout_sec, vehicle_name)
+
+    def moveByVelocityBodyFrameAsync(self, vx, vy, vz, duration, drivetrain = DrivetrainType.MaxDegreeOfFreedom, yaw_mode = YawMode(), vehicle_name = ''):
+        return self.client.call_async('moveByVelocityBodyFrame', vx, vy, vz, duration, drivetrain, yaw_mode, vehicle_name)
+
+    def moveByVelocityZBodyFrameAsync(self, vx, vy, z, duration, drivetrain = DrivetrainType.MaxDegreeOfFreedom, yaw_mode = YawMode(), vehicle_name = ''):
+        return self.client.call_async('moveByVelocityZBodyFrame', vx, vy, z, duration, drivetrain, yaw_mode, vehicle_name)
+
+    def moveByAngleZAsync(self, pitch, roll, z, yaw, duration, vehicle_name = ''):
+        logging.warning("moveByAngleZAsync API is deprecated, use moveByRollPitchYawZAsync() API instead")
+        return self.client.call_async('moveByRollPitchYawZ', roll, -pitch, -yaw, z, duration, vehicle_name)
+
+    def moveByAngleThrottleAsync(self, pitch, roll, throttle, yaw_rate, duration, vehicle_name = ''):
+        logging.warning("moveByAngleThrottleAsync API is deprecated, use moveByRollPitchYawrateThrottleAsync() API instead")
+        return self.client.call_async('moveByRollPitchYawrateThrottle', roll, -pitch, -yaw_rate, throttle, duration, vehicle_name)
+
+    def moveByVelocityAsync(self, vx, vy, vz, duration, drivetrain = DrivetrainType.MaxDegreeOfFreedom, yaw_mode = YawMode(), vehicle_name = ''):
+        return self.client.call_async('moveByVelocity', vx, vy, vz, duration, drivetrain, yaw_mode, vehicle_name)
+
+    def moveByVelocityZAsync(self, vx, vy, z, duration, drivetrain = DrivetrainType.MaxDegreeOfFreedom, yaw_mode = YawMode(), vehicle_name = ''):
+        return self.client.call_async('moveByVelocityZ', vx, vy, z, duration, drivetrain, yaw_mode, vehicle_name)
+
+    def moveOnPathAsync(self, path, velocity, timeout_sec = 3e+38, drivetrain = DrivetrainType.MaxDegreeOfFreedom, yaw_mode = YawMode(),
+        lookahead = -1, adaptive_lookahead = 1, vehicle_name = ''):
+        return self.client.call_async('moveOnPath', path, velocity, timeout_sec, drivetrain, yaw_mode, lookahead, adaptive_lookahead, vehicle_name)
+
+    def moveToPositionAsync(self, x, y, z, velocity, timeout_sec = 3e+38, drivetrain = DrivetrainType.MaxDegreeOfFreedom, yaw_mode = YawMode(),
+        lookahead = -1, adaptive_lookahead = 1, vehicle_name = ''):
+        return self.client.call_async('moveToPosition', x, y, z, velocity, timeout_sec, drivetrain, yaw_mode, lookahead, adaptive_lookahead, vehicle_name)
+
+    def moveToGPSAsync(self, latitude, longitude, altitude, velocity, timeout_sec = 3e+38, drivetrain = DrivetrainType.MaxDegreeOfFreedom, yaw_mode = YawMode(),
+        lookahead = -1, adaptive_lookahead = 1, vehicle_name = ''):
+        return self.client.call_async('moveToGPS', latitude, longitude, altitude, velocity, timeout_sec, drivetrain, yaw_mode, lookahead, adaptive_lookahead, vehicle_name)
+
+    def moveToZAsync(self, z, velocity, timeout_sec = 3e+38, yaw_mode = YawMode(), lookahead = -1, adaptive_lookahead = 1, vehicle_name = ''):
+        return self.client.call_async('moveToZ', z, velocity, timeout_sec, yaw_mode, lookahead, adaptive_lookahead, vehicle_name)
+
+    def moveByManualAsync(self, vx_max, vy_max, z_min, duration, drivetrain = DrivetrainType.MaxDegreeOfFreedom, yaw_mode = YawMode(), vehicle_name = ''):
+        return self.client.call_async('moveByManual', vx_max, vy_max, z_min, duration, drivetrain, yaw_mode, vehicle_name)
+
+    def rotateToYawAsync(self, yaw, timeout_sec = 3e+38, margin = 5, vehicle_name = ''):
+        return self.client.call_async('rotateToYaw', yaw, timeout_sec, margin, vehicle_name)
+
+    def rotateByYawRateAsync(self, yaw_rate, duration, vehicle_name = ''):
+        return self.client.call_async('rotateByYawRate', yaw_rate, duration, vehicle_name)
+
+    def hoverAsync(self, vehicle_name = ''):
+        return self.client.call_async('hover', vehicle_name)
+
+    async def moveByRC(self, rcdata = RCData(), vehicle_name = ''):
+        return await self.client.call('moveByRC', rcdata, vehicle_name)
+
+    def moveByMotorPWMsAsync(self, front_right_pwm, rear_left_pwm, front_left_pwm, rear_right_pwm, duration, vehicle_name = ''):
+        return self.client.call_async('moveByMotorPWMs', front_right_pwm, rear_left_pwm, front_left_pwm, rear_right_pwm, duration, vehicle_name)
+
+    def moveByRollPitchYawZAsync(self, roll, pitch, yaw, z, duration, vehicle_name = ''):
+        return self.client.call_async('moveByRollPitchYawZ', roll, -pitch, -yaw, z, duration, vehicle_name)
+
+    def moveByRollPitchYawThrottleAsync(self, roll, pitch, yaw, throttle, duration, vehicle_name = ''):
+        return self.client.call_async('moveByRollPitchYawThrottle', roll, -pitch, -yaw, throttle, duration, vehicle_name)
+
+    def moveByRollPitchYawrateThrottleAsync(self, roll, pitch, yaw_rate, throttle, duration, vehicle_name = ''):
+        return self.client.call_async('moveByRollPitchYawrateThrottle', roll, -pitch, -yaw_rate, throttle, duration, vehicle_name)
+
+    def moveByRollPitchYawrateZAsync(self, roll, pitch, yaw_rate, z, duration, vehicle_name = ''):
+        return self.client.call_async('moveByRollPitchYawrateZ', roll, -pitch, -yaw_rate, z, duration, vehicle_name)
+
+    def moveByAngleRatesZAsync(self, roll_rate, pitch_rate, yaw_rate, z, duration, vehicle_name = ''):
+        return self.client.call_async('moveByAngleRatesZ', roll_rate, -pitch_rate, -yaw_rate, z, duration, vehicle_name)
+
+    def moveByAngleRatesThrottleAsync(self, roll_rate, pitch_rate, yaw_rate, throttle, duration, vehicle_name = ''):
+        return self.client.call_async('moveByAngleRatesThrottle', roll_rate, -pitch_rate, -yaw_rate, throttle, duration, vehicle_name)
+
+    async def setAngleRateControllerGains(self, angle_rate_gains=AngleRateControllerGains(), vehicle_name = ''):
+        await self.client.call('setAngleRateControllerGains', *(angle_rate_gains.to_lists()+(vehicle_name,)))
+
+    async def setAngleLevelControllerGains(self, angle_level_gains=AngleLevelControllerGains(), vehicle_name = ''):
+        await self.client.call('setAngleLevelControllerGains', *(angle_level_gains.to_lists()+(vehicle_name,)))
+
+    async def setVelocityControllerGains(self, velocity_gains=VelocityControllerGains(), vehicle_name = ''):
+        await self.client.call('setVelocityControllerGains', *(velocity_gains.to_lists()+(vehicle_name,)))
+
+    async def setPositionControllerGains(self, position_gains=PositionControllerGains(), vehicle_name = ''):
+        await self.client.call('setPositionControllerGains', *(position_gains.to_lists()+(vehicle_name,)))
+
+    async def getMultirotorState(self, vehicle_name = ''):
+        return MultirotorState.from_msgpack(await self.client.call('getMultirotorState', vehicle_name))
+
+    async def getRotorStates(self, vehicle_name = ''):
+        return RotorStates.from_msgpack(await self.client.call('getRotorStates', vehicle_name))
+
+#----------------------------------- Car APIs ---------------------------------------------
+class CarClient(VehicleClient):
+    def __init__(self, ip = "", port = 41451, timeout_value = 3600):
+        super().__init__(ip, port, timeout_value)
+
+    async def setCarControls(self, controls, vehicle_name = ''):
+        await self.client.call('setCarControls', controls, vehicle_name)
+
+    async def getCarState(self, vehicle_name = ''):
+        state_raw = await self.client.call('getCarState', vehicle_name)
+        return CarState.from_msgpack(state_raw)
+
+    async def getCarControls(self, vehicle_name=''):
+        controls_raw = await self.client.call('getCarControls', vehicle_name)
+        return CarControls.from_msgpack(controls_raw)
+
+
+def _copy_docstrings(cls, blocking_cls):
+    for name, func in vars(cls).items():
+        blocking_func = getattr(blocking_cls, name, None)
+        if callable(func) and func.__doc__ is None and blocking_func is not None:
+            func.__doc__ = blocking_func.__doc__
+
+_copy_docstrings(VehicleClient, _blocking.VehicleClient)
+_copy_docstrings(MultirotorClient, _blocking.MultirotorClient)
+_copy_docstrings(CarClient, _blocking.CarClient)
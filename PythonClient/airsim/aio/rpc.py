@@ -0,0 +1,240 @@
+import asyncio
+import itertools
+import logging
+
+import msgpack
+import numpy as np
+from msgpackrpc.error import RPCError
+
+_REQUEST = 0
+_RESPONSE = 1
+_NOTIFY = 2
+
+
+def _pack_default(obj):
+    if hasattr(obj, 'to_msgpack'):
+        return obj.to_msgpack()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError("can not serialize '%s' object" % type(obj).__name__)
+
+
+def _packer(use_bin_type = False):
+    # the server sends bytes as bin so that clients unpacking strings as utf-8 leave binary data, e.g. images, alone
+    return msgpack.Packer(default = _pack_default, use_bin_type = use_bin_type)
+
+
+def _unpacker():
+    return msgpack.Unpacker(raw = False, max_buffer_size = 0)
+
+
+class AsyncRpcClient:
+    """
+    msgpack-rpc client on top of asyncio streams
+
+    Requests are written as soon as they are issued and matched to responses by message id,
+    so any number of calls can be in flight over the single connection.
+    The connection is opened on the first call.
+    """
+    def __init__(self, host, port, timeout = None, read_size = 1 << 16):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self._read_size = read_size
+        self._packer = _packer()
+        self._msgids = itertools.count()
+        self._pending = {}
+        self._backlog = []
+        self._writer = None
+        self._connecting = None
+        self._reader_task = None
+
+    async def connect(self):
+        if self._writer is None:
+            if self._connecting is None:
+                self._connecting = asyncio.ensure_future(self._connect())
+            await asyncio.shield(self._connecting)
+
+    async def _connect(self):
+        try:
+            reader, writer = await asyncio.open_connection(self.host, self.port)
+        except Exception as e:
+            self._connecting = None
+            self._fail_pending(e)
+            raise
+        self._writer = writer
+        self._reader_task = asyncio.ensure_future(self._read_loop(reader))
+        for data in self._backlog:
+            writer.write(data)
+        self._backlog = []
+
+    def call_async(self, method, *args):
+        """
+        Sends the request and returns an `asyncio.Future` resolved with the result
+        """
+        loop = asyncio.get_event_loop()
+        msgid = next(self._msgids) & 0xFFFFFFFF
+        future = loop.create_future()
+        self._pending[msgid] = future
+        # also dropped when the future is cancelled without a response, e.g. by the timeout of call()
+        future.add_done_callback(lambda _: self._pending.pop(msgid, None))
+        data = self._packer.pack([_REQUEST, msgid, method, list(args)])
+        if self._writer is not None:
+            self._writer.write(data)
+        else:
+            self._backlog.append(data)
+            if self._connecting is None:
+                self._connecting = asyncio.ensure_future(self._connect())
+                self._connecting.add_done_callback(_consume_exception)
+        return future
+
+    async def call(self, method, *args):
+        future = self.call_async(method, *args)
+        if self.timeout:
+            return await asyncio.wait_for(future, self.timeout)
+        return await future
+
+    def notify(self, method, *args):
+        data = self._packer.pack([_NOTIFY, method, list(args)])
+        if self._writer is not None:
+            self._writer.write(data)
+        else:
+            self._backlog.append(data)
+
+    async def _read_loop(self, reader):
+        unpacker = _unpacker()
+        error = ConnectionError("Connection to %s:%d closed" % (self.host, self.port))
+        try:
+            while True:
+                data = await reader.read(self._read_size)
+                if not data:
+                    break
+                unpacker.feed(data)
+                for message in unpacker:
+                    self._on_message(message)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            error = e
+        finally:
+            self._writer = None
+            self._connecting = None
+            self._fail_pending(error)
+
+    def _on_message(self, message):
+        if message[0] != _RESPONSE:
+            logging.warning("Ignoring unexpected msgpack-rpc message type %s", message[0])
+            return
+        _, msgid, error, result = message
+        future = self._pending.pop(msgid, None)
+        if future is None or future.done():
+            return
+        if error is not None:
+            future.set_exception(RPCError(error))
+        else:
+            future.set_result(result)
+
+    def _fail_pending(self, error):
+        pending, self._pending = self._pending, {}
+        for future in pending.values():
+            if not future.done():
+                future.set_exception(error)
+
+    async def close(self):
+        writer, self._writer = self._writer, None
+        if writer is not None:
+            writer.close()
+        if self._reader_task is not None:
+            self._reader_task.cancel()
+            try:
+                await self._reader_task
+            except asyncio.CancelledError:
+                pass
+            self._reader_task = None
+        self._connecting = None
+        self._fail_pending(ConnectionError("Client closed"))
+
+
+def _consume_exception(future):
+    # connection errors are delivered through the pending request futures
+    if not future.cancelled():
+        future.exception()
+
+
+class RpcServer:
+    """
+    Minimal asyncio msgpack-rpc server, used as a local stand-in for the simulator
+
+    Each request is dispatched to the method of the same name on `handler`. Methods can be plain functions
+    or coroutines, requests are served concurrently and responses can be sent out of order.
+    """
+    def __init__(self, handler):
+        self.handler = handler
+        self._server = None
+        self._connections = set()
+
+    async def start(self, host = "127.0.0.1", port = 41451):
+        self._server = await asyncio.start_server(self._serve, host, port)
+        return self
+
+    @property
+    def port(self):
+        return self._server.sockets[0].getsockname()[1]
+
+    def close(self):
+        self._server.close()
+        for connection in self._connections:
+            connection.cancel()
+
+    async def wait_closed(self):
+        await self._server.wait_closed()
+        if self._connections:
+            await asyncio.gather(*self._connections, return_exceptions = True)
+
+    async def _serve(self, reader, writer):
+        connection = asyncio.current_task()
+        self._connections.add(connection)
+        unpacker = _unpacker()
+        packer = _packer(use_bin_type = True)
+        tasks = set()
+        try:
+            while True:
+                data = await reader.read(1 << 16)
+                if not data:
+                    break
+                unpacker.feed(data)
+                for message in unpacker:
+                    if message[0] == _REQUEST:
+                        _, msgid, method, params = message
+                        task = asyncio.ensure_future(self._dispatch(writer, packer, msgid, method, params))
+                        tasks.add(task)
+                        task.add_done_callback(tasks.discard)
+                    elif message[0] == _NOTIFY:
+                        _, method, params = message
+                        task = asyncio.ensure_future(self._dispatch(None, packer, None, method, params))
+                        tasks.add(task)
+                        task.add_done_callback(tasks.discard)
+        except (ConnectionError, asyncio.CancelledError):
+            # cancelled by close(), the connection task ends here
+            pass
+        finally:
+            for task in tasks:
+                task.cancel()
+            writer.close()
+            self._connections.discard(connection)
+
+    async def _dispatch(self, writer, packer, msgid, method, params):
+        error, result = None, None
+        func = getattr(self.handler, method, None) if not method.startswith('_') else None
+        if func is None:
+            error = "Method '%s' not found" % method
+        else:
+            try:
+                result = func(*params)
+                if asyncio.iscoroutine(result) or isinstance(result, asyncio.Future):
+                    result = await result
+            except Exception as e:
+                logging.exception("Error in RPC method %s", method)
+                error = str(e)
+        if writer is not None and not writer.is_closing():
+            writer.write(packer.pack([_RESPONSE, msgid, error, result]))
@@ -2,6 +2,7 @@ from __future__ import print_function
 
 from .utils import *
 from .types import *
+from .stats import RpcStats, missing_internals
 
 import msgpackrpc #install as admin: pip install msgpack-rpc-python
 import numpy as np #pip install numpy
@@ -9,12 +10,463 @@ import msgpack
 import time
 import math
 import logging
+import threading
+import inspect
+import collections
+import asyncio
+
+class _RpcClientPool(object):
+    """
+    Thread-safe replacement for a single `msgpackrpc.Client`
+
+    Holds `size` msgpack-rpc connections, each call checks out an idle connection for the duration of the round trip,
+    so up to `size` calls from different threads can be in flight at the same time
+    """
+    def __init__(self, address, size, stats = None, **kwargs):
+        if size < 1:
+            raise ValueError("pool_size must be at least 1")
+        self.stats = stats
+        if stats is not None:
+            kwargs['builder'] = stats.builder
+        self._idle = [msgpackrpc.Client(address, **kwargs) for _ in range(size)]
+        self._connections = list(self._idle)
+        self._cond = threading.Condition()
+
+    def _acquire(self, connection = None):
+        with self._cond:
+            while True:
+                if connection is None and self._idle:
+                    return self._idle.pop()
+                if connection is not None and connection in self._idle:
+                    self._idle.remove(connection)
+                    return connection
+                self._cond.wait()
+
+    def _release(self, connection):
+        with self._cond:
+            self._idle.append(connection)
+            self._cond.notify_all()
+
+    def call(self, method, *args):
+        connection = self._acquire()
+        try:
+            if self.stats is None:
+                return connection.call(method, *args)
+            future = connection.send_request(method, args)
+            future.stats_awaiting_decode = True
+            result = future.get()
+            self.stats._on_returned(getattr(future, 'stats_record', None))
+            return result
+        finally:
+            self._release(connection)
+
+    def call_async(self, method, *args):
+        connection = self._acquire()
+        try:
+            future = connection.call_async(method, *args)
+        finally:
+            self._release(connection)
+        return _PooledFuture(self, connection, future)
+
+    def call_many(self, calls):
+        """
+        Sends all `(method, args)` requests back to back on one connection, then waits for all the responses
+        """
+        connection = self._acquire()
+        try:
+            futures = [connection.call_async(method, *args) for method, args in calls]
+            for future in futures:
+                future.join()
+        finally:
+            self._release(connection)
+        return [future.get() for future in futures]
+
+    def close(self):
+        for connection in self._connections:
+            connection.close()
+
+
+class _PooledFuture(object):
+    """
+    Wraps `msgpackrpc.future.Future` so that waiting on it drives the event loop of its own connection only,
+    while no other thread is using that connection
+    """
+    def __init__(self, pool, connection, future):
+        self._pool = pool
+        self._connection = connection
+        self._future = future
+
+    def join(self):
+        if self._future._set_flag:
+            return
+        connection = self._pool._acquire(self._connection)
+        try:
+            self._future.join()
+        finally:
+            self._pool._release(connection)
+
+    def get(self):
+        self.join()
+        return self._future.get()
+
+    def __getattr__(self, name):
+        return getattr(self._future, name)
+
+
+class _CallRecorded(Exception):
+    def __init__(self, method, args):
+        self.method = method
+        self.args = args
+
+
+class _RecordingRpc(object):
+    """
+    Captures the first RPC made by an API method and aborts it
+    """
+    def call(self, method, *args):
+        raise _CallRecorded(method, args)
+
+    def call_async(self, method, *args):
+        raise _CallRecorded(method, args)
+
+
+class _CompletedFuture(object):
+    def __init__(self, result):
+        self.result = result
+
+    def join(self):
+        pass
+
+    def get(self):
+        return self.result
+
+
+class _ReplayRpc(object):
+    """
+    Returns the already received response for the first RPC made by an API method, any further RPCs go to `rpc`
+    """
+    def __init__(self, rpc, method, result):
+        self._rpc = rpc
+        self._method = method
+        self._result = result
+        self._replayed = False
+
+    def _replay(self, method):
+        if self._replayed or method != self._method:
+            return False
+        self._replayed = True
+        return True
+
+    def call(self, method, *args):
+        if self._replay(method):
+            return self._result
+        return self._rpc.call(method, *args)
+
+    def call_async(self, method, *args):
+        if self._replay(method):
+            return _CompletedFuture(self._result)
+        return self._rpc.call_async(method, *args)
+
+
+class _ClientView(object):
+    """
+    Runs the API methods of `vehicle_client` with their RPCs going through `rpc`
+    """
+    def __init__(self, vehicle_client, rpc):
+        self._vehicle_client = vehicle_client
+        self.client = rpc
+
+    def __getattr__(self, name):
+        attr = getattr(type(self._vehicle_client), name, None)
+        if inspect.isfunction(attr):
+            return attr.__get__(self)
+        return getattr(self._vehicle_client, name)
+
+
+class BatchResult(object):
+    """
+    Placeholder returned by the calls made on `VehicleClient.batch()`, `result` is set when the batch has run
+    """
+    def __init__(self):
+        self.result = None
+
+
+class _Batch(object):
+    def __init__(self, vehicle_client):
+        self._vehicle_client = vehicle_client
+        self._calls = []
+        self._results = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.run()
+
+    def run(self):
+        calls, results = self._calls, self._results
+        self._calls, self._results = [], []
+        for placeholder, result in zip(results, self._vehicle_client.call_many(calls)):
+            placeholder.result = result
+
+    def __getattr__(self, name):
+        if not inspect.isfunction(getattr(type(self._vehicle_client), name, None)):
+            raise AttributeError("'%s' has no API method '%s'" % (type(self._vehicle_client).__name__, name))
+
+        def add_call(*args, **kwargs):
+            placeholder = BatchResult()
+            self._calls.append((name, args, kwargs))
+            self._results.append(placeholder)
+            return placeholder
+        return add_call
+
+
+class Subscription(object):
+    """
+    Iterator over results polled by a background thread, returned by the `VehicleClient.subscribe_*` methods
+
+    Results are kept in a ring buffer of `maxsize` entries. When the consumer falls behind the oldest entries are
+    dropped, so iterating always yields recent data while the next one is already being fetched.
+    Supports both `for` and `async for`, and stops at `close()` or when used as a context manager.
+    """
+    _END = object()
+
+    def __init__(self, fetch, rate_hz = None, maxsize = 4):
+        self._fetch = fetch
+        self._period = 1.0 / rate_hz if rate_hz else 0.0
+        self._buffer = collections.deque(maxlen = maxsize)
+        self._cond = threading.Condition()
+        self._stopped = threading.Event()
+        self._error = None
+        self.dropped = 0
+        self._thread = threading.Thread(target = self._run, daemon = True)
+        self._thread.start()
+
+    def _run(self):
+        next_time = time.monotonic()
+        while not self._stopped.is_set():
+            try:
+                result = self._fetch()
+            except Exception as e:
+                with self._cond:
+                    self._error = e
+                    self._stopped.set()
+                    self._cond.notify_all()
+                return
+            with self._cond:
+                if self._stopped.is_set():
+                    # closed while fetching
+                    return
+                if len(self._buffer) == self._buffer.maxlen:
+                    self.dropped += 1
+                self._buffer.append(result)
+                self._cond.notify()
+            if self._period:
+                # skip the ticks missed by a slow fetch instead of bursting to catch up
+                next_time = max(next_time + self._period, time.monotonic())
+                self._stopped.wait(next_time - time.monotonic())
+
+    def _get(self):
+        with self._cond:
+            self._cond.wait_for(lambda: self._buffer or self._stopped.is_set())
+            if self._buffer:
+                return self._buffer.popleft()
+            if self._error is not None:
+                raise self._error
+            return self._END
+
+    def close(self, drain = False):
+        """
+        Stops polling, a call already in flight completes in the background and its result is discarded
+
+        Args:
+            drain (bool, optional): Keep the buffered results, iterating yields them before stopping
+        """
+        with self._cond:
+            self._stopped.set()
+            if not drain:
+                self._buffer.clear()
+            self._cond.notify_all()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        result = self._get()
+        if result is self._END:
+            raise StopIteration
+        return result
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        result = await asyncio.get_running_loop().run_in_executor(None, self._get)
+        if result is self._END:
+            raise StopAsyncIteration
+        return result
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
 
 class VehicleClient:
-    def __init__(self, ip = "", port = 41451, timeout_value = 3600):
+    def __init__(self, ip = "", port = 41451, timeout_value = 3600, pool_size = 1, stats = False):
+        """
+        Args:
+            ip (str, optional): IP address of the simulator, defaults to localhost
+            port (int, optional): RPC port of the simulator
+            timeout_value (int, optional): Timeout in seconds for each RPC call
+            pool_size (int, optional): Number of connections to the simulator. The client is safe to share between threads,
+                                       with `pool_size` > 1 calls from different threads run concurrently instead of
+                                       queuing behind each other
+            stats (bool, optional): Record per method call counts, bytes and timings, see `get_stats`. Disabled with
+                                    a warning if the installed msgpack-rpc-python isn't compatible with the instrumentation
+        """
         if (ip == ""):
             ip = "127.0.0.1"
-        self.client = msgpackrpc.Client(msgpackrpc.Address(ip, port), timeout = timeout_value, pack_encoding = 'utf-8', unpack_encoding = 'utf-8')
+        rpc_stats = None
+        if stats:
+            missing = missing_internals()
+            if missing:
+                logging.warning("RPC statistics are disabled, the installed msgpack-rpc-python doesn't have %s", ", ".join(missing))
+            else:
+                rpc_stats = RpcStats()
+        self.client = _RpcClientPool(msgpackrpc.Address(ip, port), pool_size, rpc_stats, timeout = timeout_value, pack_encoding = 'utf-8', unpack_encoding = 'utf-8')
+        if rpc_stats is not None:
+            # API methods are wrapped per instance so the time spent decoding their results is measured too
+            for name, func in inspect.getmembers(type(self), inspect.isfunction):
+                if not name.startswith('_'):
+                    setattr(self, name, rpc_stats.wrap(func.__get__(self)))
+
+    def get_stats(self, reset = False):
+        """
+        Statistics of the RPC calls made so far, the client must be created with `stats = True`
+
+        Args:
+            reset (bool, optional): Start over after returning the current statistics
+
+        Returns:
+            dict: For each RPC method, `count`, `errors`, `bytes_out` and `bytes_in` totals, mean `serialize_ms` and
+                  `deserialize_ms`, and `rtt_ms` and `decode_ms` with the p50, p95, p99 and max in milliseconds
+        """
+        if self.client.stats is None:
+            raise ValueError("Create the client with stats = True to record statistics")
+        return self.client.stats.summary(reset)
+
+    def add_stats_callback(self, callback):
+        """
+        Register a function called with the `CallRecord` of every completed RPC call, e.g. to export metrics
+
+        Callbacks run on the thread which made the call and should return quickly
+        """
+        if self.client.stats is None:
+            raise ValueError("Create the client with stats = True to record statistics")
+        self.client.stats.add_callback(callback)
+
+    def remove_stats_callback(self, callback):
+        if self.client.stats is None:
+            raise ValueError("Create the client with stats = True to record statistics")
+        self.client.stats.remove_callback(callback)
+
+    def call_many(self, calls):
+        """
+        Run several API calls pipelined over a single connection
+
+        All requests are sent back to back before any response is read, so the total latency is close to the slowest
+        call rather than the sum of the round trips. Results are decoded the same way as by the regular methods.
+        `*Async` methods can be included, their task has completed when `call_many` returns.
+
+        Args:
+            calls (list[tuple]): Tuples of `(method_name, args, kwargs)` with `args` and `kwargs` optional,
+                                 e.g. `[('getMultirotorState',), ('getImuData', ('', 'Drone1')), ('simGetImages', (requests,), {'as_numpy': True})]`
+
+        Returns:
+            list: Result of each call, in the same order
+        """
+        prepared = []
+        for call in calls:
+            name = call[0]
+            args = tuple(call[1]) if len(call) > 1 else ()
+            kwargs = call[2] if len(call) > 2 else {}
+            func = getattr(type(self), name)
+            try:
+                func(_ClientView(self, _RecordingRpc()), *args, **kwargs)
+                prepared.append((func, args, kwargs, None))
+            except _CallRecorded as recorded:
+                prepared.append((func, args, kwargs, recorded))
+
+        responses = iter(self.client.call_many([(recorded.method, recorded.args) for _, _, _, recorded in prepared if recorded is not None]))
+
+        results = []
+        for func, args, kwargs, recorded in prepared:
+            rpc = _ReplayRpc(self.client, recorded.method, next(responses)) if recorded is not None else self.client
+            results.append(func(_ClientView(self, rpc), *args, **kwargs))
+        return results
+
+    def batch(self):
+        """
+        Collect API calls and run them with `call_many` at the end of the `with` block
+
+        Each call returns a `BatchResult` whose `result` is filled in when the block exits::
+
+            with client.batch() as batch:
+                state = batch.getMultirotorState()
+                imu = batch.getImuData()
+            print(state.result.kinematics_estimated.position, imu.result.angular_velocity)
+
+        Returns:
+            Batch object with the same API methods as the client
+        """
+        return _Batch(self)
+
+    def subscribe(self, fetch, rate_hz = None, maxsize = 4):
+        """
+        Poll `fetch` from a background thread and iterate over its results
+
+        The thread shares the client's connections, create the client with a `pool_size` larger than the number of
+        subscriptions so they don't queue behind each other or behind calls from the main thread.
+
+        Args:
+            fetch (callable): Function without arguments returning the next result, e.g. `lambda: client.getImuData()`
+            rate_hz (float, optional): Polling rate, polls as fast as possible if not set
+            maxsize (int, optional): Number of results buffered before the oldest ones are dropped
+
+        Returns:
+            Subscription: Iterator and async iterator over the results
+        """
+        return Subscription(fetch, rate_hz, maxsize)
+
+    def subscribe_images(self, requests, rate_hz = None, maxsize = 4, vehicle_name = '', external = False, as_numpy = False):
+        """
+        Stream of `simGetImages` results fetched in the background, see `subscribe`
+
+        Returns:
+            Subscription: Yields list[ImageResponse]
+        """
+        return self.subscribe(lambda: self.simGetImages(requests, vehicle_name, external, as_numpy), rate_hz, maxsize)
+
+    def subscribe_lidar(self, lidar_name = '', vehicle_name = '', rate_hz = None, maxsize = 4):
+        """
+        Stream of `getLidarData` results fetched in the background, see `subscribe`
+
+        Returns:
+            Subscription: Yields LidarData
+        """
+        return self.subscribe(lambda: self.getLidarData(lidar_name, vehicle_name), rate_hz, maxsize)
+
+    def subscribe_imu(self, imu_name = '', vehicle_name = '', rate_hz = None, maxsize = 4):
+        """
+        Stream of `getImuData` results fetched in the background, see `subscribe`
+
+        Returns:
+            Subscription: Yields ImuData
+        """
+        return self.subscribe(lambda: self.getImuData(imu_name, vehicle_name), rate_hz, maxsize)
 
 #----------------------------------- Common vehicle APIs ---------------------------------------------
     def reset(self):
@@ -292,7 +744,7 @@ class VehicleClient:
 #camera control
 #simGetImage returns compressed png in array of bytes
 #image_type uses one of the ImageType members
-    def simGetImages(self, requests, vehicle_name = '', external = False):
+    def simGetImages(self, requests, vehicle_name = '', external = False, as_numpy = False):
         """
         Get multiple images
 
@@ -302,12 +754,15 @@ class VehicleClient:
             requests (list[ImageRequest]): Images required
             vehicle_name (str, optional): Name of vehicle associated with the camera
             external (bool, optional): Whether the camera is an External Camera
+            as_numpy (bool, optional): Decode pixel data directly into NumPy arrays shaped (H, W[, C]),
+                                       see `ImageResponse.from_msgpack_numpy`
 
         Returns:
             list[ImageResponse]:
         """
         responses_raw = self.client.call('simGetImages', requests, vehicle_name, external)
-        return [ImageResponse.from_msgpack(response_raw) for response_raw in responses_raw]
+        decode = ImageResponse.from_msgpack_numpy if as_numpy else ImageResponse.from_msgpack
+        return [decode(response_raw) for response_raw in responses_raw]
 
 
 
@@ -1142,8 +1597,8 @@ class VehicleClient:
 
 # -----------------------------------  Multirotor APIs ---------------------------------------------
 class MultirotorClient(VehicleClient, object):
-    def __init__(self, ip = "", port = 41451, timeout_value = 3600):
-        super(MultirotorClient, self).__init__(ip, port, timeout_value)
+    def __init__(self, ip = "", port = 41451, timeout_value = 3600, pool_size = 1, stats = False):
+        super(MultirotorClient, self).__init__(ip, port, timeout_value, pool_size, stats)
 
     def takeoffAsync(self, timeout_sec = 20, vehicle_name = ''):
         """
@@ -1593,6 +2048,15 @@ class MultirotorClient(VehicleClient, object):
         """
         return MultirotorState.from_msgpack(self.client.call('getMultirotorState', vehicle_name))
     getMultirotorState.__annotations__ = {'return': MultirotorState}
+
+    def subscribe_state(self, vehicle_name = '', rate_hz = None, maxsize = 4):
+        """
+        Stream of `getMultirotorState` results fetched in the background, see `subscribe`
+
+        Returns:
+            Subscription: Yields MultirotorState
+        """
+        return self.subscribe(lambda: self.getMultirotorState(vehicle_name), rate_hz, maxsize)
 #query rotor states
     def getRotorStates(self, vehicle_name = ''):
         """
@@ -1610,8 +2074,8 @@ class MultirotorClient(VehicleClient, object):
 
 #----------------------------------- Car APIs ---------------------------------------------
 class CarClient(VehicleClient, object):
-    def __init__(self, ip = "", port = 41451, timeout_value = 3600):
-        super(CarClient, self).__init__(ip, port, timeout_value)
+    def __init__(self, ip = "", port = 41451, timeout_value = 3600, pool_size = 1, stats = False):
+        super(CarClient, self).__init__(ip, port, timeout_value, pool_size, stats)
 
     def setCarControls(self, controls, vehicle_name = ''):
         """
@@ -1636,6 +2100,15 @@ class CarClient(VehicleClient, object):
         state_raw = self.client.call('getCarState', vehicle_name)
         return CarState.from_msgpack(state_raw)
 
+    def subscribe_state(self, vehicle_name = '', rate_hz = None, maxsize = 4):
+        """
+        Stream of `getCarState` results fetched in the background, see `subscribe`
+
+        Returns:
+            Subscription: Yields CarState
+        """
+        return self.subscribe(lambda: self.getCarState(vehicle_name), rate_hz, maxsize)
+
     def getCarControls(self, vehicle_name=''):
         """
         Args:
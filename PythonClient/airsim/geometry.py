@@ -0,0 +1,226 @@
+"""
+Vectorized versions of the quaternion and pose helpers in `airsim.types` and `airsim.utils`
+
+Quaternions are arrays of shape (..., 4) in (x, y, z, w) order, same as `Quaternionr.to_numpy_array()`,
+vectors and points are arrays of shape (..., 3). Leading dimensions broadcast, so a single quaternion
+can be applied to N points or N quaternions to N points.
+Poses are passed as a pair of `positions` (N, 3) and `orientations` (N, 4) arrays.
+"""
+import numpy as np
+
+from .types import Vector3r, Quaternionr, Pose
+
+
+def _as_float_array(a):
+    a = np.asarray(a)
+    if not np.issubdtype(a.dtype, np.floating):
+        a = a.astype(np.float64)
+    return a
+
+
+def vectors_to_array(vectors):
+    """
+    Args:
+        vectors (list[Vector3r]):
+
+    Returns:
+        numpy.ndarray: Array of shape (N, 3)
+    """
+    return np.array([(v.x_val, v.y_val, v.z_val) for v in vectors], dtype=np.float64).reshape(-1, 3)
+
+
+def array_to_vectors(array):
+    """
+    Args:
+        array (numpy.ndarray): Array of shape (N, 3)
+
+    Returns:
+        list[Vector3r]:
+    """
+    return [Vector3r(x, y, z) for x, y, z in np.asarray(array).reshape(-1, 3).tolist()]
+
+
+def quaternions_to_array(quaternions):
+    """
+    Args:
+        quaternions (list[Quaternionr]):
+
+    Returns:
+        numpy.ndarray: Array of shape (N, 4) in (x, y, z, w) order
+    """
+    return np.array([(q.x_val, q.y_val, q.z_val, q.w_val) for q in quaternions], dtype=np.float64).reshape(-1, 4)
+
+
+def array_to_quaternions(array):
+    """
+    Args:
+        array (numpy.ndarray): Array of shape (N, 4) in (x, y, z, w) order
+
+    Returns:
+        list[Quaternionr]:
+    """
+    return [Quaternionr(x, y, z, w) for x, y, z, w in np.asarray(array).reshape(-1, 4).tolist()]
+
+
+def poses_to_arrays(poses):
+    """
+    Args:
+        poses (list[Pose]):
+
+    Returns:
+        tuple: positions (N, 3) and orientations (N, 4) arrays
+    """
+    return vectors_to_array([p.position for p in poses]), quaternions_to_array([p.orientation for p in poses])
+
+
+def arrays_to_poses(positions, orientations):
+    """
+    Args:
+        positions (numpy.ndarray): Array of shape (N, 3)
+        orientations (numpy.ndarray): Array of shape (N, 4) in (x, y, z, w) order
+
+    Returns:
+        list[Pose]:
+    """
+    return [Pose(v, q) for v, q in zip(array_to_vectors(positions), array_to_quaternions(orientations))]
+
+
+def quaternion_multiply(a, b):
+    """
+    Hamilton product `a * b`, same as `Quaternionr.__mul__`
+    """
+    a = _as_float_array(a)
+    b = _as_float_array(b)
+    ax, ay, az, aw = a[..., 0], a[..., 1], a[..., 2], a[..., 3]
+    bx, by, bz, bw = b[..., 0], b[..., 1], b[..., 2], b[..., 3]
+    return np.stack([aw * bx + ax * bw + ay * bz - az * by,
+                     aw * by + ay * bw + az * bx - ax * bz,
+                     aw * bz + az * bw + ax * by - ay * bx,
+                     aw * bw - ax * bx - ay * by - az * bz], axis=-1)
+
+
+def quaternion_conjugate(q):
+    q = _as_float_array(q)
+    return q * np.array([-1, -1, -1, 1], dtype=q.dtype)
+
+
+def quaternion_inverse(q):
+    q = _as_float_array(q)
+    return quaternion_conjugate(q) / np.sum(q * q, axis=-1, keepdims=True)
+
+
+def quaternion_normalize(q):
+    q = _as_float_array(q)
+    return q / np.linalg.norm(q, axis=-1, keepdims=True)
+
+
+def rotate_points(q, points):
+    """
+    Rotates `points` by the unit quaternions `q`, i.e. `q * p * q.inverse()` as in `Quaternionr.rotate`
+
+    Args:
+        q (numpy.ndarray): Unit quaternions of shape (..., 4)
+        points (numpy.ndarray): Points of shape (..., 3)
+
+    Returns:
+        numpy.ndarray: Rotated points
+    """
+    q = _as_float_array(q)
+    points = _as_float_array(points)
+    u = q[..., :3]
+    w = q[..., 3:]
+    t = 2.0 * np.cross(u, points)
+    return points + w * t + np.cross(u, t)
+
+
+def to_rotation_matrix(q):
+    """
+    Args:
+        q (numpy.ndarray): Unit quaternions of shape (..., 4)
+
+    Returns:
+        numpy.ndarray: Rotation matrices of shape (..., 3, 3), `R @ p` equals `rotate_points(q, p)`
+    """
+    q = _as_float_array(q)
+    x, y, z, w = q[..., 0], q[..., 1], q[..., 2], q[..., 3]
+    return np.stack([1 - 2 * (y * y + z * z), 2 * (x * y - z * w), 2 * (x * z + y * w),
+                     2 * (x * y + z * w), 1 - 2 * (x * x + z * z), 2 * (y * z - x * w),
+                     2 * (x * z - y * w), 2 * (y * z + x * w), 1 - 2 * (x * x + y * y)], axis=-1).reshape(q.shape[:-1] + (3, 3))
+
+
+def to_eularian_angles(q):
+    """
+    Vectorized `airsim.to_eularian_angles`
+
+    Args:
+        q (numpy.ndarray): Quaternions of shape (..., 4)
+
+    Returns:
+        numpy.ndarray: Array of shape (..., 3) with (pitch, roll, yaw) in radians
+    """
+    q = _as_float_array(q)
+    x, y, z, w = q[..., 0], q[..., 1], q[..., 2], q[..., 3]
+    ysqr = y * y
+
+    roll = np.arctan2(2.0 * (w * x + y * z), 1.0 - 2.0 * (x * x + ysqr))
+    pitch = np.arcsin(np.clip(2.0 * (w * y - z * x), -1.0, 1.0))
+    yaw = np.arctan2(2.0 * (w * z + x * y), 1.0 - 2.0 * (ysqr + z * z))
+
+    return np.stack([pitch, roll, yaw], axis=-1)
+
+
+def to_quaternion(pitch, roll, yaw):
+    """
+    Vectorized `airsim.to_quaternion`, arguments broadcast against each other
+
+    Returns:
+        numpy.ndarray: Quaternions of shape (..., 4)
+    """
+    pitch, roll, yaw = np.broadcast_arrays(_as_float_array(pitch), _as_float_array(roll), _as_float_array(yaw))
+    t0 = np.cos(yaw * 0.5)
+    t1 = np.sin(yaw * 0.5)
+    t2 = np.cos(roll * 0.5)
+    t3 = np.sin(roll * 0.5)
+    t4 = np.cos(pitch * 0.5)
+    t5 = np.sin(pitch * 0.5)
+
+    return np.stack([t0 * t3 * t4 - t1 * t2 * t5,
+                     t0 * t2 * t5 + t1 * t3 * t4,
+                     t1 * t2 * t4 - t0 * t3 * t5,
+                     t0 * t2 * t4 + t1 * t3 * t5], axis=-1)
+
+
+def transform_points(position, orientation, points):
+    """
+    Maps `points` from a frame to its parent frame, given the pose of the frame in the parent
+
+    Args:
+        position (numpy.ndarray): Position of the frame, shape (..., 3)
+        orientation (numpy.ndarray): Unit quaternion of the frame, shape (..., 4)
+        points (numpy.ndarray): Points in the frame, shape (..., 3)
+
+    Returns:
+        numpy.ndarray: Points in the parent frame
+    """
+    return _as_float_array(position) + rotate_points(orientation, points)
+
+
+def compose_poses(positions_a, orientations_a, positions_b, orientations_b):
+    """
+    Composes poses `a * b`, i.e. pose `b` expressed in frame `a` is mapped to the parent frame of `a`
+
+    Returns:
+        tuple: positions (N, 3) and orientations (N, 4) arrays
+    """
+    positions = transform_points(positions_a, orientations_a, positions_b)
+    orientations = quaternion_multiply(orientations_a, orientations_b)
+    return positions, orientations
+
+
+def invert_poses(positions, orientations):
+    """
+    Returns:
+        tuple: positions (N, 3) and orientations (N, 4) arrays of the inverse poses
+    """
+    inverse = quaternion_conjugate(quaternion_normalize(orientations))
+    return -rotate_points(inverse, positions), inverse
@@ -0,0 +1,194 @@
+"""
+Saving of `ImageResponse`s off the capture loop
+
+Encoding and disk writes run on a pool of worker threads, or processes, while the caller goes on requesting images.
+At most `max_pending` images are held in memory, `write()` blocks once that many are waiting, so a capture loop
+that is faster than the disk slows down instead of running out of memory.
+"""
+import concurrent.futures
+import os
+import threading
+
+import numpy as np
+
+from .pfm import write_pfm
+from .recording import RecordingWriter
+
+FORMATS = ('auto', 'png', 'npy', 'pfm', 'recording')
+
+
+def _pixels(response):
+    """ PNG bytes for compressed images, else (H, W, C) uint8 or (H, W) float32 arrays """
+    if response.pixels_as_float:
+        pixels = np.asarray(response.image_data_float, dtype = np.float32).reshape(response.height, response.width, -1)
+        return pixels[:, :, 0] if pixels.shape[2] == 1 else pixels
+    if response.compress:
+        data = response.image_data_uint8
+        return data if isinstance(data, bytes) else bytes(memoryview(np.ascontiguousarray(data)).cast('B'))
+    return np.frombuffer(response.image_data_uint8, dtype = np.uint8).reshape(response.height, response.width, -1)
+
+
+def _extension(format, pixels):
+    if format == 'auto':
+        return '.pfm' if isinstance(pixels, np.ndarray) and pixels.dtype == np.float32 else '.png'
+    return '.' + format
+
+
+def _save(path, format, pixels, depth_scale):
+    is_float = isinstance(pixels, np.ndarray) and pixels.dtype == np.float32
+    if format == 'pfm' or format == 'auto' and is_float:
+        if not is_float:
+            raise ValueError("Only float images can be saved as PFM, request them with pixels_as_float=True")
+        write_pfm(path, pixels)
+    elif isinstance(pixels, bytes):
+        if format == 'npy':
+            import cv2      # pip install opencv-python
+
+            np.save(path, cv2.imdecode(np.frombuffer(pixels, dtype = np.uint8), cv2.IMREAD_UNCHANGED))
+        else:
+            # already PNG compressed by the simulator
+            with open(path, 'wb') as f:
+                f.write(pixels)
+    elif format == 'npy':
+        np.save(path, pixels)
+    else:
+        import cv2      # pip install opencv-python
+
+        if is_float:
+            # 16 bit PNG, e.g. depth in millimeters with the default depth_scale
+            pixels = np.clip(np.nan_to_num(pixels * depth_scale), 0, 65535).astype(np.uint16)
+        if not cv2.imwrite(path, pixels):
+            raise Exception('Writing %s failed' % path)
+    return path
+
+
+class ImageWriter(object):
+    """
+    Saves `ImageResponse`s in the background
+
+    Args:
+        path (str): Output directory, or the recording file with format 'recording'
+        format (str, optional): 'auto' saves float images as PFM and the others as PNG, 'png' also saves float images
+                                as 16 bit PNGs of the values times `depth_scale`, 'npy' saves arrays and 'recording'
+                                appends the responses to a recording, see `airsim.recording`
+        workers (int, optional): Number of workers, defaults to the number of CPUs. Recordings are written by a single worker
+        max_pending (int, optional): Number of images queued or being written before `write()` blocks
+        processes (bool, optional): Encode in worker processes instead of threads, for CPU bound PNG encoding
+        depth_scale (float, optional): Multiplier for float images saved as PNG, 1000 stores depth in millimeters
+    """
+    def __init__(self, path, format = 'auto', workers = None, max_pending = 64, processes = False, depth_scale = 1000.0):
+        if format not in FORMATS:
+            raise ValueError("Unsupported image format '%s'" % format)
+        self.path = path
+        self.format = format
+        self.depth_scale = depth_scale
+        self._recording = None
+        if format == 'recording':
+            self._recording = RecordingWriter(path)
+            self._executor = concurrent.futures.ThreadPoolExecutor(1)
+        else:
+            os.makedirs(path, exist_ok = True)
+            if processes:
+                self._executor = concurrent.futures.ProcessPoolExecutor(workers)
+            else:
+                self._executor = concurrent.futures.ThreadPoolExecutor(workers or os.cpu_count())
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self._pending = set()
+        self._errors = []
+        self._count = 0
+        self._closed = False
+
+    def write(self, responses, name = None, timeout = None):
+        """
+        Queues images for saving, blocking while `max_pending` images are already queued
+
+        Args:
+            responses (ImageResponse or list[ImageResponse]): Images, e.g. returned by `simGetImages()`
+            name (str, optional): File name without extension, defaults to a running number. Images of a list are
+                                  saved as `<name>_<camera_name>_<image_type>`
+            timeout (float, optional): Seconds to wait for a free slot, raises `TimeoutError` when exceeded
+
+        Returns:
+            list[str]: Paths of the files being written, or of the recording
+        """
+        self._raise_errors()
+        if self._closed:
+            raise ValueError("ImageWriter is closed")
+        single = not isinstance(responses, (list, tuple))
+        if single:
+            responses = [responses]
+        with self._lock:
+            count = self._count
+            self._count += 1
+        if name is None:
+            name = '%06d' % count
+
+        paths = []
+        for response in responses:
+            if not self._slots.acquire(timeout = -1 if timeout is None else timeout):
+                raise TimeoutError("No free slot to queue the image")
+            try:
+                if self._recording is not None:
+                    stream = 'image/%s/%d' % (response.camera_name, response.image_type)
+                    future = self._executor.submit(self._recording.write, stream, response)
+                    paths.append(self.path)
+                else:
+                    pixels = _pixels(response)
+                    file_name = name if single else '%s_%s_%d' % (name, response.camera_name, response.image_type)
+                    path = os.path.join(self.path, file_name + _extension(self.format, pixels))
+                    future = self._executor.submit(_save, path, self.format, pixels, self.depth_scale)
+                    paths.append(path)
+            except BaseException:
+                self._slots.release()
+                raise
+            with self._lock:
+                self._pending.add(future)
+            future.add_done_callback(self._done)
+        return paths
+
+    def _done(self, future):
+        with self._lock:
+            self._pending.discard(future)
+            if not future.cancelled() and future.exception() is not None:
+                self._errors.append(future.exception())
+        self._slots.release()
+
+    def _raise_errors(self):
+        with self._lock:
+            if not self._errors:
+                return
+            error, self._errors = self._errors[0], []
+        raise error
+
+    @property
+    def pending(self):
+        """ Number of images queued or being written """
+        with self._lock:
+            return len(self._pending)
+
+    def flush(self):
+        """
+        Waits until all queued images are written, and raises the first error of a failed write
+        """
+        with self._lock:
+            pending = list(self._pending)
+        concurrent.futures.wait(pending)
+        if self._recording is not None:
+            self._recording.flush()
+        self._raise_errors()
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._executor.shutdown(wait = True)
+        if self._recording is not None:
+            self._recording.close()
+        self._raise_errors()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,695 @@
+"""
+Stand-in for the simulator's RPC server, to run and benchmark client code without Unreal
+
+Run it on the regular API port with::
+
+    python -m airsim.mock --width 640 --height 480 --lidar_points 20000
+
+or start it from a script or test::
+
+    with airsim.mock.MockServer(port = 0) as server:
+        client = airsim.MultirotorClient(port = server.port)
+        client.takeoffAsync().join()
+
+Images, point clouds and sensor data are synthetic. Vehicles follow the move commands with simple kinematics
+on a simulated clock which supports `simPause` and `simContinueForTime`/`simContinueForFrames`.
+Commands without a model here that don't return anything, e.g. plotting or weather, are accepted and ignored,
+other methods the mock doesn't implement fail like unknown methods of the simulator.
+"""
+import argparse
+import asyncio
+import logging
+import math
+import re
+import struct
+import threading
+import time
+import zlib
+
+import numpy as np
+
+from .types import *
+from .utils import to_eularian_angles
+from .aio.rpc import RpcServer
+
+_EARTH_RADIUS = 6378137.0
+
+# Commands the mock accepts without modelling them, they don't return anything
+_IGNORED_RPCS = frozenset([
+    'moveByRC', 'setAngleLevelControllerGains', 'setAngleRateControllerGains', 'setPositionControllerGains',
+    'setVelocityControllerGains', 'simAddDetectionFilterMeshName', 'simClearDetectionMeshNames', 'simEnableFocusPlane',
+    'simEnableManualFocus', 'simEnableWeather', 'simFlushPersistentMarkers', 'simPlotArrows', 'simPlotLineList',
+    'simPlotLineStrip', 'simPlotPoints', 'simPlotStrings', 'simPlotTransforms', 'simPlotTransformsWithNames',
+    'simPrintLogMessage', 'simSetCameraFov', 'simSetCameraPose', 'simSetDetectionFilterRadius', 'simSetDistortionParam',
+    'simSetExtForce', 'simSetFocalLength', 'simSetFocusAperture', 'simSetFocusDistance', 'simSetPresetFilmbackSettings',
+    'simSetPresetLensSettings', 'simSetTimeOfDay', 'simSetTraceLine', 'simSetWeatherParameter', 'simSetWind',
+])
+
+
+def _encode_png(pixels):
+    """ Minimal PNG encoder for H x W x 3 uint8 arrays """
+    height, width = pixels.shape[:2]
+    raw = b''.join(b'\x00' + row.tobytes() for row in pixels)
+
+    def chunk(tag, data):
+        return struct.pack('>I', len(data)) + tag + data + struct.pack('>I', zlib.crc32(tag + data) & 0xFFFFFFFF)
+
+    return (b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)) +
+            chunk(b'IDAT', zlib.compress(raw)) + chunk(b'IEND', b''))
+
+
+def _yaw_quaternion(yaw):
+    return Quaternionr(0.0, 0.0, math.sin(yaw / 2), math.cos(yaw / 2))
+
+
+class _Motion(object):
+    """
+    Command being executed by a vehicle, either following `path` at `speed` or holding `velocity` until `until`
+    """
+    def __init__(self, path = None, speed = 0.0, velocity = None, until = None, z = None, yaw = None, yaw_rate = 0.0):
+        self.path = list(path) if path is not None else []
+        self.speed = speed
+        self.velocity = np.asarray(velocity, dtype = np.float64) if velocity is not None else None
+        self.until = until
+        self.z = z
+        self.yaw = yaw
+        self.yaw_rate = yaw_rate
+
+
+class _MockVehicle(object):
+    def __init__(self, name, time):
+        self.name = name
+        self.time = time
+        self.position = np.zeros(3)
+        self.velocity = np.zeros(3)
+        self.yaw = 0.0
+        self.yaw_rate = 0.0
+        self.motion = None
+        self.landed = True
+        self.api_control = False
+        self.armed = False
+        self.car_controls = None
+        self.speed = 0.0
+
+    def update(self, now):
+        dt = now - self.time
+        if dt <= 0:
+            return
+        self.time = now
+        if self.car_controls is not None:
+            self._update_car(dt)
+            return
+
+        motion = self.motion
+        self.velocity = np.zeros(3)
+        self.yaw_rate = 0.0
+        if motion is None:
+            return
+        if motion.yaw is not None:
+            self.yaw = motion.yaw
+        if motion.velocity is not None or motion.until is not None:
+            step = min(now, motion.until) - (now - dt) if motion.until is not None else dt
+            if motion.velocity is not None:
+                self.velocity = motion.velocity.copy()
+                self.position += motion.velocity * max(step, 0.0)
+            if motion.z is not None:
+                self.position[2] = motion.z
+            self.yaw_rate = motion.yaw_rate
+            self.yaw += motion.yaw_rate * max(step, 0.0)
+            if motion.until is not None and now >= motion.until:
+                self.motion = None
+        else:
+            travel = motion.speed * dt
+            while motion.path:
+                offset = motion.path[0] - self.position
+                distance = np.linalg.norm(offset)
+                if distance > travel:
+                    self.velocity = offset / distance * motion.speed
+                    self.position += offset / distance * travel
+                    break
+                self.position = motion.path.pop(0).copy()
+                travel -= distance
+            if not motion.path:
+                self.motion = None
+        # NED, the ground is at z = 0
+        if self.position[2] >= 0:
+            self.position[2] = 0.0
+            self.landed = self.velocity[2] >= 0
+        else:
+            self.landed = False
+
+    def _update_car(self, dt):
+        throttle, steering, brake = self.car_controls[:3]
+        accel = 4.0 * throttle - 8.0 * brake - 0.1 * self.speed
+        self.speed = min(max(self.speed + accel * dt, 0.0), 30.0)
+        self.yaw_rate = self.speed * math.tan(0.5 * steering) / 2.5
+        self.yaw += self.yaw_rate * dt
+        self.velocity = np.array([math.cos(self.yaw), math.sin(self.yaw), 0.0]) * self.speed
+        self.position += self.velocity * dt
+
+    def pose(self):
+        return Pose(Vector3r(*self.position.tolist()), _yaw_quaternion(self.yaw))
+
+    def kinematics(self):
+        return KinematicsState(position = Vector3r(*self.position.tolist()), orientation = _yaw_quaternion(self.yaw),
+                               linear_velocity = Vector3r(*self.velocity.tolist()), angular_velocity = Vector3r(0.0, 0.0, self.yaw_rate))
+
+
+class MockSimulator(object):
+    """
+    RPC handler implementing the simulator API with synthetic data
+
+    Args:
+        width (int, optional): Width of the images returned by `simGetImages`
+        height (int, optional): Height of the images returned by `simGetImages`
+        lidar_points (int, optional): Number of points in each lidar scan
+        image_rate_hz (float, optional): Image capture rate, image requests wait for the next frame. Unlimited if not set
+        lidar_rate_hz (float, optional): Lidar scan rate, lidar requests wait for the next scan. Unlimited if not set
+        frame_rate (float, optional): Frame rate of the simulated clock, used by `simContinueForFrames`
+        vehicles (list[str], optional): Names of the vehicles, the first one is used when no name is given
+        home (GeoPoint, optional): GPS location of the origin
+    """
+    def __init__(self, width = 256, height = 144, lidar_points = 1024, image_rate_hz = None, lidar_rate_hz = None,
+                 frame_rate = 60.0, vehicles = ('SimpleFlight',), home = None):
+        self.width = width
+        self.height = height
+        self.lidar_points = lidar_points
+        self.image_rate_hz = image_rate_hz
+        self.lidar_rate_hz = lidar_rate_hz
+        self.frame_rate = frame_rate
+        self.home = home if home is not None else GeoPoint(47.641468, -122.140165, 122.0)
+
+        self._epoch = time.time()
+        self._clock = 0.0
+        self._resumed_at = time.monotonic()
+        self._paused = False
+        self._pause_at = None
+        self._images = {}
+        self._lidar = None
+        self._objects = {}
+        self._recording = False
+        self._vehicles = {}
+        for name in vehicles:
+            self._vehicles[name] = _MockVehicle(name, 0.0)
+        self._default_vehicle = vehicles[0]
+
+    def __getattr__(self, name):
+        if name not in _IGNORED_RPCS:
+            raise AttributeError(name)
+
+        def ignored(*args):
+            logging.debug("Mock simulator ignoring '%s'", name)
+        return ignored
+
+#----------------------------------- clock ---------------------------------------------
+    def _sim_time(self):
+        if self._paused:
+            return self._clock
+        now = self._clock + time.monotonic() - self._resumed_at
+        if self._pause_at is not None and now >= self._pause_at:
+            self._clock, self._paused, self._pause_at = self._pause_at, True, None
+            return self._clock
+        return now
+
+    def _timestamp(self):
+        return int((self._epoch + self._sim_time()) * 1e9)
+
+    def simPause(self, is_paused):
+        self._clock = self._sim_time()
+        self._resumed_at = time.monotonic()
+        self._paused = bool(is_paused)
+        self._pause_at = None
+
+    def simIsPaused(self):
+        self._sim_time()
+        return self._paused
+
+    def simContinueForTime(self, seconds):
+        self.simPause(False)
+        self._pause_at = self._clock + seconds
+
+    def simContinueForFrames(self, frames):
+        self.simContinueForTime(frames / self.frame_rate)
+
+    async def _wait_for_frame(self, rate_hz):
+        if rate_hz:
+            period = 1.0 / rate_hz
+            await asyncio.sleep(period - time.monotonic() % period)
+
+#----------------------------------- vehicles ---------------------------------------------
+    def _vehicle(self, vehicle_name):
+        name = vehicle_name or self._default_vehicle
+        vehicle = self._vehicles.get(name)
+        if vehicle is None:
+            vehicle = self._vehicles[name] = _MockVehicle(name, self._sim_time())
+        vehicle.update(self._sim_time())
+        return vehicle
+
+    def _geo_point(self, position):
+        latitude = self.home.latitude + math.degrees(position[0] / _EARTH_RADIUS)
+        longitude = self.home.longitude + math.degrees(position[1] / (_EARTH_RADIUS * math.cos(math.radians(self.home.latitude))))
+        return GeoPoint(latitude, longitude, self.home.altitude - position[2])
+
+    async def _run(self, vehicle, motion, timeout_sec = None):
+        vehicle.motion = motion
+        deadline = self._sim_time() + timeout_sec if timeout_sec is not None else None
+        while vehicle.motion is motion:
+            await asyncio.sleep(0.01)
+            vehicle.update(self._sim_time())
+            if deadline is not None and self._sim_time() >= deadline:
+                vehicle.motion = None
+                return False
+        return True
+
+    def ping(self):
+        return True
+
+    def getServerVersion(self):
+        return 1
+
+    def getMinRequiredClientVersion(self):
+        return 1
+
+    def getSettingsString(self):
+        return '{"SettingsVersion": 1.2, "SimMode": "Multirotor"}'
+
+    def listVehicles(self):
+        return list(self._vehicles)
+
+    def simAddVehicle(self, vehicle_name, vehicle_type, pose, pawn_path):
+        vehicle = self._vehicle(vehicle_name)
+        vehicle.position = np.array(Pose.from_msgpack(pose).position.to_numpy_array(), dtype = np.float64)
+        return True
+
+    def reset(self):
+        for name in list(self._vehicles):
+            self._vehicles[name] = _MockVehicle(name, self._sim_time())
+
+    def enableApiControl(self, is_enabled, vehicle_name):
+        self._vehicle(vehicle_name).api_control = is_enabled
+
+    def isApiControlEnabled(self, vehicle_name):
+        return self._vehicle(vehicle_name).api_control
+
+    def armDisarm(self, arm, vehicle_name):
+        self._vehicle(vehicle_name).armed = arm
+        return True
+
+    def getHomeGeoPoint(self, vehicle_name):
+        return self.home.to_msgpack()
+
+    def simGetVehiclePose(self, vehicle_name):
+        return self._vehicle(vehicle_name).pose().to_msgpack()
+
+    def simSetVehiclePose(self, pose, ignore_collision, vehicle_name):
+        pose = Pose.from_msgpack(pose)
+        vehicle = self._vehicle(vehicle_name)
+        if not pose.position.containsNan():
+            vehicle.position = np.array([pose.position.x_val, pose.position.y_val, pose.position.z_val])
+        if not pose.orientation.containsNan():
+            vehicle.yaw = to_eularian_angles(pose.orientation)[2]
+
+    def simGetGroundTruthKinematics(self, vehicle_name):
+        return self._vehicle(vehicle_name).kinematics().to_msgpack()
+
+    def simSetKinematics(self, state, ignore_collision, vehicle_name):
+        state = KinematicsState.from_msgpack(state)
+        vehicle = self._vehicle(vehicle_name)
+        vehicle.position = np.array([state.position.x_val, state.position.y_val, state.position.z_val])
+        vehicle.yaw = to_eularian_angles(state.orientation)[2]
+
+    def simGetGroundTruthEnvironment(self, vehicle_name):
+        vehicle = self._vehicle(vehicle_name)
+        altitude = self.home.altitude - vehicle.position[2]
+        return EnvironmentState(position = Vector3r(*vehicle.position.tolist()), geo_point = self._geo_point(vehicle.position),
+                                gravity = Vector3r(0.0, 0.0, 9.80665), air_pressure = 101325.0 * (1 - 2.25577e-5 * altitude) ** 5.25588,
+                                temperature = 288.15 - 0.0065 * altitude, air_density = 1.225).to_msgpack()
+
+    def simGetCollisionInfo(self, vehicle_name):
+        return CollisionInfo(time_stamp = self._timestamp()).to_msgpack()
+
+    def getMultirotorState(self, vehicle_name):
+        vehicle = self._vehicle(vehicle_name)
+        return MultirotorState(kinematics_estimated = vehicle.kinematics(), gps_location = self._geo_point(vehicle.position),
+                               timestamp = self._timestamp(), landed_state = LandedState.Landed if vehicle.landed else LandedState.Flying,
+                               ready = True, can_arm = True).to_msgpack()
+
+    def getRotorStates(self, vehicle_name):
+        vehicle = self._vehicle(vehicle_name)
+        speed = 0.0 if vehicle.landed else 1000.0
+        return RotorStates(self._timestamp(), [{'speed': speed, 'thrust': 0.0, 'torque_scaler': 0.0} for _ in range(4)]).to_msgpack()
+
+    def setCarControls(self, controls, vehicle_name):
+        self._vehicle(vehicle_name).car_controls = controls
+
+    def getCarControls(self, vehicle_name):
+        controls = self._vehicle(vehicle_name).car_controls
+        return controls if controls is not None else CarControls().to_msgpack()
+
+    def getCarState(self, vehicle_name):
+        vehicle = self._vehicle(vehicle_name)
+        return CarState(speed = vehicle.speed, gear = 1 if vehicle.speed > 0 else 0, rpm = vehicle.speed * 250.0, maxrpm = 7500.0,
+                        kinematics_estimated = vehicle.kinematics(), timestamp = self._timestamp()).to_msgpack()
+
+#----------------------------------- multirotor commands ---------------------------------------------
+    def _path_motion(self, vehicle, points, velocity, yaw_mode = None):
+        motion = _Motion(path = [np.array(point, dtype = np.float64) for point in points], speed = max(velocity, 1e-3))
+        if yaw_mode is not None and not yaw_mode[0]:
+            motion.yaw = math.radians(yaw_mode[1])
+        return motion
+
+    def _velocity_motion(self, vehicle, velocity, duration, z = None, yaw_mode = None, body_frame = False):
+        if body_frame:
+            c, s = math.cos(vehicle.yaw), math.sin(vehicle.yaw)
+            velocity = [c * velocity[0] - s * velocity[1], s * velocity[0] + c * velocity[1], velocity[2]]
+        motion = _Motion(velocity = velocity, until = self._sim_time() + duration, z = z)
+        if yaw_mode is not None:
+            if yaw_mode[0]:
+                motion.yaw_rate = math.radians(yaw_mode[1])
+            else:
+                motion.yaw = math.radians(yaw_mode[1])
+        return motion
+
+    async def takeoff(self, timeout_sec, vehicle_name):
+        vehicle = self._vehicle(vehicle_name)
+        target = vehicle.position.copy()
+        target[2] = min(target[2], -3.0)
+        return await self._run(vehicle, self._path_motion(vehicle, [target], 2.0), timeout_sec)
+
+    async def land(self, timeout_sec, vehicle_name):
+        vehicle = self._vehicle(vehicle_name)
+        target = vehicle.position.copy()
+        target[2] = 0.0
+        return await self._run(vehicle, self._path_motion(vehicle, [target], 1.0), timeout_sec)
+
+    async def goHome(self, timeout_sec, vehicle_name):
+        vehicle = self._vehicle(vehicle_name)
+        return await self._run(vehicle, self._path_motion(vehicle, [[0.0, 0.0, vehicle.position[2]]], 5.0), timeout_sec)
+
+    async def hover(self, vehicle_name):
+        self._vehicle(vehicle_name).motion = None
+        return True
+
+    def cancelLastTask(self, vehicle_name):
+        self._vehicle(vehicle_name).motion = None
+
+    async def moveToPosition(self, x, y, z, velocity, timeout_sec, drivetrain, yaw_mode, lookahead, adaptive_lookahead, vehicle_name):
+        vehicle = self._vehicle(vehicle_name)
+        return await self._run(vehicle, self._path_motion(vehicle, [[x, y, z]], velocity, yaw_mode), timeout_sec)
+
+    async def moveToZ(self, z, velocity, timeout_sec, yaw_mode, lookahead, adaptive_lookahead, vehicle_name):
+        vehicle = self._vehicle(vehicle_name)
+        target = vehicle.position.copy()
+        target[2] = z
+        return await self._run(vehicle, self._path_motion(vehicle, [target], velocity, yaw_mode), timeout_sec)
+
+    async def moveOnPath(self, path, velocity, timeout_sec, drivetrain, yaw_mode, lookahead, adaptive_lookahead, vehicle_name):
+        vehicle = self._vehicle(vehicle_name)
+        return await self._run(vehicle, self._path_motion(vehicle, path, velocity, yaw_mode), timeout_sec)
+
+    async def moveToGPS(self, latitude, longitude, altitude, velocity, timeout_sec, drivetrain, yaw_mode, lookahead, adaptive_lookahead, vehicle_name):
+        vehicle = self._vehicle(vehicle_name)
+        target = [math.radians(latitude - self.home.latitude) * _EARTH_RADIUS,
+                  math.radians(longitude - self.home.longitude) * _EARTH_RADIUS * math.cos(math.radians(self.home.latitude)),
+                  self.home.altitude - altitude]
+        return await self._run(vehicle, self._path_motion(vehicle, [target], velocity, yaw_mode), timeout_sec)
+
+    async def moveByVelocity(self, vx, vy, vz, duration, drivetrain, yaw_mode, vehicle_name):
+        vehicle = self._vehicle(vehicle_name)
+        return await self._run(vehicle, self._velocity_motion(vehicle, [vx, vy, vz], duration, yaw_mode = yaw_mode))
+
+    async def moveByVelocityZ(self, vx, vy, z, duration, drivetrain, yaw_mode, vehicle_name):
+        vehicle = self._vehicle(vehicle_name)
+        return await self._run(vehicle, self._velocity_motion(vehicle, [vx, vy, 0.0], duration, z, yaw_mode))
+
+    async def moveByVelocityBodyFrame(self, vx, vy, vz, duration, drivetrain, yaw_mode, vehicle_name):
+        vehicle = self._vehicle(vehicle_name)
+        return await self._run(vehicle, self._velocity_motion(vehicle, [vx, vy, vz], duration, yaw_mode = yaw_mode, body_frame = True))
+
+    async def moveByVelocityZBodyFrame(self, vx, vy, z, duration, drivetrain, yaw_mode, vehicle_name):
+        vehicle = self._vehicle(vehicle_name)
+        return await self._run(vehicle, self._velocity_motion(vehicle, [vx, vy, 0.0], duration, z, yaw_mode, body_frame = True))
+
+    async def rotateToYaw(self, yaw, timeout_sec, margin, vehicle_name):
+        vehicle = self._vehicle(vehicle_name)
+        return await self._run(vehicle, _Motion(until = self._sim_time(), yaw = math.radians(yaw)), timeout_sec)
+
+    async def rotateByYawRate(self, yaw_rate, duration, vehicle_name):
+        vehicle = self._vehicle(vehicle_name)
+        return await self._run(vehicle, _Motion(until = self._sim_time() + duration, yaw_rate = math.radians(yaw_rate)))
+
+    async def _hold(self, duration, vehicle_name, z = None):
+        # attitude, rate and PWM commands have no model here, the vehicle holds its position for the duration
+        vehicle = self._vehicle(vehicle_name)
+        return await self._run(vehicle, _Motion(until = self._sim_time() + duration, z = z))
+
+    async def moveByManual(self, vx_max, vy_max, z_min, duration, drivetrain, yaw_mode, vehicle_name):
+        return await self._hold(duration, vehicle_name)
+
+    async def moveByMotorPWMs(self, front_right_pwm, rear_left_pwm, front_left_pwm, rear_right_pwm, duration, vehicle_name):
+        return await self._hold(duration, vehicle_name)
+
+    async def moveByRollPitchYawZ(self, roll, pitch, yaw, z, duration, vehicle_name):
+        return await self._hold(duration, vehicle_name, z)
+
+    async def moveByRollPitchYawThrottle(self, roll, pitch, yaw, throttle, duration, vehicle_name):
+        return await self._hold(duration, vehicle_name)
+
+    async def moveByRollPitchYawrateThrottle(self, roll, pitch, yaw_rate, throttle, duration, vehicle_name):
+        return await self._hold(duration, vehicle_name)
+
+    async def moveByRollPitchYawrateZ(self, roll, pitch, yaw_rate, z, duration, vehicle_name):
+        return await self._hold(duration, vehicle_name, z)
+
+    async def moveByAngleRatesZ(self, roll_rate, pitch_rate, yaw_rate, z, duration, vehicle_name):
+        return await self._hold(duration, vehicle_name, z)
+
+    async def moveByAngleRatesThrottle(self, roll_rate, pitch_rate, yaw_rate, throttle, duration, vehicle_name):
+        return await self._hold(duration, vehicle_name)
+
+#----------------------------------- sensors ---------------------------------------------
+    def getImuData(self, imu_name, vehicle_name):
+        vehicle = self._vehicle(vehicle_name)
+        return ImuData(time_stamp = self._timestamp(), orientation = _yaw_quaternion(vehicle.yaw),
+                       angular_velocity = Vector3r(0.0, 0.0, vehicle.yaw_rate), linear_acceleration = Vector3r(0.0, 0.0, -9.80665)).to_msgpack()
+
+    def getBarometerData(self, barometer_name, vehicle_name):
+        altitude = self.home.altitude - self._vehicle(vehicle_name).position[2]
+        return BarometerData(time_stamp = self._timestamp(), altitude = altitude,
+                             pressure = 101325.0 * (1 - 2.25577e-5 * altitude) ** 5.25588, qnh = 1013.25).to_msgpack()
+
+    def getMagnetometerData(self, magnetometer_name, vehicle_name):
+        yaw = self._vehicle(vehicle_name).yaw
+        return MagnetometerData(time_stamp = self._timestamp(), magnetic_field_body = Vector3r(0.2 * math.cos(yaw), -0.2 * math.sin(yaw), 0.4)).to_msgpack()
+
+    def getGpsData(self, gps_name, vehicle_name):
+        vehicle = self._vehicle(vehicle_name)
+        timestamp = self._timestamp()
+        gnss = GnssReport(geo_point = self._geo_point(vehicle.position), eph = 0.1, epv = 0.1, velocity = Vector3r(*vehicle.velocity.tolist()),
+                          fix_type = GnssFixType.GNSS_FIX_3D_FIX, time_utc = timestamp // 1000)
+        return GpsData(time_stamp = timestamp, gnss = gnss, is_valid = True).to_msgpack()
+
+    def getDistanceSensorData(self, distance_sensor_name, vehicle_name):
+        height = -self._vehicle(vehicle_name).position[2]
+        return DistanceSensorData(time_stamp = self._timestamp(), distance = min(max(height, 0.2), 40.0), min_distance = 0.2, max_distance = 40.0).to_msgpack()
+
+    async def getLidarData(self, lidar_name, vehicle_name):
+        await self._wait_for_frame(self.lidar_rate_hz)
+        if self._lidar is None or len(self._lidar[1]) != self.lidar_points:
+            # rings of points on a sphere of 10 m around the sensor
+            angles = np.linspace(0, 2 * np.pi, self.lidar_points, endpoint = False, dtype = np.float32)
+            elevation = np.deg2rad(np.tile(np.linspace(-15, 15, 16, dtype = np.float32), self.lidar_points // 16 + 1)[:self.lidar_points])
+            points = np.stack([np.cos(angles) * np.cos(elevation), np.sin(angles) * np.cos(elevation), -np.sin(elevation)], axis = -1) * 10.0
+            self._lidar = (points.ravel().tolist(), [0] * self.lidar_points)
+        point_cloud, segmentation = self._lidar
+        return [self._timestamp(), point_cloud, self._vehicle(vehicle_name).pose().to_msgpack(), segmentation]
+
+    def _image_data(self, image_type, pixels_as_float, compress, float_as_bytes):
+        key = (image_type, pixels_as_float, compress, float_as_bytes, self.width, self.height)
+        data = self._images.get(key)
+        if data is None:
+            rows, cols = np.mgrid[0:self.height, 0:self.width]
+            if pixels_as_float:
+                depth = (1.0 + rows * (100.0 / max(self.height, 1)) + cols * 0.01).astype(np.float32)
+                data = (depth.tobytes(), []) if float_as_bytes else (b'', depth.ravel().tolist())
+            else:
+                pixels = np.stack([(cols * 255 // max(self.width, 1)), (rows * 255 // max(self.height, 1)),
+                                   np.full_like(rows, (image_type * 40) % 256)], axis = -1).astype(np.uint8)
+                data = (_encode_png(pixels) if compress else pixels.tobytes(), [])
+            self._images[key] = data
+        return data
+
+    async def simGetImages(self, requests, vehicle_name, external):
+        await self._wait_for_frame(self.image_rate_hz)
+        pose = self._vehicle(vehicle_name).pose()
+        timestamp = self._timestamp()
+        responses = []
+        for request in requests:
+            camera_name, image_type, pixels_as_float, compress = request[:4]
+            float_as_bytes = len(request) > 4 and request[4]
+            image_data_uint8, image_data_float = self._image_data(image_type, pixels_as_float, compress, pixels_as_float and float_as_bytes)
+            responses.append([image_data_uint8, image_data_float, pose.position.to_msgpack(), camera_name, pose.orientation.to_msgpack(),
+                              timestamp, '', pixels_as_float, compress, self.width, self.height, image_type])
+        return responses
+
+    async def simGetImage(self, camera_name, image_type, vehicle_name, external):
+        await self._wait_for_frame(self.image_rate_hz)
+        return self._image_data(image_type, False, True, False)[0]
+
+    def simGetCameraInfo(self, camera_name, vehicle_name, external):
+        fov = 90.0
+        focal = 1.0 / math.tan(math.radians(fov) / 2)
+        matrix = [[focal, 0.0, 0.0, 0.0], [0.0, focal * self.width / max(self.height, 1), 0.0, 0.0], [0.0, 0.0, 0.0, 10.0], [0.0, 0.0, 1.0, 0.0]]
+        return [self._vehicle(vehicle_name).pose().to_msgpack(), fov, [matrix]]
+
+#----------------------------------- scene ---------------------------------------------
+    def simListSceneObjects(self, name_regex):
+        names = list(self._vehicles) + list(self._objects)
+        return [name for name in names if re.match(name_regex, name)]
+
+    def simListSceneObjectsByTag(self, tag_regex):
+        return []
+
+    def simListAssets(self):
+        return []
+
+    def simSpawnObject(self, object_name, asset_name, pose, scale, physics_enabled, is_blueprint):
+        self._objects[object_name] = [Pose.from_msgpack(pose), Vector3r.from_msgpack(scale)]
+        return object_name
+
+    def simDestroyObject(self, object_name):
+        return self._objects.pop(object_name, None) is not None
+
+    def simGetObjectPose(self, object_name):
+        if object_name in self._vehicles:
+            return self._vehicle(object_name).pose().to_msgpack()
+        if object_name in self._objects:
+            return self._objects[object_name][0].to_msgpack()
+        return Pose.nanPose().to_msgpack()
+
+    def simSetObjectPose(self, object_name, pose, teleport):
+        if object_name not in self._objects:
+            return False
+        self._objects[object_name][0] = Pose.from_msgpack(pose)
+        return True
+
+    def simGetObjectScale(self, object_name):
+        if object_name in self._objects:
+            return self._objects[object_name][1].to_msgpack()
+        return Vector3r(1.0, 1.0, 1.0).to_msgpack()
+
+    def simSetObjectScale(self, object_name, scale_vector):
+        if object_name not in self._objects:
+            return False
+        self._objects[object_name][1] = Vector3r.from_msgpack(scale_vector)
+        return True
+
+    def simGetSegmentationObjectID(self, mesh_name):
+        return -1
+
+    def simSetSegmentationObjectID(self, mesh_name, object_id, is_name_regex):
+        return True
+
+    def simGetDetections(self, camera_name, image_type, vehicle_name, external):
+        return []
+
+    def simGetWorldExtents(self):
+        return [GeoPoint(-1000.0, -1000.0, -1000.0).to_msgpack(), GeoPoint(1000.0, 1000.0, 1000.0).to_msgpack()]
+
+    def simTestLineOfSightToPoint(self, point, vehicle_name):
+        return True
+
+    def simTestLineOfSightBetweenPoints(self, point1, point2):
+        return True
+
+    def simRunConsoleCommand(self, command):
+        return True
+
+    def simLoadLevel(self, level_name):
+        return True
+
+    def startRecording(self):
+        self._recording = True
+
+    def stopRecording(self):
+        self._recording = False
+
+    def isRecording(self):
+        return self._recording
+
+
+class MockServer(object):
+    """
+    Runs a `MockSimulator` on a background thread, keyword arguments are passed to the simulator
+
+    Args:
+        host (str, optional): Address to listen on
+        port (int, optional): Port to listen on, 0 picks a free one which is then available as `port`
+    """
+    def __init__(self, host = "127.0.0.1", port = 41451, **kwargs):
+        self.host = host
+        self.simulator = MockSimulator(**kwargs)
+        self._requested_port = port
+        self._loop = None
+        self._thread = None
+        self._server = None
+
+    def start(self):
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target = self._loop.run_forever, daemon = True)
+        self._thread.start()
+        started = asyncio.run_coroutine_threadsafe(RpcServer(self.simulator).start(self.host, self._requested_port), self._loop)
+        self._server = started.result()
+        return self
+
+    @property
+    def port(self):
+        return self._server.port
+
+    def stop(self):
+        if self._loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self._loop = None
+
+    async def _shutdown(self):
+        self._server.close()
+        await self._server.wait_closed()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description = "Serve the simulator API with synthetic data")
+    parser.add_argument('--host', default = "127.0.0.1")
+    parser.add_argument('--port', type = int, default = 41451)
+    parser.add_argument('--width', type = int, default = 256)
+    parser.add_argument('--height', type = int, default = 144)
+    parser.add_argument('--lidar_points', type = int, default = 1024)
+    parser.add_argument('--image_rate', type = float, default = None, help = "Image capture rate in Hz, unlimited if not set")
+    parser.add_argument('--lidar_rate', type = float, default = None, help = "Lidar scan rate in Hz, unlimited if not set")
+    parser.add_argument('--vehicles', nargs = '+', default = ['SimpleFlight'])
+    args = parser.parse_args()
+
+    simulator = MockSimulator(args.width, args.height, args.lidar_points, args.image_rate, args.lidar_rate, vehicles = args.vehicles)
+    loop = asyncio.new_event_loop()
+    server = loop.run_until_complete(RpcServer(simulator).start(args.host, args.port))
+    print("Mock simulator listening on %s:%d" % (args.host, server.port))
+    try:
+        loop.run_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        loop.close()
+
+
+if __name__ == '__main__':
+    main()
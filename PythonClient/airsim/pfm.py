@@ -1,85 +1,174 @@
-import numpy as np
-import matplotlib.pyplot as plt
-import re
+"""
+Reading and writing of PFM files, as saved for depth and other float images
+
+Rows are stored top to bottom, as AirSim has always written them, rather than bottom to top as in the PFM spec.
+The data section can be memory mapped or read a range of rows at a time, so large captures don't need to be loaded whole.
+"""
+import collections
+import concurrent.futures
+import glob
+import os
 import sys
-import pdb
-
 
-def read_pfm(file):
-    """ Read a pfm file """
-    file = open(file, 'rb')
+import numpy as np
 
-    color = None
-    width = None
-    height = None
-    scale = None
-    endian = None
 
-    header = file.readline().rstrip()
-    header = str(bytes.decode(header, encoding='utf-8'))
-    if header == 'PF':
-        color = True
-    elif header == 'Pf':
-        color = False
+PfmHeader = collections.namedtuple('PfmHeader', ['width', 'height', 'channels', 'scale', 'dtype', 'offset'])
+PfmHeader.__doc__ = """
+Header of a PFM file, `dtype` carries the byte order of the data and `offset` is where the data starts
+"""
+
+
+def read_pfm_header(file):
+    """
+    Args:
+        file (str): Path of the PFM file
+
+    Returns:
+        PfmHeader:
+    """
+    with open(file, 'rb') as f:
+        head = f.read(256)
+
+    # magic, width, height and scale are separated by any whitespace, often but not always one line each,
+    # and the data starts after the single whitespace character following the scale
+    tokens = []
+    pos = 0
+    while len(tokens) < 4:
+        while pos < len(head) and head[pos:pos + 1].isspace():
+            pos += 1
+        end = pos
+        while end < len(head) and not head[end:end + 1].isspace():
+            end += 1
+        if end == pos or end == len(head):
+            raise Exception('Malformed PFM header.')
+        tokens.append(head[pos:end].decode('ascii', 'replace'))
+        pos = end
+    offset = pos + 1
+
+    if tokens[0] == 'PF':
+        channels = 3
+    elif tokens[0] == 'Pf':
+        channels = 1
     else:
         raise Exception('Not a PFM file.')
+    try:
+        width, height, scale = int(tokens[1]), int(tokens[2]), float(tokens[3])
+    except ValueError:
+        raise Exception('Malformed PFM header: width, height cannot be found')
 
-    pattern = r'^(\d+)\s(\d+)\s$'
-    temp_str = str(bytes.decode(file.readline(), encoding='utf-8'))
-    dim_match = re.match(pattern, temp_str)
-    if dim_match:
-        width, height = map(int, dim_match.groups())
-    else:
-        temp_str += str(bytes.decode(file.readline(), encoding='utf-8'))
-        dim_match = re.match(pattern, temp_str)
-        if dim_match:
-            width, height = map(int, dim_match.groups())
-        else:
-            raise Exception('Malformed PFM header: width, height cannot be found')
-
-    scale = float(file.readline().rstrip())
-    if scale < 0: # little-endian
-        endian = '<'
-        scale = -scale
+    # negative scale means little-endian
+    dtype = np.dtype('<f4' if scale < 0 else '>f4')
+    return PfmHeader(width, height, channels, abs(scale), dtype, offset)
+
+
+def _shape(header, rows):
+    return (rows, header.width, 3) if header.channels == 3 else (rows, header.width)
+
+
+def read_pfm(file, mmap = False):
+    """
+    Read a pfm file
+
+    Args:
+        file (str): Path of the PFM file
+        mmap (bool, optional): Return a read-only `np.memmap` of the data instead of loading it
+
+    Returns:
+        tuple: Array of shape (H, W) or (H, W, 3) and the scale
+    """
+    header = read_pfm_header(file)
+    shape = _shape(header, header.height)
+    if mmap:
+        data = np.memmap(file, dtype = header.dtype, mode = 'r', offset = header.offset, shape = shape)
     else:
-        endian = '>' # big-endian
+        with open(file, 'rb') as f:
+            f.seek(header.offset)
+            data = np.fromfile(f, header.dtype, count = int(np.prod(shape))).reshape(shape)
+    return data, header.scale
 
-    data = np.fromfile(file, endian + 'f')
-    shape = (height, width, 3) if color else (height, width)
 
-    data = np.reshape(data, shape)
-    # DEY: I don't know why this was there.
-    file.close()
-    
-    return data, scale
+def read_pfm_rows(file, start, stop):
+    """
+    Read rows `start` to `stop` (exclusive) of a pfm file, without reading the rest of the data
 
+    Returns:
+        tuple: Array of shape (stop - start, W[, 3]) and the scale
+    """
+    header = read_pfm_header(file)
+    start, stop, _ = slice(start, stop).indices(header.height)
+    rows = max(stop - start, 0)
+    row_size = header.width * header.channels
+    with open(file, 'rb') as f:
+        f.seek(header.offset + start * row_size * header.dtype.itemsize)
+        data = np.fromfile(f, header.dtype, count = rows * row_size)
+    return data.reshape(_shape(header, rows)), header.scale
 
-def write_pfm(file, image, scale=1):
-    """ Write a pfm file """
-    file = open(file, 'wb')
 
-    color = None
+def write_pfm(file, image, scale=1):
+    """
+    Write a pfm file
 
+    C-contiguous float32 images are written straight from their buffer, other layouts are copied first.
+    """
     if image.dtype.name != 'float32':
         raise Exception('Image dtype must be float32.')
 
     if len(image.shape) == 3 and image.shape[2] == 3: # color image
         color = True
-    elif len(image.shape) == 2 or len(image.shape) == 3 and image.shape[2] == 1: # greyscale
+    elif len(image.shape) == 2 or len(image.shape) == 3 and image.shape[2] == 1: # grayscale
         color = False
     else:
         raise Exception('Image must have H x W x 3, H x W x 1 or H x W dimensions.')
 
-    file.write(bytes('PF\n', 'UTF-8') if color else bytes('Pf\n', 'UTF-8'))
-    temp_str = '%d %d\n' % (image.shape[1], image.shape[0])
-    file.write(bytes(temp_str, 'UTF-8'))
-
+    image = np.ascontiguousarray(image)
     endian = image.dtype.byteorder
-
     if endian == '<' or endian == '=' and sys.byteorder == 'little':
         scale = -scale
 
-    temp_str = '%f\n' % scale
-    file.write(bytes(temp_str, 'UTF-8'))
+    with open(file, 'wb') as f:
+        f.write(('PF\n' if color else 'Pf\n').encode('utf-8'))
+        f.write(('%d %d\n' % (image.shape[1], image.shape[0])).encode('utf-8'))
+        f.write(('%f\n' % scale).encode('utf-8'))
+        f.write(memoryview(image).cast('B'))
 
-    image.tofile(file)
+
+def _convert_pfm(src, dst, format, depth_scale):
+    data, scale = read_pfm(src, mmap = True)
+    if format == 'npy':
+        np.save(dst, np.asarray(data, dtype = np.float32))
+    else:
+        import cv2      # pip install opencv-python
+
+        # 16 bit PNG, e.g. depth in millimeters with the default depth_scale
+        pixels = np.clip(np.nan_to_num(np.asarray(data) * depth_scale), 0, 65535).astype(np.uint16)
+        if not cv2.imwrite(dst, pixels):
+            raise Exception('Writing %s failed' % dst)
+    return dst
+
+
+def convert_pfm_directory(src_dir, dst_dir = None, format = 'npy', depth_scale = 1000.0, workers = None, pattern = '*.pfm'):
+    """
+    Convert all the PFM files of a directory in parallel
+
+    Args:
+        src_dir (str): Directory of the PFM files
+        dst_dir (str, optional): Output directory, defaults to `src_dir`
+        format (str, optional): 'npy' for float32 arrays or 'png' for 16 bit PNGs of the values times `depth_scale`
+        depth_scale (float, optional): Multiplier applied before the 'png' conversion, 1000 stores depth in millimeters
+        workers (int, optional): Number of worker processes, defaults to the number of CPUs
+        pattern (str, optional): Glob pattern of the files to convert
+
+    Returns:
+        list[str]: Paths of the written files
+    """
+    if format not in ('npy', 'png'):
+        raise ValueError("Unsupported format '%s'" % format)
+    dst_dir = dst_dir or src_dir
+    os.makedirs(dst_dir, exist_ok = True)
+    sources = sorted(glob.glob(os.path.join(src_dir, pattern)))
+    targets = [os.path.join(dst_dir, os.path.splitext(os.path.basename(src))[0] + '.' + format) for src in sources]
+
+    with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+        chunksize = max(1, len(sources) // (4 * (workers or os.cpu_count() or 1)))
+        return list(executor.map(_convert_pfm, sources, targets, [format] * len(sources), [depth_scale] * len(sources), chunksize = chunksize))
@@ -0,0 +1,435 @@
+"""
+Append-only recording files for API data, e.g. images, vehicle states and sensor data
+
+A recording is a data file of records, each a small header (timestamp in nanoseconds, stream id, length)
+followed by the msgpack encoded value, and an index file next to it with one fixed size entry per record.
+Records are only ever appended, a record cut short by a crash is dropped when the file is opened again.
+Readers only load the index, so finding a timestamp in a recording of any length is a binary search and
+only the records actually read are loaded.
+
+Values are grouped in named streams, e.g. 'state' or 'image/front_center/0'. Each stream remembers the type of
+its values so that `RecordingReader` gives back the same objects, e.g. `MultirotorState` or `list[ImageResponse]`.
+
+    with Recorder('flight.rec') as recorder:
+        recorder.record('state', client.subscribe_state(rate_hz = 50, maxsize = 64))
+        recorder.record('images', client.subscribe_images(requests, rate_hz = 10, maxsize = 16))
+        client.moveToPositionAsync(-10, 10, -10, 5).join()
+
+    with RecordingReader('flight.rec') as reader:
+        start, end = reader.time_range()
+        state = reader.read_at(start + 60 * 10**9, 'state').data
+        for timestamp, stream, value in reader.replay(start = start + 60 * 10**9):
+            ...
+"""
+import collections
+import logging
+import os
+import struct
+import threading
+import time
+
+import msgpack
+import numpy as np
+
+from .types import ImageResponse, MsgpackMixin
+
+_MAGIC = b'AIRSIMRC'
+_VERSION = 1
+_FILE_HEADER = struct.Struct('<8sI')
+_RECORD_HEADER = struct.Struct('<QII')
+_STREAM_DEFINITION = 0
+
+INDEX_DTYPE = np.dtype([('timestamp', '<u8'), ('offset', '<u8'), ('length', '<u4'), ('stream', '<u4')])
+
+Record = collections.namedtuple('Record', ['timestamp', 'stream', 'data'])
+
+
+def _pack_default(obj):
+    if isinstance(obj, np.ndarray):
+        return obj.tobytes()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if hasattr(obj, 'to_msgpack'):
+        return obj.to_msgpack()
+    raise TypeError("can not serialize '%s' object" % type(obj).__name__)
+
+
+def _encode_value(value):
+    if isinstance(value, ImageResponse):
+        return _encode_image_response(value)
+    if isinstance(value, MsgpackMixin):
+        return value.to_msgpack()
+    if isinstance(value, (list, tuple)) and value and isinstance(value[0], MsgpackMixin):
+        return [_encode_value(item) for item in value]
+    return value
+
+
+def _encode_image_response(response):
+    encoded = response.to_msgpack()
+    if response.pixels_as_float and len(response.image_data_float):
+        # float pixels are stored as raw float32 bytes, which ImageResponse.from_msgpack turns back into an array
+        encoded[0] = np.asarray(response.image_data_float, dtype = '<f4').tobytes()
+        encoded[1] = []
+    else:
+        encoded[0] = bytes(memoryview(np.ascontiguousarray(response.image_data_uint8)).cast('B'))
+        encoded[1] = []
+    return encoded
+
+
+def _value_type(value):
+    if isinstance(value, MsgpackMixin):
+        return type(value).__name__
+    if isinstance(value, (list, tuple)) and value and isinstance(value[0], MsgpackMixin):
+        return 'list[%s]' % type(value[0]).__name__
+    return ''
+
+
+def _api_type(name):
+    classes = [MsgpackMixin]
+    while classes:
+        cls = classes.pop()
+        if cls.__name__ == name:
+            return cls
+        classes.extend(cls.__subclasses__())
+    return None
+
+
+def _decoder(type_name):
+    is_list = type_name.startswith('list[')
+    cls = _api_type(type_name[5:-1] if is_list else type_name) if type_name else None
+    if cls is None:
+        return lambda encoded: encoded
+    if is_list:
+        return lambda encoded: [cls.from_msgpack(item) for item in encoded]
+    return cls.from_msgpack
+
+
+def _value_timestamp(value):
+    if isinstance(value, (list, tuple)) and value:
+        value = value[0]
+    for name in ('time_stamp', 'timestamp'):
+        timestamp = getattr(value, name, None)
+        if timestamp:
+            return int(timestamp)
+    return time.time_ns()
+
+
+def _scan(f, offset, size):
+    """ Yields (offset, timestamp, stream, length) of the complete records from `offset` """
+    while offset + _RECORD_HEADER.size <= size:
+        f.seek(offset)
+        timestamp, stream, length = _RECORD_HEADER.unpack(f.read(_RECORD_HEADER.size))
+        if offset + _RECORD_HEADER.size + length > size:
+            return
+        yield offset, timestamp, stream, length
+        offset += _RECORD_HEADER.size + length
+
+
+def _load_index(path, data_file, data_size):
+    """
+    Index entries of a recording, memory mapped unless the data file has records the index is missing,
+    e.g. while it's still being written or after a crash
+    """
+    index_path = path + '.idx'
+    count = os.path.getsize(index_path) // INDEX_DTYPE.itemsize if os.path.exists(index_path) else 0
+    index = np.memmap(index_path, dtype = INDEX_DTYPE, mode = 'r', shape = (count,)) if count else np.empty(0, dtype = INDEX_DTYPE)
+    # the index is written after the data, drop entries of records which didn't make it to the data file
+    while count and int(index[count - 1]['offset']) + _RECORD_HEADER.size + int(index[count - 1]['length']) > data_size:
+        count -= 1
+    index = index[:count]
+    if count:
+        offset = int(index[-1]['offset']) + _RECORD_HEADER.size + int(index[-1]['length'])
+    else:
+        offset = _FILE_HEADER.size
+    missing = [(timestamp, record_offset, length, stream) for record_offset, timestamp, stream, length in _scan(data_file, offset, data_size)]
+    if missing:
+        index = np.concatenate([index, np.array(missing, dtype = INDEX_DTYPE)])
+    return index
+
+
+class RecordingWriter(object):
+    """
+    Appends values to a recording, opening an existing one continues it
+
+    Args:
+        path (str): Path of the data file, the index is written to `path + '.idx'`
+    """
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._streams = {}
+        exists = os.path.exists(path) and os.path.getsize(path) >= _FILE_HEADER.size
+        self._data = open(path, 'r+b' if exists else 'w+b')
+        if exists:
+            _check_header(self._data)
+            size = os.fstat(self._data.fileno()).st_size
+            index = _load_index(path, self._data, size)
+            end = int(index[-1]['offset']) + _RECORD_HEADER.size + int(index[-1]['length']) if len(index) else _FILE_HEADER.size
+            # drop a partly written record and rewrite the index if it doesn't match the data
+            self._data.truncate(end)
+            if len(index) * INDEX_DTYPE.itemsize != os.path.getsize(path + '.idx'):
+                index = np.array(index)
+                index.tofile(path + '.idx')
+            for entry in index[index['stream'] == _STREAM_DEFINITION]:
+                stream_id, name, type_name = self._read_definition(int(entry['offset']), int(entry['length']))
+                self._streams[name] = (stream_id, type_name)
+            self._data.seek(end)
+        else:
+            self._data.write(_FILE_HEADER.pack(_MAGIC, _VERSION))
+        self._index = open(path + '.idx', 'ab')
+        self._packer = msgpack.Packer(default = _pack_default, use_bin_type = True)
+
+    def _read_definition(self, offset, length):
+        self._data.seek(offset + _RECORD_HEADER.size)
+        return msgpack.unpackb(self._data.read(length), raw = False)
+
+    def write(self, stream, value, timestamp = None):
+        """
+        Args:
+            stream (str): Name of the stream, e.g. 'state'
+            value: API object such as `MultirotorState` or `ImageResponse`, a list of them, or any msgpack serializable value
+            timestamp (int, optional): Nanoseconds, defaults to the `time_stamp` or `timestamp` of the value or the current time
+        """
+        if timestamp is None:
+            timestamp = _value_timestamp(value)
+        payload = self._packer.pack(_encode_value(value))
+        with self._lock:
+            definition = self._streams.get(stream)
+            if definition is None:
+                definition = self._streams[stream] = (len(self._streams) + 1, _value_type(value))
+                self._append(timestamp, _STREAM_DEFINITION, self._packer.pack([definition[0], stream, definition[1]]))
+            self._append(timestamp, definition[0], payload)
+
+    def _append(self, timestamp, stream_id, payload):
+        offset = self._data.tell()
+        self._data.write(_RECORD_HEADER.pack(timestamp, stream_id, len(payload)))
+        self._data.write(payload)
+        self._index.write(np.array([(timestamp, offset, len(payload), stream_id)], dtype = INDEX_DTYPE).tobytes())
+
+    def flush(self):
+        with self._lock:
+            self._data.flush()
+            self._index.flush()
+
+    def close(self):
+        with self._lock:
+            if self._data.closed:
+                return
+            self._data.close()
+            self._index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def _check_header(f):
+    f.seek(0)
+    magic, version = _FILE_HEADER.unpack(f.read(_FILE_HEADER.size))
+    if magic != _MAGIC:
+        raise Exception('Not a recording file.')
+    if version > _VERSION:
+        raise Exception('Recording version %d is not supported.' % version)
+
+
+class RecordingReader(object):
+    """
+    Random access to a recording by position or time, readable while it's still being written
+
+    Args:
+        path (str): Path of the data file
+        streams (list[str], optional): Only read these streams
+    """
+    def __init__(self, path, streams = None):
+        self.path = path
+        self._data = open(path, 'rb')
+        _check_header(self._data)
+        index = _load_index(path, self._data, os.fstat(self._data.fileno()).st_size)
+
+        self.streams = {}
+        self._decoders = {}
+        names = {}
+        for entry in index[index['stream'] == _STREAM_DEFINITION]:
+            self._data.seek(int(entry['offset']) + _RECORD_HEADER.size)
+            stream_id, name, type_name = msgpack.unpackb(self._data.read(int(entry['length'])), raw = False)
+            self.streams[name] = type_name
+            names[stream_id] = name
+            self._decoders[stream_id] = _decoder(type_name)
+        self._names = names
+
+        selected = [stream_id for stream_id, name in names.items() if streams is None or name in streams]
+        if len(selected) != len(names) or np.any(index['stream'] == _STREAM_DEFINITION):
+            index = index[np.isin(index['stream'], selected)]
+        # records are appended in arrival order, sort by time for seeking, keeping the order of equal timestamps
+        timestamps = index['timestamp']
+        if np.any(timestamps[1:] < timestamps[:-1]):
+            index = index[np.argsort(timestamps, kind = 'stable')]
+        self.index = index
+        self._stream_positions = {}
+
+    def __len__(self):
+        return len(self.index)
+
+    @property
+    def timestamps(self):
+        return self.index['timestamp']
+
+    def time_range(self):
+        """
+        Returns:
+            tuple: First and last timestamps in nanoseconds
+        """
+        if not len(self.index):
+            return None
+        return int(self.index['timestamp'][0]), int(self.index['timestamp'][-1])
+
+    def find(self, timestamp):
+        """
+        Returns:
+            int: Position of the first record at or after `timestamp`
+        """
+        return int(np.searchsorted(self.index['timestamp'], timestamp, side = 'left'))
+
+    def read(self, position):
+        """
+        Returns:
+            Record: Timestamp, stream name and decoded value of the record at `position`
+        """
+        entry = self.index[position]
+        self._data.seek(int(entry['offset']) + _RECORD_HEADER.size)
+        encoded = msgpack.unpackb(self._data.read(int(entry['length'])), raw = False)
+        stream_id = int(entry['stream'])
+        return Record(int(entry['timestamp']), self._names[stream_id], self._decoders[stream_id](encoded))
+
+    def read_at(self, timestamp, stream):
+        """
+        Returns:
+            Record: Latest record of `stream` at or before `timestamp`, None if there is none
+        """
+        positions, timestamps = self._positions(stream)
+        count = int(np.searchsorted(timestamps, timestamp, side = 'right'))
+        return self.read(int(positions[count - 1])) if count else None
+
+    def _positions(self, stream):
+        # positions and timestamps of the records of a stream, found once per stream
+        if stream not in self._stream_positions:
+            stream_ids = [stream_id for stream_id, name in self._names.items() if name == stream]
+            positions = np.flatnonzero(self.index['stream'] == stream_ids[0]) if stream_ids else np.empty(0, dtype = np.intp)
+            self._stream_positions[stream] = (positions, np.asarray(self.index['timestamp'][positions]))
+        return self._stream_positions[stream]
+
+    def records(self, start = None, end = None):
+        """
+        Iterates over the records from time `start` up to, not including, time `end`
+        """
+        first = self.find(start) if start is not None else 0
+        last = self.find(end) if end is not None else len(self.index)
+        for position in range(first, last):
+            yield self.read(position)
+
+    def __iter__(self):
+        return self.records()
+
+    def replay(self, start = None, end = None, speed = 1.0):
+        """
+        Iterates over the records like `records()`, yielding each one when it's due relative to the first
+
+        Args:
+            speed (float, optional): Playback speed, 2 replays twice as fast, None yields records as fast as they are read
+        """
+        started_at = None
+        for record in self.records(start, end):
+            if speed:
+                if started_at is None:
+                    started_at, first = time.monotonic(), record.timestamp
+                delay = started_at + (record.timestamp - first) * 1e-9 / speed - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+            yield record
+
+    def close(self):
+        self.index = None
+        self._stream_positions = {}
+        self._data.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class Recorder(object):
+    """
+    Records the results of subscriptions into a recording, each on its own thread
+
+    Args:
+        path (str): Path of the recording, an existing one is continued
+        flush_interval (float, optional): Seconds between flushes to disk, so that readers see recent records and
+                                          a crash loses at most this much data
+    """
+    def __init__(self, path, flush_interval = 1.0):
+        self.writer = RecordingWriter(path)
+        self.flush_interval = flush_interval
+        self._subscriptions = {}
+        self._threads = []
+        self._errors = []
+        self._last_flush = time.monotonic()
+
+    def record(self, stream, subscription):
+        """
+        Args:
+            stream (str): Name of the stream, e.g. 'state' or 'images'
+            subscription (Subscription): Results to record, e.g. from `client.subscribe_state()` or `client.subscribe_images()`.
+                                         Use a `maxsize` large enough that the recorder doesn't fall behind and drop results
+        """
+        if stream in self._subscriptions:
+            raise ValueError("Stream '%s' is already recorded" % stream)
+        self._subscriptions[stream] = subscription
+        thread = threading.Thread(target = self._run, args = (stream, subscription), daemon = True)
+        self._threads.append(thread)
+        thread.start()
+
+    def write(self, stream, value, timestamp = None):
+        """
+        Records a single value, e.g. the controls sent to the vehicle, see `RecordingWriter.write`
+        """
+        self.writer.write(stream, value, timestamp)
+
+    def _run(self, stream, subscription):
+        try:
+            for value in subscription:
+                self.writer.write(stream, value)
+                if time.monotonic() - self._last_flush > self.flush_interval:
+                    self._last_flush = time.monotonic()
+                    self.writer.flush()
+        except Exception as e:
+            logging.exception("Recording of stream '%s' stopped", stream)
+            self._errors.append(e)
+
+    @property
+    def dropped(self):
+        """ Number of results dropped by each subscription because the recorder fell behind """
+        return {stream: subscription.dropped for stream, subscription in self._subscriptions.items()}
+
+    def stop(self):
+        """
+        Stops the subscriptions, writes the remaining results and closes the recording
+
+        Raises the first error of a failed subscription
+        """
+        for subscription in self._subscriptions.values():
+            subscription.close(drain = True)
+        for thread in self._threads:
+            thread.join()
+        self.writer.close()
+        if self._errors:
+            raise self._errors[0]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
@@ -0,0 +1,274 @@
+"""
+Client-side RPC instrumentation, enabled with `VehicleClient(stats = True)`
+
+Each call is measured at three points: packing and sending the request, unpacking the response on the connection,
+and decoding the result into Python types in the API method. Per method counts, bytes and timings are available
+from `VehicleClient.get_stats()`, and every call is passed to the callbacks added with `add_stats_callback()`.
+"""
+import collections
+import functools
+import logging
+import threading
+import time
+
+import numpy as np
+import msgpackrpc.message
+import msgpackrpc.session
+from msgpackrpc.transport import tcp
+
+# Internals of msgpack-rpc-python 0.4 the instrumentation hooks into, for each class its methods and the instance
+# attributes set by its constructor
+_REQUIRED_INTERNALS = [
+    ('ClientSocket', ('send_message', 'on_read', 'on_message', 'connect'), ()),
+    ('BaseSocket', (), ('_stream', '_packer', '_unpacker')),
+    ('ClientTransport', (), ('_session', '_address', '_encodings')),
+    ('IOStream', (), ()),
+]
+
+
+def missing_internals():
+    """
+    Returns:
+        list[str]: The msgpack-rpc-python internals used by the instrumentation which the installed version doesn't have,
+                   empty when `VehicleClient(stats = True)` is supported
+    """
+    classes = [(getattr(tcp, name, None), 'tcp.' + name, methods, attributes)
+               for name, methods, attributes in _REQUIRED_INTERNALS]
+    classes.append((getattr(msgpackrpc.session, 'Session', None), 'session.Session', (), ('_request_table', '_loop')))
+    missing = []
+    for cls, name, methods, attributes in classes:
+        if cls is None:
+            missing.append(name)
+            continue
+        missing += ['%s.%s' % (name, method) for method in methods if not hasattr(cls, method)]
+        constructor_names = getattr(getattr(cls.__init__, '__code__', None), 'co_names', ())
+        missing += ['%s.%s' % (name, attribute) for attribute in attributes if attribute not in constructor_names]
+    return missing
+
+
+class CallRecord(object):
+    """
+    Measurements of a single RPC call, times are in seconds
+
+    `decode_time` is None when the result is not decoded by an API method, e.g. for `*Async` calls
+    """
+    __slots__ = ('method', 'bytes_out', 'bytes_in', 'serialize_time', 'deserialize_time', 'rtt', 'decode_time', 'error',
+                 '_sent_at', '_returned_at')
+
+    def __init__(self, method, bytes_out, serialize_time, sent_at):
+        self.method = method
+        self.bytes_out = bytes_out
+        self.bytes_in = 0
+        self.serialize_time = serialize_time
+        self.deserialize_time = 0.0
+        self.rtt = None
+        self.decode_time = None
+        self.error = False
+        self._sent_at = sent_at
+        self._returned_at = None
+
+    def __repr__(self):
+        return "<CallRecord> %s" % {name: getattr(self, name) for name in self.__slots__ if not name.startswith('_')}
+
+
+class _MethodStats(object):
+    def __init__(self, max_samples):
+        self.count = 0
+        self.errors = 0
+        self.bytes_out = 0
+        self.bytes_in = 0
+        self.serialize_time = 0.0
+        self.deserialize_time = 0.0
+        self.rtt = collections.deque(maxlen = max_samples)
+        self.decode = collections.deque(maxlen = max_samples)
+
+    def add(self, record):
+        self.count += 1
+        self.errors += record.error
+        self.bytes_out += record.bytes_out
+        self.bytes_in += record.bytes_in
+        self.serialize_time += record.serialize_time
+        self.deserialize_time += record.deserialize_time
+        if record.rtt is not None:
+            self.rtt.append(record.rtt)
+        if record.decode_time is not None:
+            self.decode.append(record.decode_time)
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'errors': self.errors,
+            'bytes_out': self.bytes_out,
+            'bytes_in': self.bytes_in,
+            'serialize_ms': 1e3 * self.serialize_time / max(self.count, 1),
+            'deserialize_ms': 1e3 * self.deserialize_time / max(self.count, 1),
+            'rtt_ms': _percentiles(self.rtt),
+            'decode_ms': _percentiles(self.decode)
+        }
+
+
+def _percentiles(samples):
+    if not samples:
+        return None
+    p50, p95, p99 = np.percentile(np.fromiter(samples, dtype = np.float64, count = len(samples)) * 1e3, [50, 95, 99])
+    # plain floats so that the summary can be serialized as JSON
+    return {'p50': float(p50), 'p95': float(p95), 'p99': float(p99), 'max': float(1e3 * max(samples))}
+
+
+class RpcStats(object):
+    """
+    Per method statistics of the calls made through an instrumented client
+
+    Args:
+        max_samples (int, optional): Number of most recent latency samples kept per method for the percentiles
+    """
+    def __init__(self, max_samples = 10000):
+        self.max_samples = max_samples
+        self._methods = {}
+        self._callbacks = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.builder = _InstrumentedBuilder(self)
+
+    def add_callback(self, callback):
+        self._callbacks.append(callback)
+
+    def remove_callback(self, callback):
+        self._callbacks.remove(callback)
+
+    def summary(self, reset = False):
+        """
+        Returns:
+            dict: For each method, the call and error counts, total bytes sent and received, mean serialize and deserialize
+                  times and p50/p95/p99/max of the round trip and decode times, in milliseconds
+        """
+        with self._lock:
+            methods = self._methods
+            if reset:
+                self._methods = {}
+            return {method: stats.summary() for method, stats in methods.items()}
+
+    def _emit(self, record):
+        with self._lock:
+            stats = self._methods.get(record.method)
+            if stats is None:
+                stats = self._methods[record.method] = _MethodStats(self.max_samples)
+            stats.add(record)
+        for callback in list(self._callbacks):
+            try:
+                callback(record)
+            except Exception:
+                logging.exception("Error in stats callback")
+
+    def _on_response(self, record, awaiting_decode):
+        if record.error or not awaiting_decode:
+            self._emit(record)
+
+    def _on_returned(self, record):
+        # called by the pool when a blocking call returns, the record is completed when the API method returns
+        local = self._local
+        if record is None or record.error:
+            return
+        if not getattr(local, 'depth', 0):
+            self._emit(record)
+            return
+        pending = getattr(local, 'pending', None)
+        now = time.perf_counter()
+        if pending is not None:
+            pending.decode_time = now - pending._returned_at
+            self._emit(pending)
+        record._returned_at = now
+        local.pending = record
+
+    def wrap(self, func):
+        """
+        Wraps an API method to measure the time spent decoding the result of its RPC call
+        """
+        @functools.wraps(func)
+        def measured(*args, **kwargs):
+            local = self._local
+            local.depth = getattr(local, 'depth', 0) + 1
+            try:
+                return func(*args, **kwargs)
+            finally:
+                local.depth -= 1
+                pending = getattr(local, 'pending', None)
+                if pending is not None:
+                    local.pending = None
+                    pending.decode_time = time.perf_counter() - pending._returned_at
+                    self._emit(pending)
+        return measured
+
+
+# Bases of the classes below, object when the installed msgpack-rpc-python doesn't have them, see missing_internals()
+_ClientSocket = getattr(tcp, 'ClientSocket', object)
+_ClientTransport = getattr(tcp, 'ClientTransport', object)
+
+
+class _InstrumentedSocket(_ClientSocket):
+    def __init__(self, stream, transport, encodings, stats):
+        _ClientSocket.__init__(self, stream, transport, encodings)
+        self._stats = stats
+        self._unpack_time = 0.0
+        self._message_start = 0
+
+    def send_message(self, message, callback = None):
+        start = time.perf_counter()
+        data = self._packer.pack(message)
+        sent_at = time.perf_counter()
+        if message[0] == msgpackrpc.message.REQUEST:
+            future = self._transport._session._request_table.get(message[1])
+            if future is not None:
+                future.stats_record = CallRecord(message[2], len(data), sent_at - start, sent_at)
+        self._stream.write(data, callback = callback)
+
+    def on_read(self, data):
+        self._unpacker.feed(data)
+        while True:
+            start = time.perf_counter()
+            try:
+                message = next(self._unpacker)
+            except StopIteration:
+                # partial message, the time spent on it counts towards its unpacking
+                self._unpack_time += time.perf_counter() - start
+                return
+            self._unpack_time += time.perf_counter() - start
+            end = self._unpacker.tell()
+            size, self._message_start = end - self._message_start, end
+            unpack_time, self._unpack_time = self._unpack_time, 0.0
+            if message[0] == msgpackrpc.message.RESPONSE and len(message) == 4:
+                self._record_response(message[1], message[2], size, unpack_time)
+            self.on_message(message)
+
+    def _record_response(self, msgid, error, size, unpack_time):
+        future = self._transport._session._request_table.get(msgid)
+        record = getattr(future, 'stats_record', None)
+        if record is None:
+            return
+        record.rtt = time.perf_counter() - record._sent_at
+        record.bytes_in = size
+        record.deserialize_time = unpack_time
+        record.error = error is not None
+        self._stats._on_response(record, getattr(future, 'stats_awaiting_decode', False))
+
+
+class _InstrumentedTransport(_ClientTransport):
+    def __init__(self, stats, session, address, reconnect_limit, encodings):
+        _ClientTransport.__init__(self, session, address, reconnect_limit, encodings)
+        self._stats = stats
+
+    def connect(self):
+        stream = tcp.IOStream(self._address.socket(), io_loop = self._session._loop._ioloop)
+        socket = _InstrumentedSocket(stream, self, self._encodings, self._stats)
+        socket.connect()
+
+
+class _InstrumentedBuilder(object):
+    """
+    Transport builder passed to `msgpackrpc.Client`, in place of the `tcp` module
+    """
+    def __init__(self, stats):
+        self._stats = stats
+
+    def ClientTransport(self, session, address, reconnect_limit, encodings = ('utf-8', None)):
+        return _InstrumentedTransport(self._stats, session, address, reconnect_limit, encodings)
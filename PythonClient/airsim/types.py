@@ -5,11 +5,14 @@ import math
 
 
 class MsgpackMixin:
+    # subclasses which declare __slots__ don't get a per-instance __dict__
+    __slots__ = ()
     attribute_order = []
 
     def __repr__(self):
         from pprint import pformat
-        return "<" + type(self).__name__ + "> " + pformat(vars(self), indent=4, width=1)
+        fields = vars(self) if hasattr(self, '__dict__') else {name: getattr(self, name) for name, _ in self.attribute_order}
+        return "<" + type(self).__name__ + "> " + pformat(fields, indent=4, width=1)
 
     def to_msgpack(self, *args, **kwargs):
         encoded = []
@@ -25,17 +28,47 @@ class MsgpackMixin:
 
     @classmethod
     def from_msgpack(cls, encoded):
-        obj = cls()
-        if len(encoded) != len(cls.attribute_order):
-            raise ValueError("Length of encoded data does not match number of attributes")
+        decoder = cls.__dict__.get('_msgpack_decoder')
+        if decoder is None:
+            decoder = cls._build_msgpack_decoder()
+        return decoder(encoded)
 
-        for index, (attr_name, attr_type) in enumerate(cls.attribute_order):
-            value = encoded[index]
-            if issubclass(attr_type, MsgpackMixin):
-                value = attr_type.from_msgpack(value)
-            setattr(obj, attr_name, value)
+    @classmethod
+    def _build_msgpack_decoder(cls):
+        """
+        Generates the decoder of this class from `attribute_order`, once per class
+
+        The decoder unpacks the encoded list in one go, which also checks its length, and assigns each attribute
+        directly. Nested types are decoded by calling their own decoders.
+        """
+        names = ['v%d' % index for index in range(len(cls.attribute_order))]
+        namespace = {'new': object.__new__, 'cls': cls}
+        lines = ['def decode(encoded):']
+        if names:
+            lines.append('    %s, = encoded' % ', '.join(names))
+        else:
+            lines.append('    if len(encoded) != 0: raise ValueError("Length of encoded data does not match number of attributes")')
+        lines.append('    obj = new(cls)')
+        for name, (attr_name, attr_type) in zip(names, cls.attribute_order):
+            if isinstance(attr_type, type) and issubclass(attr_type, MsgpackMixin):
+                namespace['decode_' + name] = attr_type._nested_msgpack_decoder()
+                lines.append('    obj.%s = decode_%s(%s)' % (attr_name, name, name))
+            else:
+                lines.append('    obj.%s = %s' % (attr_name, name))
+        lines.append('    return obj')
+        exec('\n'.join(lines), namespace)
 
-        return obj
+        decoder = namespace['decode']
+        cls._msgpack_decoder = decoder
+        return decoder
+
+    @classmethod
+    def _nested_msgpack_decoder(cls):
+        # classes which override from_msgpack, e.g. ImageResponse, must keep going through it
+        if cls.from_msgpack.__func__ is not MsgpackMixin.from_msgpack.__func__:
+            return cls.from_msgpack
+        decoder = cls.__dict__.get('_msgpack_decoder')
+        return decoder if decoder is not None else cls._build_msgpack_decoder()
 
 
 class _ImageType(type):
@@ -113,8 +146,7 @@ class WeatherParameter:
 
 
 class Vector2r(MsgpackMixin):
-    x_val = 0.0
-    y_val = 0.0
+    __slots__ = ('x_val', 'y_val')
 
     attribute_order = [
         ('x_val', float),
@@ -127,9 +159,7 @@ class Vector2r(MsgpackMixin):
 
 
 class Vector3r(MsgpackMixin):
-    x_val = 0.0
-    y_val = 0.0
-    z_val = 0.0
+    __slots__ = ('x_val', 'y_val', 'z_val')
 
     attribute_order = [
         ('x_val', float),
@@ -199,10 +229,7 @@ class Vector3r(MsgpackMixin):
 
 
 class Quaternionr(MsgpackMixin):
-    w_val = 0.0
-    x_val = 0.0
-    y_val = 0.0
-    z_val = 0.0
+    __slots__ = ('w_val', 'x_val', 'y_val', 'z_val')
 
     attribute_order = [
         ('w_val', float),
@@ -303,8 +330,7 @@ class Quaternionr(MsgpackMixin):
 
 
 class Pose(MsgpackMixin):
-    position = Vector3r()
-    orientation = Quaternionr()
+    __slots__ = ('position', 'orientation')
 
     attribute_order = [
         ('position', Vector3r),
@@ -329,14 +355,7 @@ class Pose(MsgpackMixin):
 
 
 class CollisionInfo(MsgpackMixin):
-    has_collided = False
-    normal = Vector3r()
-    impact_point = Vector3r()
-    position = Vector3r()
-    penetration_depth = 0.0
-    time_stamp = 0.0
-    object_name = ""
-    object_id = -1
+    __slots__ = ('has_collided', 'normal', 'impact_point', 'position', 'penetration_depth', 'time_stamp', 'object_name', 'object_id')
 
     attribute_order = [
         ('has_collided', bool),
@@ -349,11 +368,19 @@ class CollisionInfo(MsgpackMixin):
         ('object_id', int)
     ]
 
+    def __init__(self, has_collided=False, normal=None, impact_point=None, position=None, penetration_depth=0.0, time_stamp=0.0, object_name="", object_id=-1):
+        self.has_collided = has_collided
+        self.normal = normal if normal is not None else Vector3r()
+        self.impact_point = impact_point if impact_point is not None else Vector3r()
+        self.position = position if position is not None else Vector3r()
+        self.penetration_depth = penetration_depth
+        self.time_stamp = time_stamp
+        self.object_name = object_name
+        self.object_id = object_id
+
 
 class GeoPoint(MsgpackMixin):
-    latitude = 0.0
-    longitude = 0.0
-    altitude = 0.0
+    __slots__ = ('latitude', 'longitude', 'altitude')
 
     attribute_order = [
         ('latitude', float),
@@ -361,6 +388,11 @@ class GeoPoint(MsgpackMixin):
         ('altitude', float)
     ]
 
+    def __init__(self, latitude=0.0, longitude=0.0, altitude=0.0):
+        self.latitude = latitude
+        self.longitude = longitude
+        self.altitude = altitude
+
 
 class YawMode(MsgpackMixin):
     is_rate = True
@@ -377,12 +409,7 @@ class YawMode(MsgpackMixin):
 
 
 class RCData(MsgpackMixin):
-    timestamp = 0
-    pitch, roll, throttle, yaw = (0.0,) * 4  # init 4 variable to 0.0
-    switch1, switch2, switch3, switch4 = (0,) * 4
-    switch5, switch6, switch7, switch8 = (0,) * 4
-    is_initialized = False
-    is_valid = False
+    __slots__ = ('timestamp', 'pitch', 'roll', 'throttle', 'yaw', 'switch1', 'switch2', 'switch3', 'switch4', 'switch5', 'switch6', 'switch7', 'switch8', 'is_initialized', 'is_valid')
 
     attribute_order = [
         ('timestamp', np.uint64),
@@ -427,20 +454,25 @@ class ImageRequest(MsgpackMixin):
     image_type = ImageType.Scene
     pixels_as_float = False
     compress = False
+    float_as_bytes = False
 
     attribute_order = [
         ('camera_name', str),
         ('image_type', int),
         ('pixels_as_float', bool),
-        ('compress', bool)
+        ('compress', bool),
+        ('float_as_bytes', bool)
     ]
 
-    def __init__(self, camera_name, image_type, pixels_as_float=False, compress=True):
+    def __init__(self, camera_name, image_type, pixels_as_float=False, compress=True, float_as_bytes=False):
         # todo: in future remove str(), it's only for compatibility to pre v1.2
         self.camera_name = str(camera_name)
         self.image_type = image_type
         self.pixels_as_float = pixels_as_float
         self.compress = compress
+        # ask the server to send float pixels as one little-endian float32 blob instead of a msgpack array,
+        # older servers ignore this field and keep sending a list of floats
+        self.float_as_bytes = float_as_bytes
 
 
 class ImageResponse(MsgpackMixin):
@@ -472,6 +504,43 @@ class ImageResponse(MsgpackMixin):
         ('image_type', int)
     ]
 
+    @classmethod
+    def from_msgpack(cls, encoded):
+        obj = super(ImageResponse, cls).from_msgpack(encoded)
+        if obj.pixels_as_float and len(obj.image_data_float) == 0 and len(obj.image_data_uint8) > 0:
+            # float pixels were sent as raw bytes, see ImageRequest.float_as_bytes
+            obj.image_data_float = np.frombuffer(obj.image_data_uint8, dtype='<f4')
+            obj.image_data_uint8 = b''
+        return obj
+
+    @classmethod
+    def from_msgpack_numpy(cls, encoded):
+        """
+        Same as `from_msgpack`, but pixel payloads are decoded into NumPy arrays
+
+        Uncompressed uint8 payloads become `np.frombuffer` views of the received bytes, shaped (H, W, C),
+        compressed payloads stay 1-D. Float payloads become float32 arrays shaped (H, W[, C]).
+        The arrays are read-only when they share memory with the received message.
+        """
+        obj = cls.from_msgpack(encoded)
+        if obj.pixels_as_float:
+            data = np.asarray(obj.image_data_float, dtype=np.float32)
+            obj.image_data_float = cls._shape_pixels(data, obj.height, obj.width)
+            obj.image_data_uint8 = np.frombuffer(obj.image_data_uint8, dtype=np.uint8)
+        else:
+            data = np.frombuffer(obj.image_data_uint8, dtype=np.uint8)
+            obj.image_data_uint8 = data if obj.compress else cls._shape_pixels(data, obj.height, obj.width)
+            obj.image_data_float = np.asarray(obj.image_data_float, dtype=np.float32)
+        return obj
+
+    @staticmethod
+    def _shape_pixels(data, height, width):
+        pixels = height * width
+        if pixels == 0 or data.size % pixels != 0:
+            return data
+        channels = data.size // pixels
+        return data.reshape((height, width) if channels == 1 else (height, width, channels))
+
 
 class CarControls(MsgpackMixin):
     throttle = 0.0
@@ -514,12 +583,7 @@ class CarControls(MsgpackMixin):
 
 
 class KinematicsState(MsgpackMixin):
-    position = Vector3r()
-    orientation = Quaternionr()
-    linear_velocity = Vector3r()
-    angular_velocity = Vector3r()
-    linear_acceleration = Vector3r()
-    angular_acceleration = Vector3r()
+    __slots__ = ('position', 'orientation', 'linear_velocity', 'angular_velocity', 'linear_acceleration', 'angular_acceleration')
 
     attribute_order = [
         ('position', Vector3r),
@@ -530,14 +594,17 @@ class KinematicsState(MsgpackMixin):
         ('angular_acceleration', Vector3r)
     ]
 
+    def __init__(self, position=None, orientation=None, linear_velocity=None, angular_velocity=None, linear_acceleration=None, angular_acceleration=None):
+        self.position = position if position is not None else Vector3r()
+        self.orientation = orientation if orientation is not None else Quaternionr()
+        self.linear_velocity = linear_velocity if linear_velocity is not None else Vector3r()
+        self.angular_velocity = angular_velocity if angular_velocity is not None else Vector3r()
+        self.linear_acceleration = linear_acceleration if linear_acceleration is not None else Vector3r()
+        self.angular_acceleration = angular_acceleration if angular_acceleration is not None else Vector3r()
+
 
 class EnvironmentState(MsgpackMixin):
-    position = Vector3r()
-    geo_point = GeoPoint()
-    gravity = Vector3r()
-    air_pressure = 0.0
-    temperature = 0.0
-    air_density = 0.0
+    __slots__ = ('position', 'geo_point', 'gravity', 'air_pressure', 'temperature', 'air_density')
 
     attribute_order = [
         ('position', Vector3r),
@@ -548,16 +615,17 @@ class EnvironmentState(MsgpackMixin):
         ('air_density', float)
     ]
 
+    def __init__(self, position=None, geo_point=None, gravity=None, air_pressure=0.0, temperature=0.0, air_density=0.0):
+        self.position = position if position is not None else Vector3r()
+        self.geo_point = geo_point if geo_point is not None else GeoPoint()
+        self.gravity = gravity if gravity is not None else Vector3r()
+        self.air_pressure = air_pressure
+        self.temperature = temperature
+        self.air_density = air_density
+
 
 class CarState(MsgpackMixin):
-    speed = 0.0
-    gear = 0
-    rpm = 0.0
-    maxrpm = 0.0
-    handbrake = False
-    collision = CollisionInfo()
-    kinematics_estimated = KinematicsState()
-    timestamp = np.uint64(0)
+    __slots__ = ('speed', 'gear', 'rpm', 'maxrpm', 'handbrake', 'collision', 'kinematics_estimated', 'timestamp')
 
     attribute_order = [
         ('speed', float),
@@ -570,17 +638,19 @@ class CarState(MsgpackMixin):
         ('timestamp', np.uint64)
     ]
 
+    def __init__(self, speed=0.0, gear=0, rpm=0.0, maxrpm=0.0, handbrake=False, collision=None, kinematics_estimated=None, timestamp=np.uint64(0)):
+        self.speed = speed
+        self.gear = gear
+        self.rpm = rpm
+        self.maxrpm = maxrpm
+        self.handbrake = handbrake
+        self.collision = collision if collision is not None else CollisionInfo()
+        self.kinematics_estimated = kinematics_estimated if kinematics_estimated is not None else KinematicsState()
+        self.timestamp = timestamp
+
 
 class MultirotorState(MsgpackMixin):
-    collision = CollisionInfo()
-    kinematics_estimated = KinematicsState()
-    gps_location = GeoPoint()
-    timestamp = np.uint64(0)
-    landed_state = LandedState.Landed
-    rc_data = RCData()
-    ready = False
-    ready_message = ""
-    can_arm = False
+    __slots__ = ('collision', 'kinematics_estimated', 'gps_location', 'timestamp', 'landed_state', 'rc_data', 'ready', 'ready_message', 'can_arm')
 
     attribute_order = [
         ('collision', CollisionInfo),
@@ -594,16 +664,30 @@ class MultirotorState(MsgpackMixin):
         ('can_arm', bool)
     ]
 
+    def __init__(self, collision=None, kinematics_estimated=None, gps_location=None, timestamp=np.uint64(0), landed_state=LandedState.Landed, rc_data=None, ready=False, ready_message="", can_arm=False):
+        self.collision = collision if collision is not None else CollisionInfo()
+        self.kinematics_estimated = kinematics_estimated if kinematics_estimated is not None else KinematicsState()
+        self.gps_location = gps_location if gps_location is not None else GeoPoint()
+        self.timestamp = timestamp
+        self.landed_state = landed_state
+        self.rc_data = rc_data if rc_data is not None else RCData()
+        self.ready = ready
+        self.ready_message = ready_message
+        self.can_arm = can_arm
+
 
 class RotorStates(MsgpackMixin):
-    timestamp = np.uint64(0)
-    rotors = []
+    __slots__ = ('timestamp', 'rotors')
 
     attribute_order = [
         ('timestamp', np.uint64),
         ('rotors', list)
     ]
 
+    def __init__(self, timestamp=np.uint64(0), rotors=None):
+        self.timestamp = timestamp
+        self.rotors = rotors if rotors is not None else list()
+
 
 class ProjectionMatrix(MsgpackMixin):
     matrix = []
@@ -625,10 +709,7 @@ class CameraInfo(MsgpackMixin):
 
 
 class LidarData(MsgpackMixin):
-    time_stamp = np.uint64(0)
-    point_cloud = 0.0
-    pose = Pose()
-    segmentation = 0
+    __slots__ = ('time_stamp', 'point_cloud', 'pose', 'segmentation')
 
     attribute_order = [
         ('time_stamp', np.uint64),
@@ -637,12 +718,79 @@ class LidarData(MsgpackMixin):
         ('segmentation', int)
     ]
 
+    def __init__(self, time_stamp=np.uint64(0), point_cloud=0.0, pose=None, segmentation=0):
+        self.time_stamp = time_stamp
+        self.point_cloud = point_cloud
+        self.pose = pose if pose is not None else Pose()
+        self.segmentation = segmentation
+
+    def to_numpy_array(self):
+        """
+        Returns:
+            numpy.ndarray: Points of shape (N, 3) as float32, in the frame set by `DataFrame` in settings
+        """
+        points = np.asarray(self.point_cloud, dtype=np.float32).ravel()
+        return points[:points.size - points.size % 3].reshape(-1, 3)
+
+    def get_segmentation_array(self):
+        """
+        Returns:
+            numpy.ndarray: Segmentation id of each point as int32, of shape (N,)
+        """
+        return np.asarray(self.segmentation, dtype=np.int32).ravel()
+
+    def sensor_to_world(self, points=None):
+        """
+        Maps points in the lidar frame (`SensorLocalFrame`) to the vehicle inertial frame using `pose`
+
+        Args:
+            points (numpy.ndarray, optional): Points of shape (N, 3), defaults to `to_numpy_array()`
+
+        Returns:
+            numpy.ndarray: Points of shape (N, 3) as float32
+        """
+        return _transform_points(self.pose, self.to_numpy_array() if points is None else points)
+
+    def world_to_sensor(self, points=None):
+        """
+        Maps points in the vehicle inertial frame (`VehicleInertialFrame`) to the lidar frame using `pose`
+
+        Args:
+            points (numpy.ndarray, optional): Points of shape (N, 3), defaults to `to_numpy_array()`
+
+        Returns:
+            numpy.ndarray: Points of shape (N, 3) as float32
+        """
+        return _transform_points(self.pose, self.to_numpy_array() if points is None else points, inverse=True)
+
+    def sensor_to_vehicle(self, relative_pose, points=None):
+        """
+        Maps points in the lidar frame to the vehicle body frame
+
+        Args:
+            relative_pose (Pose): Pose of the lidar relative to the vehicle, the X, Y, Z, Roll, Pitch, Yaw of the sensor settings
+            points (numpy.ndarray, optional): Points of shape (N, 3), defaults to `to_numpy_array()`
+
+        Returns:
+            numpy.ndarray: Points of shape (N, 3) as float32
+        """
+        return _transform_points(relative_pose, self.to_numpy_array() if points is None else points)
+
+
+def _transform_points(pose, points, inverse=False):
+    from .geometry import to_rotation_matrix
+
+    rotation = to_rotation_matrix(pose.orientation.to_numpy_array()).astype(np.float32)
+    position = pose.position.to_numpy_array()
+    points = np.asarray(points, dtype=np.float32).reshape(-1, 3)
+    if inverse:
+        # row vectors, so p @ R is R^T p
+        return (points - position) @ rotation
+    return points @ rotation.T + position
+
 
 class ImuData(MsgpackMixin):
-    time_stamp = np.uint64(0)
-    orientation = Quaternionr()
-    angular_velocity = Vector3r()
-    linear_acceleration = Vector3r()
+    __slots__ = ('time_stamp', 'orientation', 'angular_velocity', 'linear_acceleration')
 
     attribute_order = [
         ('time_stamp', np.uint64),
@@ -651,12 +799,15 @@ class ImuData(MsgpackMixin):
         ('linear_acceleration', Vector3r)
     ]
 
+    def __init__(self, time_stamp=np.uint64(0), orientation=None, angular_velocity=None, linear_acceleration=None):
+        self.time_stamp = time_stamp
+        self.orientation = orientation if orientation is not None else Quaternionr()
+        self.angular_velocity = angular_velocity if angular_velocity is not None else Vector3r()
+        self.linear_acceleration = linear_acceleration if linear_acceleration is not None else Vector3r()
+
 
 class BarometerData(MsgpackMixin):
-    time_stamp = np.uint64(0)
-    altitude = Quaternionr()
-    pressure = Vector3r()
-    qnh = Vector3r()
+    __slots__ = ('time_stamp', 'altitude', 'pressure', 'qnh')
 
     attribute_order = [
         ('time_stamp', np.uint64),
@@ -665,11 +816,15 @@ class BarometerData(MsgpackMixin):
         ('qnh', float)
     ]
 
+    def __init__(self, time_stamp=np.uint64(0), altitude=0.0, pressure=0.0, qnh=0.0):
+        self.time_stamp = time_stamp
+        self.altitude = altitude
+        self.pressure = pressure
+        self.qnh = qnh
+
 
 class MagnetometerData(MsgpackMixin):
-    time_stamp = np.uint64(0)
-    magnetic_field_body = Vector3r()
-    magnetic_field_covariance = 0.0
+    __slots__ = ('time_stamp', 'magnetic_field_body', 'magnetic_field_covariance')
 
     attribute_order = [
         ('time_stamp', np.uint64),
@@ -677,6 +832,11 @@ class MagnetometerData(MsgpackMixin):
         ('magnetic_field_covariance', float)
     ]
 
+    def __init__(self, time_stamp=np.uint64(0), magnetic_field_body=None, magnetic_field_covariance=0.0):
+        self.time_stamp = time_stamp
+        self.magnetic_field_body = magnetic_field_body if magnetic_field_body is not None else Vector3r()
+        self.magnetic_field_covariance = magnetic_field_covariance
+
 
 class GnssFixType(MsgpackMixin):
     GNSS_FIX_NO_FIX = 0
@@ -686,12 +846,7 @@ class GnssFixType(MsgpackMixin):
 
 
 class GnssReport(MsgpackMixin):
-    geo_point = GeoPoint()
-    eph = 0.0
-    epv = 0.0
-    velocity = Vector3r()
-    fix_type = GnssFixType()
-    time_utc = np.uint64(0)
+    __slots__ = ('geo_point', 'eph', 'epv', 'velocity', 'fix_type', 'time_utc')
 
     attribute_order = [
         ('geo_point', GeoPoint),
@@ -702,11 +857,17 @@ class GnssReport(MsgpackMixin):
         ('time_utc', np.uint64)
     ]
 
+    def __init__(self, geo_point=None, eph=0.0, epv=0.0, velocity=None, fix_type=GnssFixType.GNSS_FIX_NO_FIX, time_utc=np.uint64(0)):
+        self.geo_point = geo_point if geo_point is not None else GeoPoint()
+        self.eph = eph
+        self.epv = epv
+        self.velocity = velocity if velocity is not None else Vector3r()
+        self.fix_type = fix_type
+        self.time_utc = time_utc
+
 
 class GpsData(MsgpackMixin):
-    time_stamp = np.uint64(0)
-    gnss = GnssReport()
-    is_valid = False
+    __slots__ = ('time_stamp', 'gnss', 'is_valid')
 
     attribute_order = [
         ('time_stamp', np.uint64),
@@ -714,13 +875,14 @@ class GpsData(MsgpackMixin):
         ('is_valid', bool)
     ]
 
+    def __init__(self, time_stamp=np.uint64(0), gnss=None, is_valid=False):
+        self.time_stamp = time_stamp
+        self.gnss = gnss if gnss is not None else GnssReport()
+        self.is_valid = is_valid
+
 
 class DistanceSensorData(MsgpackMixin):
-    time_stamp = np.uint64(0)
-    distance = 0.0
-    min_distance = 0.0
-    max_distance = 0.0
-    relative_pose = Pose()
+    __slots__ = ('time_stamp', 'distance', 'min_distance', 'max_distance', 'relative_pose')
 
     attribute_order = [
         ('time_stamp', np.uint64),
@@ -730,6 +892,13 @@ class DistanceSensorData(MsgpackMixin):
         ('relative_pose', Pose)
     ]
 
+    def __init__(self, time_stamp=np.uint64(0), distance=0.0, min_distance=0.0, max_distance=0.0, relative_pose=None):
+        self.time_stamp = time_stamp
+        self.distance = distance
+        self.min_distance = min_distance
+        self.max_distance = max_distance
+        self.relative_pose = relative_pose if relative_pose is not None else Pose()
+
 
 class Box2D(MsgpackMixin):
     min = Vector2r()
@@ -9,6 +9,7 @@ import re
 import logging
 
 from .types import *
+from .pfm import read_pfm, read_pfm_header, read_pfm_rows, write_pfm, convert_pfm_directory
 
 
 def string_to_uint8_array(bstr):
@@ -124,80 +125,6 @@ def wait_key(message = ''):
     return result
 
     
-def read_pfm(file):
-    """ Read a pfm file """
-    file = open(file, 'rb')
-
-    color = None
-    width = None
-    height = None
-    scale = None
-    endian = None
-
-    header = file.readline().rstrip()
-    header = str(bytes.decode(header, encoding='utf-8'))
-    if header == 'PF':
-        color = True
-    elif header == 'Pf':
-        color = False
-    else:
-        raise Exception('Not a PFM file.')
-
-    temp_str = str(bytes.decode(file.readline(), encoding='utf-8'))
-    dim_match = re.match(r'^(\d+)\s(\d+)\s$', temp_str)
-    if dim_match:
-        width, height = map(int, dim_match.groups())
-    else:
-        raise Exception('Malformed PFM header.')
-
-    scale = float(file.readline().rstrip())
-    if scale < 0: # little-endian
-        endian = '<'
-        scale = -scale
-    else:
-        endian = '>' # big-endian
-
-    data = np.fromfile(file, endian + 'f')
-    shape = (height, width, 3) if color else (height, width)
-
-    data = np.reshape(data, shape)
-    # DEY: I don't know why this was there.
-    file.close()
-    
-    return data, scale
-
-    
-def write_pfm(file, image, scale=1):
-    """ Write a pfm file """
-    file = open(file, 'wb')
-
-    color = None
-
-    if image.dtype.name != 'float32':
-        raise Exception('Image dtype must be float32.')
-
-    if len(image.shape) == 3 and image.shape[2] == 3: # color image
-        color = True
-    elif len(image.shape) == 2 or len(image.shape) == 3 and image.shape[2] == 1: # grayscale
-        color = False
-    else:
-        raise Exception('Image must have H x W x 3, H x W x 1 or H x W dimensions.')
-
-    file.write('PF\n'.encode('utf-8')  if color else 'Pf\n'.encode('utf-8'))
-    temp_str = '%d %d\n' % (image.shape[1], image.shape[0])
-    file.write(temp_str.encode('utf-8'))
-
-    endian = image.dtype.byteorder
-
-    if endian == '<' or endian == '=' and sys.byteorder == 'little':
-        scale = -scale
-
-    temp_str = '%f\n' % scale
-    file.write(temp_str.encode('utf-8'))
-
-    image.tofile(file)
-
-    
 def write_png(filename, image):
     """ image must be numpy array H X W X channels
     """
@@ -206,3 +133,78 @@ def write_png(filename, image):
     ret = cv2.imwrite(filename, image)
     if not ret:
         logging.error(f"Writing PNG file {filename} failed")
+
+
+def write_point_cloud(filename, points, colors=None, segmentation=None, format=None, append=False):
+    """
+    Writes a point cloud in one pass, the format is picked from the extension unless given
+
+    Args:
+        filename (str): Output path
+        points (numpy.ndarray): Points of shape (N, 3), e.g. from `LidarData.to_numpy_array()`
+        colors (numpy.ndarray, optional): RGB of shape (N, 3) or (3,) applied to all points, as uint8
+        segmentation (numpy.ndarray, optional): Segmentation id of each point, e.g. from `LidarData.get_segmentation_array()`
+        format (str, optional): One of 'asc', 'ply', 'npy' and 'pcd'
+        append (bool, optional): Append to an existing file, only supported for 'asc'
+    """
+    if format is None:
+        format = os.path.splitext(filename)[1][1:]
+    format = format.lower()
+    if format not in ('asc', 'ply', 'npy', 'pcd'):
+        raise ValueError(f"Unsupported point cloud format '{format}'")
+    if append and format != 'asc':
+        raise ValueError("Only 'asc' point clouds can be appended to")
+
+    points = np.asarray(points, dtype=np.float32).reshape(-1, 3)
+    fields = [('x', '<f4'), ('y', '<f4'), ('z', '<f4')]
+    if colors is not None:
+        fields += [('red', 'u1'), ('green', 'u1'), ('blue', 'u1')]
+    if segmentation is not None:
+        fields += [('segmentation', '<i4')]
+
+    cloud = np.empty(len(points), dtype=fields)
+    cloud['x'], cloud['y'], cloud['z'] = points.T
+    if colors is not None:
+        colors = np.broadcast_to(np.asarray(colors, dtype=np.uint8), points.shape)
+        cloud['red'], cloud['green'], cloud['blue'] = colors.T
+    if segmentation is not None:
+        cloud['segmentation'] = segmentation
+
+    if format == 'npy':
+        np.save(filename, points if len(fields) == 3 else cloud)
+    elif format == 'asc':
+        # a single %-format over all rows is much faster than np.savetxt or a write per point
+        row = ' '.join('%f' if t == '<f4' else '%d' for _, t in fields) + '\n'
+        values = np.column_stack([cloud[name].astype(np.float64) for name, _ in fields])
+        with open(filename, 'a' if append else 'w') as f:
+            f.write((row * len(cloud)) % tuple(values.ravel().tolist()))
+    elif format == 'ply':
+        ply_types = {'<f4': 'float', 'u1': 'uchar', '<i4': 'int'}
+        header = ['ply', 'format binary_little_endian 1.0', 'element vertex %d' % len(cloud)]
+        header += ['property %s %s' % (ply_types[t], name) for name, t in fields]
+        header += ['end_header']
+        with open(filename, 'wb') as f:
+            f.write(('\n'.join(header) + '\n').encode('ascii'))
+            cloud.tofile(f)
+    else:
+        pcd_fields = [('x', '<f4', 'F'), ('y', '<f4', 'F'), ('z', '<f4', 'F')]
+        if colors is not None:
+            pcd_fields += [('rgb', '<u4', 'U')]
+        if segmentation is not None:
+            pcd_fields += [('label', '<i4', 'I')]
+        pcd = np.empty(len(cloud), dtype=[(name, t) for name, t, _ in pcd_fields])
+        pcd['x'], pcd['y'], pcd['z'] = cloud['x'], cloud['y'], cloud['z']
+        if colors is not None:
+            pcd['rgb'] = (cloud['red'].astype(np.uint32) << 16) | (cloud['green'].astype(np.uint32) << 8) | cloud['blue']
+        if segmentation is not None:
+            pcd['label'] = cloud['segmentation']
+        header = ['VERSION 0.7',
+                  'FIELDS ' + ' '.join(name for name, _, _ in pcd_fields),
+                  'SIZE ' + ' '.join('4' for _ in pcd_fields),
+                  'TYPE ' + ' '.join(t for _, _, t in pcd_fields),
+                  'COUNT ' + ' '.join('1' for _ in pcd_fields),
+                  'WIDTH %d' % len(pcd), 'HEIGHT 1', 'VIEWPOINT 0 0 0 1 0 0 0',
+                  'POINTS %d' % len(pcd), 'DATA binary']
+        with open(filename, 'wb') as f:
+            f.write(('\n'.join(header) + '\n').encode('ascii'))
+            pcd.tofile(f)
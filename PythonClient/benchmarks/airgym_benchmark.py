@@ -0,0 +1,79 @@
+# Measures how many observations per second the airgym drone env produces against the mock server
+# An observation is what AirSimDroneEnv.step() does after the action: image, state and collision requests, preprocessing
+# and reward. The action itself waits for the vehicle to move and is left out.
+# Compares the preallocated DepthObservation pipeline with the previous PIL based transform_obs. The pipeline also requests
+# the depth image with float_as_bytes, most of the steps/s difference comes from not unpacking a msgpack float array,
+# transforms/s measures the preprocessing alone
+# Doesn't need a running simulator, needs gym for the airgym envs, OpenCV is used for resizing when installed
+
+import setup_path
+import airsim
+from airsim.mock import MockServer
+from argparse import ArgumentParser
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'reinforcement_learning'))
+from airgym.envs.drone_env import AirSimDroneEnv
+
+
+def pil_transform_obs(responses):
+    # transform_obs used before DepthObservation, kept here as the baseline
+    from PIL import Image
+
+    img1d = np.array(responses[0].image_data_float, dtype=np.float64)
+    img1d = 255 / np.maximum(np.ones(img1d.size), img1d)
+    img2d = np.reshape(img1d, (responses[0].height, responses[0].width))
+
+    image = Image.fromarray(img2d)
+    im_final = np.array(image.resize((84, 84)).convert("L"))
+
+    return im_final.reshape([84, 84, 1])
+
+
+def measure(env, steps):
+    env._get_obs(reset=True)
+    start = time.perf_counter()
+    for _ in range(steps):
+        env._get_obs()
+        env._compute_reward()
+    return steps / (time.perf_counter() - start)
+
+
+def measure_transform(env, steps):
+    responses = env.drone.simGetImages([env.image_request])
+    start = time.perf_counter()
+    for _ in range(steps):
+        env.transform_obs(responses)
+    return steps / (time.perf_counter() - start)
+
+
+def main(args):
+    with MockServer(port=0, width=args.width, height=args.height) as server:
+        client = airsim.MultirotorClient(port=server.port)
+        print(f"Setting up the drone env, {args.width}x{args.height} depth images...")
+        env = AirSimDroneEnv("127.0.0.1", 0.25, (84, 84, 1), client=client, frame_stack=args.frame_stack)
+
+        results = {}
+        results['pipeline'] = measure(env, args.steps), measure_transform(env, args.steps)
+
+        env.transform_obs = lambda responses, reset=False: pil_transform_obs(responses)
+        env.image_request.float_as_bytes = False
+        results['pil baseline'] = measure(env, args.steps), measure_transform(env, args.steps)
+
+    print(f"{'implementation':<20}{'steps/s':>12}{'transforms/s':>16}")
+    for name, (steps, transforms) in results.items():
+        print(f"{name:<20}{steps:>12,.1f}{transforms:>16,.1f}")
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser()
+    parser.add_argument('--steps', type=int, default=200)
+    parser.add_argument('--width', type=int, default=256)
+    parser.add_argument('--height', type=int, default=144)
+    parser.add_argument('--frame_stack', type=int, default=1)
+
+    args = parser.parse_args()
+    main(args)
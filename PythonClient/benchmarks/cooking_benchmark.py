@@ -0,0 +1,105 @@
+# Measures how many driving log rows per second Cooking.generateDataMapAirSim ingests
+# Runs on synthetic airsim_rec.txt files, compares the vectorized reader with the previous row by row implementation
+# Doesn't need a running simulator, needs pandas, h5py and Pillow for the imitation_learning modules
+
+import setup_path
+from argparse import ArgumentParser
+import os
+import random
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'imitation_learning'))
+import Cooking
+
+
+def row_by_row_data_map(folders):
+    # implementation used before the vectorized reader, kept here as the baseline
+    all_mappings = {}
+    for folder in folders:
+        current_df = pd.read_csv(os.path.join(folder, 'airsim_rec.txt'), sep='\t')
+
+        for i in range(1, current_df.shape[0] - 1):
+            if current_df.iloc[i-1]['Brake'] != 0:
+                continue
+
+            norm_steering = [ (float(current_df.iloc[i-1]['Steering']) + 1) / 2.0 ]
+            norm_throttle = [ float(current_df.iloc[i-1]['Throttle']) ]
+            norm_speed = [ float(current_df.iloc[i-1]['Speed (kmph)']) / Cooking.MAX_SPEED ]
+            previous_state = norm_steering + norm_throttle + norm_speed
+
+            norm_steering0 = (float(current_df.iloc[i]['Steering']) + 1) / 2.0
+            norm_steering1 = (float(current_df.iloc[i+1]['Steering']) + 1) / 2.0
+            average_steering = (norm_steering[0] + norm_steering0 + norm_steering1) / 3.0
+
+            image_filepath = os.path.join(os.path.join(folder, 'images'), current_df.iloc[i]['ImageName']).replace('\\', '/')
+            all_mappings[image_filepath] = ([average_steering], previous_state)
+
+    mappings = [(key, all_mappings[key]) for key in all_mappings]
+    random.shuffle(mappings)
+    return mappings
+
+
+def write_driving_log(folder, rows, seed):
+    # same columns as the recordings of the imitation learning tutorial
+    rng = np.random.default_rng(seed)
+    os.makedirs(folder, exist_ok=True)
+    timestamps = 1500000000000 + np.arange(rows) * 50
+    df = pd.DataFrame({
+        'Timestamp': timestamps,
+        'Speed (kmph)': rng.uniform(0, Cooking.MAX_SPEED, rows).round(3),
+        'Throttle': rng.uniform(0, 1, rows).round(3),
+        'Steering': rng.uniform(-1, 1, rows).round(3),
+        'Brake': (rng.random(rows) < 0.1).astype(np.int64),
+        'Gear': np.ones(rows, dtype=np.int64),
+        'ImageName': ['img_%d.png' % t for t in timestamps],
+    })
+    df.to_csv(os.path.join(folder, 'airsim_rec.txt'), sep='\t', index=False)
+
+
+def measure(data_map, folders, rows):
+    random.seed(0)
+    start = time.perf_counter()
+    mappings = data_map(folders)
+    elapsed = time.perf_counter() - start
+    return mappings, rows / elapsed
+
+
+def main(args):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        folders = [os.path.join(tmp_dir, 'folder_%d' % i) for i in range(args.folders)]
+        rows_per_folder = args.rows // args.folders
+        print(f"Writing {rows_per_folder * args.folders:,} rows in {args.folders} folder(s)...")
+        for i, folder in enumerate(folders):
+            write_driving_log(folder, rows_per_folder, i)
+
+        mappings, after = measure(lambda folders: Cooking.generateDataMapAirSim(folders, args.workers), folders, rows_per_folder * args.folders)
+
+        # the row by row baseline is too slow for the whole log, it is measured on the first rows of the first folder
+        baseline_folder = os.path.join(tmp_dir, 'baseline')
+        os.makedirs(baseline_folder)
+        pd.read_csv(os.path.join(folders[0], 'airsim_rec.txt'), sep='\t', nrows=args.baseline_rows).to_csv(
+            os.path.join(baseline_folder, 'airsim_rec.txt'), sep='\t', index=False)
+        expected, before = measure(row_by_row_data_map, [baseline_folder], args.baseline_rows)
+        actual, _ = measure(lambda folders: Cooking.generateDataMapAirSim(folders, 1), [baseline_folder], args.baseline_rows)
+        if sorted(actual) != sorted(expected):
+            raise Exception('Vectorized data map differs from the row by row one')
+
+    print(f"{'implementation':<20}{'rows/s':>16}")
+    print(f"{'row by row':<20}{before:>16,.0f}")
+    print(f"{'vectorized':<20}{after:>16,.0f}")
+    print(f"speedup {after / before:.0f}x, {len(mappings):,} mappings")
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser()
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--folders', help="Number of recording folders the rows are split in", type=int, default=1)
+    parser.add_argument('--workers', help="Processes reading folders in parallel", type=int, default=None)
+    parser.add_argument('--baseline_rows', help="Rows used to measure the row by row baseline", type=int, default=5000)
+
+    args = parser.parse_args()
+    main(args)
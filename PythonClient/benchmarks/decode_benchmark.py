@@ -0,0 +1,76 @@
+# Measures how many messages per second the Python client can decode into airsim types
+# Compares the generated decoders of MsgpackMixin with the previous reflective implementation
+# Doesn't need a running simulator
+
+import setup_path
+import airsim
+from argparse import ArgumentParser
+import time
+import numpy as np
+
+
+def reflective_from_msgpack(cls, encoded):
+    # decoder used before MsgpackMixin generated per-class decoders, kept here as the baseline.
+    # __init__ is skipped, it now builds default nested objects which the previous classes didn't,
+    # their defaults were class attributes
+    obj = cls.__new__(cls)
+    if len(encoded) != len(cls.attribute_order):
+        raise ValueError("Length of encoded data does not match number of attributes")
+
+    for index, (attr_name, attr_type) in enumerate(cls.attribute_order):
+        value = encoded[index]
+        if issubclass(attr_type, airsim.MsgpackMixin):
+            value = reflective_from_msgpack(attr_type, value)
+        setattr(obj, attr_name, value)
+
+    return obj
+
+
+def make_samples(width, height, lidar_points):
+    vec = [1.0, 2.0, 3.0]
+    quat = [1.0, 0.0, 0.0, 0.0]
+    kinematics = [vec, quat, vec, vec, vec, vec]
+    collision = [False, vec, vec, vec, 0.0, 0, "", -1]
+    geo_point = [47.6, -122.1, 120.0]
+    rc_data = [0, 0.0, 0.0, 0.0, 0.0, 0, 0, 0, 0, 0, 0, 0, 0, False, False]
+    multirotor_state = [collision, kinematics, geo_point, 0, 0, rc_data, True, "", True]
+    image_response = [bytes(width * height * 3), [], vec, "0", quat, 0, "", False, False, width, height, 0]
+    lidar_data = [0, list(np.random.rand(lidar_points * 3)), [vec, quat], [0] * lidar_points]
+
+    return [
+        (airsim.KinematicsState, kinematics),
+        (airsim.MultirotorState, multirotor_state),
+        (airsim.ImageResponse, image_response),
+        (airsim.LidarData, lidar_data),
+    ]
+
+
+def rate(decode, cls, encoded, duration):
+    count = 0
+    start = time.perf_counter()
+    while True:
+        for _ in range(100):
+            decode(cls, encoded)
+        count += 100
+        elapsed = time.perf_counter() - start
+        if elapsed >= duration:
+            return count / elapsed
+
+
+def main(args):
+    print(f"{'type':<20}{'before (msg/s)':>18}{'after (msg/s)':>18}{'speedup':>10}")
+    for cls, encoded in make_samples(args.width, args.height, args.lidar_points):
+        before = rate(reflective_from_msgpack, cls, encoded, args.time)
+        after = rate(lambda cls, encoded: cls.from_msgpack(encoded), cls, encoded, args.time)
+        print(f"{cls.__name__:<20}{before:>18,.0f}{after:>18,.0f}{after / before:>9.1f}x")
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser()
+    parser.add_argument('--width', type=int, default=640)
+    parser.add_argument('--height', type=int, default=480)
+    parser.add_argument('--lidar_points', type=int, default=10000)
+    parser.add_argument('--time', help="Time in secs to run each measurement for", type=float, default=1.0)
+
+    args = parser.parse_args()
+    main(args)
@@ -0,0 +1,244 @@
+# Measures how many frames and events per second eventcamera_sim/event_simulator.py simulates
+# Runs on synthetic frames of a moving pattern, compares EventSimulator with the previous single pass esim kernel,
+# which is run without parallel=True since its shared event counter is only correct on one thread.
+# The frames/s include sorting the events by timestamp, the kernel column is the time spent in the kernels alone.
+# Also measures writing the events with EventWriter against pickling them per frame as test_event_sim.py did before,
+# and simulating several cameras with BatchEventSimulator against one EventSimulator per camera
+# Doesn't need a running simulator, needs numba
+
+from argparse import ArgumentParser
+import os
+import pickle
+import sys
+import tempfile
+import time
+from collections import defaultdict
+import numpy as np
+from numba import njit, get_num_threads
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'eventcamera_sim'))
+import event_simulator
+from event_simulator import CONFIG, EVENT_TYPE, TOL, BatchEventSimulator, EventSimulator
+from event_file import EventReader, EventWriter
+
+kernel_times = defaultdict(float)
+
+
+def timed(name, kernel):
+    def run(*args):
+        start = time.perf_counter()
+        count = kernel(*args)
+        kernel_times[name] += time.perf_counter() - start
+        return count
+    return run
+
+
+@njit
+def single_pass_esim(x_end, current_image, previous_image, delta_time, crossings, last_time, output_events, spikes,
+                     refractory_period_ns, max_events_per_frame, n_pix_row):
+    # kernel used before the two pass esim, kept here as the baseline
+    count = 0
+    max_spikes = int(delta_time / (refractory_period_ns * 1e-3))
+    for x in range(x_end):
+        itdt = np.log(current_image[x])
+        it = np.log(previous_image[x])
+        deltaL = itdt - it
+
+        if np.abs(deltaL) < TOL:
+            continue
+
+        pol = np.sign(deltaL)
+
+        cross_update = pol * TOL
+        crossings[x] = np.log(crossings[x]) + cross_update
+
+        lb = crossings[x] - it
+        ub = crossings[x] - itdt
+
+        pos_check = lb > 0 and (pol == 1) and ub < 0
+        neg_check = lb < 0 and (pol == -1) and ub > 0
+
+        spike_nums = (itdt - crossings[x]) / TOL
+        cross_check = pos_check + neg_check
+        spike_nums = np.abs(int(spike_nums * cross_check))
+
+        crossings[x] = itdt - cross_update
+        if spike_nums > 0:
+            spikes[x] = pol
+
+        spike_nums = max_spikes if spike_nums > max_spikes else spike_nums
+
+        current_time = last_time
+        for i in range(spike_nums):
+            output_events[count].x = x % n_pix_row
+            output_events[count].y = x // n_pix_row
+            output_events[count].timestamp = np.round(current_time * 1e-6, 6)
+            output_events[count].polarity = 1 if pol > 0 else -1
+
+            count += 1
+            current_time += (delta_time) / spike_nums
+
+            if count == max_events_per_frame:
+                return count
+
+    return count
+
+
+timed_single_pass_esim = timed('single pass', single_pass_esim)
+event_simulator.esim = timed('two pass', event_simulator.esim)
+
+
+def single_pass_callback(previous, current, last_time, new_time, width, config):
+    # allocations of the previous EventSimulator.image_callback
+    output_events = np.zeros((config.max_events_per_frame), dtype=EVENT_TYPE)
+    spikes = np.zeros(current.size)
+    crossings = previous.copy()
+    count = timed_single_pass_esim(current.size, current, previous, new_time - last_time, crossings, last_time, output_events,
+                             spikes, config.refractory_period_ns, config.max_events_per_frame, width)
+    result = output_events[:count]
+    result.sort(order=["timestamp"], axis=0)
+    return spikes, result
+
+
+def make_frames(width, height, frames):
+    # stripes moving across the image, with noise so that many pixels cross the threshold
+    rng = np.random.default_rng(0)
+    x = np.arange(width, dtype=np.float32)[None, :]
+    y = np.arange(height, dtype=np.float32)[:, None]
+    images = []
+    for i in range(frames):
+        image = 127.5 + 120 * np.sin((x + 2 * y + 12 * i) / 9.0) + rng.normal(0, 3, (height, width))
+        images.append(np.clip(image, 1, 255).astype(np.float32) + 0.001)
+    return images
+
+
+def event_key(events):
+    return np.sort(events, order=["timestamp", "y", "x"])
+
+
+def run_two_pass(images, frame_time, frames, config):
+    simulator = EventSimulator(images[0].shape[1], images[0].shape[0], images[0], frame_time, config)
+    for i in range(frames):
+        spikes, events = simulator.image_callback(images[i + 1], (i + 2) * frame_time)
+        yield spikes, events
+
+
+def run_single_pass(images, frame_time, frames, config):
+    for i in range(frames):
+        previous, current = images[i].reshape(-1), images[i + 1].reshape(-1)
+        yield single_pass_callback(previous, current, (i + 1) * frame_time, (i + 2) * frame_time, images[0].shape[1], config)
+
+
+def measure(name, run, images, frame_time, config):
+    frames = len(images) - 1
+    events = 0
+    kernel_times[name] = 0
+    start = time.perf_counter()
+    for _, result in run(images, frame_time, frames, config):
+        events += len(result)
+    elapsed = time.perf_counter() - start
+    return frames / elapsed, events / elapsed, kernel_times[name] / frames * 1000, events / frames
+
+
+def measure_cameras(images, frame_time, n_cameras, config):
+    # every camera sees the frames shifted by a few pixels, so that they don't all give the same events
+    frames = len(images) - 1
+    camera_images = [np.stack([np.roll(image, 3 * k, axis=1) for k in range(n_cameras)]) for image in images]
+    results = {}
+    first_events = {}
+
+    simulators = [EventSimulator(images[0].shape[1], images[0].shape[0], camera_images[0][k], frame_time, config)
+                  for k in range(n_cameras)]
+    start = time.perf_counter()
+    for i in range(frames):
+        events = [simulator.image_callback(camera_images[i + 1][k], (i + 2) * frame_time)[1]
+                  for k, simulator in enumerate(simulators)]
+        if i == 0:
+            first_events['separate'] = [e.copy() for e in events]
+    results['EventSimulator x%d' % n_cameras] = frames / (time.perf_counter() - start)
+
+    simulator = BatchEventSimulator(images[0].shape[1], images[0].shape[0], n_cameras, camera_images[0],
+                                    np.full(n_cameras, frame_time), config)
+    start = time.perf_counter()
+    for i in range(frames):
+        _, events = simulator.image_callback(camera_images[i + 1], np.full(n_cameras, (i + 2) * frame_time))
+        if i == 0:
+            first_events['batch'] = [e.copy() for e in events]
+    results['BatchEventSimulator'] = frames / (time.perf_counter() - start)
+
+    if not all(np.array_equal(event_key(actual), event_key(expected))
+               for actual, expected in zip(first_events['batch'], first_events['separate'])):
+        raise Exception('BatchEventSimulator gives different events than one EventSimulator per camera')
+    return results
+
+
+def measure_writes(segments, tmp_dir):
+    events = sum(len(segment) for segment in segments)
+    results = {}
+
+    start = time.perf_counter()
+    with open(os.path.join(tmp_dir, 'events.pkl'), 'wb') as f:
+        for segment in segments:
+            pickle.dump(segment, f)
+    results['pickle'] = events / (time.perf_counter() - start)
+
+    path = os.path.join(tmp_dir, 'events.npy')
+    start = time.perf_counter()
+    with EventWriter(path) as writer:
+        for segment in segments:
+            writer.write(segment)
+    results['EventWriter'] = events / (time.perf_counter() - start)
+
+    if len(EventReader(path)) != events:
+        raise Exception('EventReader reads a different number of events than written')
+    return results
+
+
+def main(args):
+    config = CONFIG
+    config.max_events_per_frame = args.max_events_per_frame
+    images = make_frames(args.width, args.height, args.frames + 1)
+    frame_time = 1e6 / args.fps
+
+    # compiles the kernels and checks that both give the same events and spikes
+    checked = zip(run_two_pass(images, frame_time, args.check_frames, config),
+                  run_single_pass(images, frame_time, args.check_frames, config))
+    for i, ((actual_spikes, actual), (spikes, expected)) in enumerate(checked):
+        if not np.array_equal(event_key(actual), event_key(expected)) or not np.array_equal(actual_spikes, spikes):
+            raise Exception('Events of frame %d differ from the single pass kernel' % i)
+
+    results = {name: measure(name, run, images, frame_time, config)
+               for name, run in (('single pass', run_single_pass), ('two pass', run_two_pass))}
+
+    print(f"{args.width}x{args.height}, {results['two pass'][3]:,.0f} events per frame, {get_num_threads()} thread(s)")
+    print(f"{'implementation':<20}{'frames/s':>12}{'events/s':>16}{'kernel ms/frame':>18}")
+    for name, (frames, events, kernel, _) in results.items():
+        print(f"{name:<20}{frames:>12,.1f}{events:>16,.0f}{kernel:>18,.1f}")
+
+    # compiles esim_batch before timing it
+    measure_cameras(images[:2], frame_time, args.cameras, config)
+    cameras = measure_cameras(images, frame_time, args.cameras, config)
+    print(f"{'cameras':<24}{'frames/s':>12}")
+    for name, frames in cameras.items():
+        print(f"{name:<24}{frames:>12,.1f}")
+
+    segments = [events.copy() for _, events in run_two_pass(images, frame_time, args.check_frames, config)]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        writes = measure_writes(segments, tmp_dir)
+    print(f"{'writer':<20}{'events/s':>16}")
+    for name, events in writes.items():
+        print(f"{name:<20}{events:>16,.0f}")
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser()
+    parser.add_argument('--width', type=int, default=1280)
+    parser.add_argument('--height', type=int, default=800)
+    parser.add_argument('--frames', type=int, default=50)
+    parser.add_argument('--fps', help="Frame rate of the simulated camera", type=float, default=100.0)
+    parser.add_argument('--max_events_per_frame', type=int, default=2000000)
+    parser.add_argument('--cameras', help="Cameras simulated together by BatchEventSimulator", type=int, default=4)
+    parser.add_argument('--check_frames', help="Frames compared with the single pass kernel", type=int, default=5)
+
+    args = parser.parse_args()
+    main(args)
@@ -11,6 +11,8 @@ import os
 
 cameraTypeMap = {
     "depth": airsim.ImageType.DepthVis,
+    "depth_planar": airsim.ImageType.DepthPlanar,
+    "depth_perspective": airsim.ImageType.DepthPerspective,
     "segmentation": airsim.ImageType.Segmentation,
     "seg": airsim.ImageType.Segmentation,
     "scene": airsim.ImageType.Scene,
@@ -21,29 +23,14 @@ cameraTypeMap = {
 CAM_NAME = "front_center"
 DEBUG = False
 
-def saveImage(response, filename):
-    if response.pixels_as_float:
-        # airsim.write_pfm(os.path.normpath(filename + '.pfm'), airsim.get_pfm_array(response))
-        depth = np.array(response.image_data_float, dtype=np.float64)
-        depth = depth.reshape((response.height, response.width, -1))
-        depth = np.array(depth * 255, dtype=np.uint8)
-        # save pic
-        cv2.imwrite(os.path.normpath(filename + '.png'), depth)
-
-    elif response.compress: #png format
-        airsim.write_file(os.path.normpath(filename + '.png'), response.image_data_uint8)
-
-    else: #uncompressed array
-        img1d = np.fromstring(response.image_data_uint8, dtype=np.uint8) # get numpy array
-        img_rgb = img1d.reshape(response.height, response.width, 3) # reshape array to 3 channel image array H X W X 3
-        cv2.imwrite(os.path.normpath(filename + '.png'), img_rgb) # write to png
-
 class ImageBenchmarker():
     def __init__(self,
             img_benchmark_type = 'simGetImages',
             viz_image_cv2 = False,
             save_images = False,
-            img_type = "scene"):
+            img_type = "scene",
+            pixels_as_float = False,
+            float_as_bytes = False):
         self.airsim_client = airsim.VehicleClient()
         self.airsim_client.confirmConnection()
         self.image_benchmark_num_images = 0
@@ -52,6 +39,8 @@ class ImageBenchmarker():
         self.image_callback_thread = None
         self.viz_image_cv2 = viz_image_cv2
         self.save_images = save_images
+        self.pixels_as_float = pixels_as_float
+        self.float_as_bytes = float_as_bytes
 
         self.img_type = cameraTypeMap[img_type]
 
@@ -64,11 +53,8 @@ class ImageBenchmarker():
         if self.save_images:
             self.tmp_dir = os.path.join(tempfile.gettempdir(), "airsim_img_bm")
             print(f"Saving images to {self.tmp_dir}")
-            try:
-                os.makedirs(self.tmp_dir)
-            except OSError:
-                if not os.path.isdir(self.tmp_dir):
-                    raise
+            # encodes and writes in the background, so saving doesn't slow down the image requests
+            self.image_writer = airsim.ImageWriter(self.tmp_dir)
 
     def start_img_benchmark_thread(self):
         if not self.is_image_thread_active:
@@ -82,6 +68,8 @@ class ImageBenchmarker():
             self.is_image_thread_active = False
             self.image_callback_thread.join()
             print("Stopped image callback thread.")
+            if self.save_images:
+                self.image_writer.close()
             print(f"FPS: {self.avg_fps} for {self.image_benchmark_num_images} images")
 
     def repeat_timer_img(self, task, period):
@@ -110,7 +98,7 @@ class ImageBenchmarker():
 
     def image_callback_benchmark_simGetImages(self):
         self.image_benchmark_num_images += 1
-        request = [airsim.ImageRequest(CAM_NAME, self.img_type, False, False)]
+        request = [airsim.ImageRequest(CAM_NAME, self.img_type, self.pixels_as_float, False, self.float_as_bytes)]
         responses = self.airsim_client.simGetImages(request)
         response = responses[0]
 
@@ -124,20 +112,20 @@ class ImageBenchmarker():
                 print(f"Type {response.image_type}, size {len(response.image_data_uint8)},"
                       f"height {response.height}, width {response.width}")
 
-        if self.viz_image_cv2:
+        if self.viz_image_cv2 and not response.pixels_as_float:
             np_arr = np.frombuffer(response.image_data_uint8, dtype=np.uint8)
             img = np_arr.reshape(response.height, response.width, -1)
             cv2.imshow("img", img)
             cv2.waitKey(1)
 
         if self.save_images:
-            filename = os.path.join(self.tmp_dir, str(self.image_benchmark_num_images))
-            saveImage(response, filename)
+            self.image_writer.write(response, str(self.image_benchmark_num_images))
 
 
 def main(args):
     image_benchmarker = ImageBenchmarker(img_benchmark_type=args.img_benchmark_type, viz_image_cv2=args.viz_image_cv2,
-                                      save_images=args.save_images, img_type=args.img_type)
+                                      save_images=args.save_images, img_type=args.img_type,
+                                      pixels_as_float=args.pixels_as_float, float_as_bytes=args.float_as_bytes)
 
     image_benchmarker.start_img_benchmark_thread()
     time.sleep(args.time)
@@ -149,6 +137,9 @@ if __name__ == "__main__":
     parser.add_argument('--enable_viz_image_cv2', dest='viz_image_cv2', action='store_true', default=False)
     parser.add_argument('--save_images', dest='save_images', action='store_true', default=False)
     parser.add_argument('--img_type', type=str, choices=cameraTypeMap.keys(), default="scene")
+    parser.add_argument('--pixels_as_float', dest='pixels_as_float', action='store_true', default=False)
+    parser.add_argument('--float_as_bytes', help="Request float images as a raw float32 blob, needs --pixels_as_float",
+                        dest='float_as_bytes', action='store_true', default=False)
     parser.add_argument('--time', help="Time in secs to run the benchmark for", type=int, default=30)
 
     args = parser.parse_args()
@@ -0,0 +1,162 @@
+import collections
+import os
+import numpy as np
+
+from event_simulator import EVENT_TYPE
+
+# Room in the .npy header for the number of events, so that it can be updated in place
+MAX_COUNT_DIGITS = 20
+
+# Events as opaque records, numpy copies those much faster than records with fields
+RAW_EVENT_TYPE = np.dtype((np.void, EVENT_TYPE.itemsize))
+
+
+def _npy_header(count):
+    header = "{'descr': %r, 'fortran_order': False, 'shape': (%d,), }" % (
+        np.lib.format.dtype_to_descr(EVENT_TYPE),
+        count,
+    )
+    # Same length for every count, padded so that the events start 64 byte aligned like in numpy's own files
+    length = len(header) - len(str(count)) + MAX_COUNT_DIGITS + 1
+    length += -(10 + length) % 64
+    header = header.ljust(length - 1) + "\n"
+    return b"\x93NUMPY\x01\x00" + len(header).to_bytes(2, "little") + header.encode("latin1")
+
+
+class EventWriter:
+    """
+    Streams events to a .npy file of EVENT_TYPE records, which np.load(path, mmap_mode="r") or EventReader can read
+
+    Events are collected in a buffer which is reused, and appended to the file once it holds buffer_events events,
+    the header is updated with the number of events on every flush.
+    With sort=True, each write is sorted by timestamp and merged with the buffered events whose timestamps it overlaps,
+    so only the new events and that tail are sorted, e.g. for several cameras writing the same time span.
+    The events from the first timestamp of the last overlapping_writes writes stay buffered for the next ones, so with
+    K cameras writing in turn overlapping_writes=K keeps all of them in order. Events older than the ones already
+    in the file raise a ValueError.
+    """
+
+    def __init__(self, path, sort=True, buffer_events=1000000, overlapping_writes=1):
+        self.path = path
+        self.sort = sort
+        self.buffer_events = buffer_events
+        self.file = open(path, "wb")
+        self.file.write(_npy_header(0))
+        self.count = 0
+        self.last_timestamp = -np.inf
+        self.buffer = np.zeros(buffer_events, dtype=EVENT_TYPE)
+        self.buffered = 0
+        # First timestamps of the recent writes, the buffered events after the oldest one aren't written yet
+        self.write_starts = collections.deque(maxlen=overlapping_writes)
+
+    def write(self, events):
+        if len(events) == 0:
+            return
+        events = np.asarray(events, dtype=EVENT_TYPE)
+        merge_start = self.buffered
+        first = None
+        if self.sort:
+            timestamps = events["timestamp"]
+            if np.any(timestamps[1:] < timestamps[:-1]):
+                events = events[np.argsort(timestamps, kind="stable")]
+            first = events["timestamp"][0]
+            if first < self.last_timestamp:
+                raise ValueError("Events are older than the events already written to %s" % self.path)
+            merge_start = np.searchsorted(self.buffer["timestamp"][: self.buffered], first, side="right")
+
+        if self.buffered + len(events) > len(self.buffer):
+            # The events older than the new ones and than the recent writes can be written
+            merge_start -= self._write_buffer(self._flush_end(first))
+            if self.buffered + len(events) > len(self.buffer):
+                buffer = np.zeros(max(2 * len(self.buffer), self.buffered + len(events)), dtype=EVENT_TYPE)
+                buffer.view(RAW_EVENT_TYPE)[: self.buffered] = self.buffer.view(RAW_EVENT_TYPE)[: self.buffered]
+                self.buffer = buffer
+
+        end = self.buffered + len(events)
+        raw = self.buffer.view(RAW_EVENT_TYPE)
+        if merge_start < self.buffered:
+            # Runs already sorted, the stable sort merges them
+            merged = np.concatenate([self.buffer[merge_start : self.buffered], events])
+            order = np.argsort(merged["timestamp"], kind="stable")
+            np.take(merged.view(RAW_EVENT_TYPE), order, out=raw[merge_start:end])
+        else:
+            raw[self.buffered : end] = np.ascontiguousarray(events).view(RAW_EVENT_TYPE)
+        self.buffered = end
+        if self.sort:
+            self.write_starts.append(first)
+
+        if self.buffered >= self.buffer_events:
+            self._write_buffer(self._flush_end())
+
+    def _flush_end(self, first=None):
+        """ Number of buffered events the next writes can't overlap, older than first and the recent writes """
+        if not self.sort:
+            return self.buffered
+        starts = list(self.write_starts) + ([first] if first is not None else [])
+        if not starts:
+            return self.buffered
+        return np.searchsorted(self.buffer["timestamp"][: self.buffered], min(starts), side="left")
+
+    def _write_buffer(self, end):
+        """ Appends the first end buffered events to the file, returns the number of events written """
+        if end > 0:
+            self.file.write(self.buffer[:end].data)
+            self.count += end
+            self.last_timestamp = self.buffer["timestamp"][end - 1]
+            self.buffered -= end
+            raw = self.buffer.view(RAW_EVENT_TYPE)
+            raw[: self.buffered] = raw[end : end + self.buffered]
+
+        self.file.seek(0)
+        self.file.write(_npy_header(self.count))
+        self.file.seek(0, os.SEEK_END)
+        self.file.flush()
+        return end
+
+    def flush(self):
+        """ Writes all the buffered events, later writes can't be older than them """
+        self._write_buffer(self.buffered)
+
+    def close(self):
+        if self.file.closed:
+            return
+        self.flush()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class EventReader:
+    """
+    Memory maps an event file written with EventWriter(sort=True), or any sorted .npy file of EVENT_TYPE records
+
+    Only the pages of the events that are accessed are read from disk, window() finds the events of a time span
+    with a binary search on the timestamps.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.events = np.load(path, mmap_mode="r")
+        self.timestamps = self.events["timestamp"]
+
+    def __len__(self):
+        return len(self.events)
+
+    @property
+    def time_range(self):
+        if len(self.events) == 0:
+            return None
+        return self.timestamps[0], self.timestamps[-1]
+
+    def window(self, start, end):
+        """
+        Events with start <= timestamp < end, in seconds like the timestamps of EVENT_TYPE
+
+        Returns a read-only view of the file, copy it to keep it after the reader is gone
+        """
+        first, last = np.searchsorted(self.timestamps, [start, end], side="left")
+        return self.events[first:last]
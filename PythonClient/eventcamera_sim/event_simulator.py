@@ -20,9 +20,63 @@ CONFIG = SimpleNamespace(
 )
 
 
+@njit(inline="always")
+def pixel_spikes(current_image, previous_image, crossings, x, max_spikes):
+    """
+    Returns the number of events of pixel x, at most max_spikes, and its spike polarity, 0 without spike
+    """
+    crossings[x] = previous_image[x]
+
+    itdt = np.log(current_image[x])
+    it = np.log(previous_image[x])
+    deltaL = itdt - it
+
+    if np.abs(deltaL) < TOL:
+        return 0, 0.0
+
+    pol = np.sign(deltaL)
+
+    cross_update = pol * TOL
+    crossings[x] = np.log(crossings[x]) + cross_update
+
+    lb = crossings[x] - it
+    ub = crossings[x] - itdt
+
+    pos_check = lb > 0 and (pol == 1) and ub < 0
+    neg_check = lb < 0 and (pol == -1) and ub > 0
+
+    spike_nums = (itdt - crossings[x]) / TOL
+    cross_check = pos_check + neg_check
+    spike_nums = np.abs(int(spike_nums * cross_check))
+
+    crossings[x] = itdt - cross_update
+    spike = pol if spike_nums > 0 else 0.0
+
+    spike_nums = max_spikes if spike_nums > max_spikes else spike_nums
+    return spike_nums, spike
+
+
+@njit(inline="always")
+def write_pixel_events(output_events, index, end, x, n_pix_row, spike_nums, spike, last_time, delta_time):
+    """
+    Writes the events of pixel x from output_events[index], stops at end, returns the index after the last event
+    """
+    current_time = last_time
+    for i in range(spike_nums):
+        if index == end:
+            break
+        output_events[index].x = x % n_pix_row
+        output_events[index].y = x // n_pix_row
+        output_events[index].timestamp = np.round(current_time * 1e-6, 6)
+        output_events[index].polarity = 1 if spike > 0 else -1
+
+        index += 1
+        current_time += (delta_time) / spike_nums
+    return index
+
+
 @njit(parallel=True)
 def esim(
-    x_end,
     current_image,
     previous_image,
     delta_time,
@@ -30,55 +84,136 @@ def esim(
     last_time,
     output_events,
     spikes,
+    spike_counts,
+    row_offsets,
     refractory_period_ns,
     max_events_per_frame,
     n_pix_row,
 ):
-    count = 0
+    """
+    Writes the events of a frame to output_events in pixel order, returns the number of events
+
+    Rows are processed in parallel in two passes: the first one counts the spikes of each pixel, a prefix sum
+    of the row totals gives each row its offset in output_events, and the second one writes the events of
+    every row from its offset. No two threads write the same event, so the output is the same with any number of threads.
+    Like the serial kernel, the pixels after the one reaching max_events_per_frame are dropped and get no spike.
+    """
+    n_rows = current_image.size // n_pix_row
     max_spikes = int(delta_time / (refractory_period_ns * 1e-3))
-    for x in prange(x_end):
-        itdt = np.log(current_image[x])
-        it = np.log(previous_image[x])
-        deltaL = itdt - it
-
-        if np.abs(deltaL) < TOL:
-            continue
-
-        pol = np.sign(deltaL)
-
-        cross_update = pol * TOL
-        crossings[x] = np.log(crossings[x]) + cross_update
-
-        lb = crossings[x] - it
-        ub = crossings[x] - itdt
 
-        pos_check = lb > 0 and (pol == 1) and ub < 0
-        neg_check = lb < 0 and (pol == -1) and ub > 0
+    # Pass 1: spikes of every pixel, and their total for every row
+    for row in prange(n_rows):
+        row_count = 0
+        for x in range(row * n_pix_row, (row + 1) * n_pix_row):
+            spike_nums, spikes[x] = pixel_spikes(current_image, previous_image, crossings, x, max_spikes)
+            spike_counts[x] = spike_nums
+            row_count += spike_nums
+        row_offsets[row + 1] = row_count
+
+    # Prefix sum of the row totals
+    row_offsets[0] = 0
+    for row in range(n_rows):
+        row_offsets[row + 1] += row_offsets[row]
+    count = min(row_offsets[n_rows], max_events_per_frame)
+
+    # Pass 2: events of every row from its offset, the events past max_events_per_frame are dropped
+    for row in prange(n_rows):
+        index = row_offsets[row]
+        for x in range(row * n_pix_row, (row + 1) * n_pix_row):
+            if index >= max_events_per_frame:
+                spikes[x] = 0.0
+                continue
+            index = write_pixel_events(
+                output_events, index, count, x, n_pix_row, spike_counts[x], spikes[x], last_time, delta_time
+            )
 
-        spike_nums = (itdt - crossings[x]) / TOL
-        cross_check = pos_check + neg_check
-        spike_nums = np.abs(int(spike_nums * cross_check))
-
-        crossings[x] = itdt - cross_update
-        if spike_nums > 0:
-            spikes[x] = pol
-
-        spike_nums = max_spikes if spike_nums > max_spikes else spike_nums
-
-        current_time = last_time
-        for i in range(spike_nums):
-            output_events[count].x = x % n_pix_row
-            output_events[count].y = x // n_pix_row
-            output_events[count].timestamp = np.round(current_time * 1e-6, 6)
-            output_events[count].polarity = 1 if pol > 0 else -1
-
-            count += 1
-            current_time += (delta_time) / spike_nums
+    return count
 
-            if count == max_events_per_frame:
-                return count
 
-    return count
+@njit(parallel=True)
+def esim_batch(
+    current_images,
+    previous_images,
+    delta_times,
+    crossings,
+    last_times,
+    output_events,
+    spikes,
+    spike_counts,
+    row_counts,
+    row_offsets,
+    stream_offsets,
+    stream_counts,
+    refractory_period_ns,
+    max_events_per_frame,
+    n_pix_row,
+):
+    """
+    Same as esim for K streams of the same resolution, with the images and per pixel arrays shaped (K, H * W)
+
+    The rows of all the streams are processed in one parallel loop. The events of stream k are written to
+    output_events[stream_offsets[k]:stream_offsets[k] + stream_counts[k]], at most max_events_per_frame per stream.
+    Returns the total number of events.
+    """
+    n_streams = current_images.shape[0]
+    n_rows = current_images.shape[1] // n_pix_row
+
+    # Pass 1: spikes of every pixel, and their total for every row of every stream
+    for stream_row in prange(n_streams * n_rows):
+        k = stream_row // n_rows
+        row = stream_row % n_rows
+        max_spikes = int(delta_times[k] / (refractory_period_ns * 1e-3))
+        current_image, previous_image = current_images[k], previous_images[k]
+        stream_crossings, stream_spikes, stream_spike_counts = crossings[k], spikes[k], spike_counts[k]
+        row_count = 0
+        for x in range(row * n_pix_row, (row + 1) * n_pix_row):
+            spike_nums, stream_spikes[x] = pixel_spikes(current_image, previous_image, stream_crossings, x, max_spikes)
+            stream_spike_counts[x] = spike_nums
+            row_count += spike_nums
+        row_counts[stream_row] = row_count
+
+    # Prefix sums of the row totals within every stream, and of the stream totals
+    total = 0
+    for k in range(n_streams):
+        stream_total = 0
+        for stream_row in range(k * n_rows, (k + 1) * n_rows):
+            row_offsets[stream_row] = stream_total
+            stream_total += row_counts[stream_row]
+        stream_offsets[k] = total
+        stream_counts[k] = min(stream_total, max_events_per_frame)
+        total += stream_counts[k]
+
+    # Pass 2: events of every row from its offset, the pixels past max_events_per_frame get no spike like in esim
+    for stream_row in prange(n_streams * n_rows):
+        k = stream_row // n_rows
+        row = stream_row % n_rows
+        index = stream_offsets[k] + row_offsets[stream_row]
+        end = stream_offsets[k] + stream_counts[k]
+        cap = stream_offsets[k] + max_events_per_frame
+        stream_spikes, stream_spike_counts = spikes[k], spike_counts[k]
+        last_time, delta_time = last_times[k], delta_times[k]
+        for x in range(row * n_pix_row, (row + 1) * n_pix_row):
+            if index >= cap:
+                stream_spikes[x] = 0.0
+                continue
+            index = write_pixel_events(
+                output_events, index, end, x, n_pix_row, stream_spike_counts[x], stream_spikes[x], last_time, delta_time
+            )
+
+    return total
+
+
+def sort_events(events, out):
+    """
+    Copies events to out sorted by timestamp, events with the same timestamp stay in pixel order
+
+    Sorting the structured array directly would compare all the fields, only the timestamps are compared
+    """
+    order = np.argsort(events["timestamp"], kind="stable")
+    # Copied as opaque records, numpy copies those much faster than records with fields
+    raw_type = np.dtype((np.void, EVENT_TYPE.itemsize))
+    np.take(events.view(raw_type), order, out=out.view(raw_type))
+    return out
 
 
 class EventSimulator:
@@ -86,13 +221,12 @@ class EventSimulator:
         self.H = H
         self.W = W
         self.config = config
+        self.npix = H * W
         self.last_image = None
         if first_image is not None:
             assert first_time is not None
             self.init(first_image, first_time)
 
-        self.npix = H * W
-
     def init(self, first_image, first_time):
         print("Initialized event camera simulator with sensor size:", first_image.shape)
 
@@ -108,13 +242,28 @@ class EventSimulator:
 
         self.last_time = first_time
 
+        # Reused for every frame
         self.output_events = np.zeros(
             (self.config.max_events_per_frame), dtype=EVENT_TYPE
         )
+        self.sorted_events = np.zeros_like(self.output_events)
         self.event_count = 0
         self.spikes = np.zeros((self.npix))
+        self.crossings = np.zeros(self.npix, dtype=self.last_image.dtype)
+        self.spike_counts = np.zeros(self.npix, dtype=np.int64)
+        self.row_offsets = np.zeros(self.npix // self.W + 1, dtype=np.int64)
 
     def image_callback(self, new_image, new_time):
+        """
+        Args:
+            new_image (np.ndarray): (H, W) grayscale frame
+            new_time (float): Time of the frame in microseconds
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: (H * W) spikes and the events sorted by timestamp, None for the first frame.
+                                           Both are views of buffers reused for every frame, which the next call
+                                           overwrites, copy them to keep them
+        """
         if self.last_image is None:
             self.init(new_image, new_time)
             return None, None
@@ -128,14 +277,7 @@ class EventSimulator:
         delta_time = new_time - self.last_time
 
         config = self.config
-        self.output_events = np.zeros(
-            (self.config.max_events_per_frame), dtype=EVENT_TYPE
-        )
-        self.spikes = np.zeros((self.npix))
-
-        self.crossings = self.last_image.copy()
         self.event_count = esim(
-            self.current_image.size,
             self.current_image,
             self.last_image,
             delta_time,
@@ -143,6 +285,8 @@ class EventSimulator:
             self.last_time,
             self.output_events,
             self.spikes,
+            self.spike_counts,
+            self.row_offsets,
             config.refractory_period_ns,
             config.max_events_per_frame,
             self.W,
@@ -151,7 +295,111 @@ class EventSimulator:
         np.copyto(self.last_image, self.current_image)
         self.last_time = new_time
 
-        result = self.output_events[: self.event_count]
-        result.sort(order=["timestamp"], axis=0)
+        # The spikes and events are overwritten by the next frame
+        result = sort_events(
+            self.output_events[: self.event_count],
+            self.sorted_events[: self.event_count],
+        )
 
         return self.spikes, result
+
+
+class BatchEventSimulator:
+    """
+    Simulates several event cameras of the same resolution, e.g. a stereo rig or the cameras of several vehicles
+
+    The frames of all the cameras are passed together as a (K, H, W) array and simulated by a single esim_batch call,
+    which saves launching the kernel and its threads for every camera. Every camera keeps its own crossings
+    and the time of its previous frame, the first frames initialize the simulator.
+    """
+
+    def __init__(self, W, H, n_streams, first_images=None, first_times=None, config=CONFIG):
+        self.H = H
+        self.W = W
+        self.n_streams = n_streams
+        self.config = config
+        self.npix = H * W
+        self.last_images = None
+        if first_images is not None:
+            assert first_times is not None
+            self.init(first_images, first_times)
+
+    def init(self, first_images, first_times):
+        print("Initialized batch event camera simulator with sensor size:", first_images.shape)
+
+        self.resolution = first_images.shape
+        first_images = first_images.reshape(self.n_streams, -1)
+
+        self.last_images = first_images.copy()
+        self.current_images = first_images.copy()
+        self.last_times = np.array(first_times, dtype=np.float64).reshape(self.n_streams)
+
+        # Reused for every frame
+        self.output_events = np.zeros(
+            (self.n_streams * self.config.max_events_per_frame), dtype=EVENT_TYPE
+        )
+        self.sorted_events = np.zeros_like(self.output_events)
+        self.event_count = 0
+        self.spikes = np.zeros((self.n_streams, self.npix))
+        self.crossings = np.zeros((self.n_streams, self.npix), dtype=self.last_images.dtype)
+        self.spike_counts = np.zeros((self.n_streams, self.npix), dtype=np.int64)
+        n_rows = self.n_streams * (self.npix // self.W)
+        self.row_counts = np.zeros(n_rows, dtype=np.int64)
+        self.row_offsets = np.zeros(n_rows, dtype=np.int64)
+        self.stream_offsets = np.zeros(self.n_streams, dtype=np.int64)
+        self.stream_counts = np.zeros(self.n_streams, dtype=np.int64)
+
+    def image_callback(self, new_images, new_times):
+        """
+        Args:
+            new_images (np.ndarray): (K, H, W) grayscale frames of the K cameras
+            new_times (np.ndarray): (K,) times of the frames in microseconds
+
+        Returns:
+            tuple[np.ndarray, list[np.ndarray]]: (K, H * W) spikes, and the events of each camera sorted by timestamp.
+                                                 Both are views of buffers reused for every frame, which the next call
+                                                 overwrites, copy them to keep them
+        """
+        if self.last_images is None:
+            self.init(new_images, new_times)
+            return None, None
+
+        new_times = np.asarray(new_times, dtype=np.float64).reshape(self.n_streams)
+        assert np.all(new_times > 0)
+        assert new_images.shape == self.resolution
+        np.copyto(self.current_images, new_images.reshape(self.n_streams, -1))
+
+        delta_times = new_times - self.last_times
+
+        config = self.config
+        self.event_count = esim_batch(
+            self.current_images,
+            self.last_images,
+            delta_times,
+            self.crossings,
+            self.last_times,
+            self.output_events,
+            self.spikes,
+            self.spike_counts,
+            self.row_counts,
+            self.row_offsets,
+            self.stream_offsets,
+            self.stream_counts,
+            config.refractory_period_ns,
+            config.max_events_per_frame,
+            self.W,
+        )
+
+        np.copyto(self.last_images, self.current_images)
+        np.copyto(self.last_times, new_times)
+
+        results = []
+        for start, count in zip(self.stream_offsets, self.stream_counts):
+            results.append(
+                sort_events(
+                    self.output_events[start : start + count],
+                    self.sorted_events[start : start + count],
+                )
+            )
+
+        return self.spikes, results
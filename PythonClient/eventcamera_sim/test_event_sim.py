@@ -6,25 +6,30 @@ import matplotlib.pyplot as plt
 import argparse
 import sys, signal
 import pandas as pd
-import pickle
 from event_simulator import *
+from event_file import EventWriter
 
 parser = argparse.ArgumentParser(description="Simulate event data from AirSim")
 parser.add_argument("--debug", action="store_true")
 parser.add_argument("--save", action="store_true")
 parser.add_argument("--height", type=int, default=144)
 parser.add_argument("--width", type=int, default=256)
+parser.add_argument("--cameras", nargs="+", default=["0"], help="Cameras simulated as event cameras")
+parser.add_argument("--vehicles", nargs="+", default=[""], help="Vehicles whose cameras are simulated")
 
 
 class AirSimEventGen:
-    def __init__(self, W, H, save=False, debug=False):
-        self.ev_sim = EventSimulator(W, H)
+    def __init__(self, W, H, cameras=("0",), vehicles=("",), save=False, debug=False):
+        # Every camera of every vehicle is an event camera, all of them are simulated together
+        self.streams = [(vehicle, camera) for vehicle in vehicles for camera in cameras]
+        self.ev_sim = BatchEventSimulator(W, H, len(self.streams))
         self.H = H
         self.W = W
 
-        self.image_request = airsim.ImageRequest(
-            "0", airsim.ImageType.Scene, False, False
-        )
+        self.image_requests = [
+            airsim.ImageRequest(camera, airsim.ImageType.Scene, False, False) for camera in cameras
+        ]
+        self.vehicles = vehicles
 
         self.client = airsim.VehicleClient()
         self.client.confirmConnection()
@@ -32,15 +37,48 @@ class AirSimEventGen:
         self.start_ts = None
 
         self.rgb_image_shape = [H, W, 3]
+        self.images = np.zeros((len(self.streams), H, W), dtype=np.float32)
         self.debug = debug
         self.save = save
 
-        self.event_file = open("events.pkl", "ab")
-        self.event_fmt = "%1.7f", "%d", "%d", "%d"
+        # Read back with np.load("events.npy", mmap_mode="r") or event_file.EventReader
+        self.event_files = []
+        if save:
+            if len(self.streams) == 1:
+                self.event_files = [EventWriter("events.npy")]
+            else:
+                self.event_files = [
+                    EventWriter("events_%s_%s.npy" % (vehicle or "default", camera)) for vehicle, camera in self.streams
+                ]
 
         if debug:
             self.fig, self.ax = plt.subplots(1, 1)
 
+    def get_frames(self):
+        """
+        Grayscale frames of all the cameras in self.images, and their time stamps in nanoseconds
+
+        The images of all the vehicles are requested in a single round trip
+        """
+        while True:
+            responses = self.client.call_many(
+                [("simGetImages", (self.image_requests, vehicle)) for vehicle in self.vehicles]
+            )
+            responses = [response for vehicle_responses in responses for response in vehicle_responses]
+            if all(response.height != 0 and response.width != 0 for response in responses):
+                break
+
+        for image, response in zip(self.images, responses):
+            img = np.reshape(
+                np.frombuffer(response.image_data_uint8, dtype=np.uint8),
+                self.rgb_image_shape,
+            )
+            image[:] = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+        # Add small number to avoid issues with log(I)
+        self.images += 0.001
+
+        return self.images, np.array([response.time_stamp for response in responses], dtype=np.int64)
+
     def visualize_events(self, event_img):
         event_img = self.convert_event_img_rgb(event_img)
         self.ax.cla()
@@ -58,55 +96,39 @@ class AirSimEventGen:
 
     def _stop_event_gen(self, signal, frame):
         print("\nCtrl+C received. Stopping event sim...")
-        self.event_file.close()
+        for event_file in self.event_files:
+            event_file.close()
         sys.exit(0)
 
 
 if __name__ == "__main__":
     args = parser.parse_args()
 
-    event_generator = AirSimEventGen(args.width, args.height, save=args.save, debug=args.debug)
-    i = 0
-    start_time = 0
-    t_start = time.time()
+    event_generator = AirSimEventGen(
+        args.width, args.height, args.cameras, args.vehicles, save=args.save, debug=args.debug
+    )
 
     signal.signal(signal.SIGINT, event_generator._stop_event_gen)
 
     while True:
-        image_request = airsim.ImageRequest("0", airsim.ImageType.Scene, False, False)
-
-        response = event_generator.client.simGetImages([event_generator.image_request])
-        while response[0].height == 0 or response[0].width == 0:
-            response = event_generator.client.simGetImages(
-                [event_generator.image_request]
-            )
-
-        ts = time.time_ns()
+        images, ts = event_generator.get_frames()
 
         if event_generator.init:
-            event_generator.start_ts = ts
+            event_generator.start_ts = ts.min()
             event_generator.init = False
 
-        img = np.reshape(
-            np.fromstring(response[0].image_data_uint8, dtype=np.uint8),
-            event_generator.rgb_image_shape,
-        )
-
-        img = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY).astype(np.float32)
-        # Add small number to avoid issues with log(I)
-        img = cv2.add(img, 0.001)
-
-        ts = time.time_ns()
+        # Every camera has its own capture time, in microseconds since the first frames
         ts_delta = (ts - event_generator.start_ts) * 1e-3
 
-        # Event sim keeps track of previous image automatically
-        event_img, events = event_generator.ev_sim.image_callback(img, ts_delta)
+        # Event sim keeps track of previous images automatically
+        event_imgs, events = event_generator.ev_sim.image_callback(images, ts_delta)
+
+        if events is None:
+            continue
 
-        if events is not None and events.shape[0] > 0:
-            if event_generator.save:
-                # Using pickle dump in a per-frame fashion to save time, instead of savetxt
-                # Optimizations possible
-                pickle.dump(events, event_generator.event_file)
+        if event_generator.save:
+            for event_file, stream_events in zip(event_generator.event_files, events):
+                event_file.write(stream_events)
 
-            if event_generator.debug:
-                event_generator.visualize_events(event_img)
+        if event_generator.debug:
+            event_generator.visualize_events(event_imgs[0])
@@ -1,12 +1,16 @@
 import random
 import csv
+import concurrent.futures
+import gc
 from PIL import Image
 import numpy as np
 import pandas as pd
 import sys
 import os
 import errno
-from collections import OrderedDict
+from collections import OrderedDict, deque
+import queue
+import threading
 import h5py
 from pathlib import Path
 import copy
@@ -82,56 +86,80 @@ def splitTrainValidationAndTestData(all_data_mappings, split_ratio=(0.7, 0.2, 0.
 
     return [train_data_mappings, validation_data_mappings, test_data_mappings]
     
-def generateDataMapAirSim(folders):
-    """ Data map generator for simulator(AirSim) data. Reads the driving_log csv file and returns a list of 'center camera image name - label(s)' tuples
+def readDataMapAirSim(folder):
+    """ Reads the driving log of a single folder, see generateDataMapAirSim.
            Inputs:
-               folders: list of folders to collect data from
+               folder: folder to collect data from
 
            Returns:
-               mappings: All data mappings as a dictionary. Key is the image filepath, the values are a 2-tuple:
-                   0 -> label(s) as a list of double
-                   1 -> previous state as a list of double
+               image_filepaths: list of the image filepaths of the kept rows
+               labels: array of shape (N, 1), the average normalized steering over 3 consecutive rows
+               previous_states: array of shape (N, 3), the normalized steering, throttle and speed of the previous row
     """
+    print('Reading data from {0}...'.format(folder))
+    current_df = pd.read_csv(os.path.join(folder, 'airsim_rec.txt'), sep='\t',
+                             usecols=['Steering', 'Throttle', 'Brake', 'Speed (kmph)', 'ImageName'])
 
-    all_mappings = {}
-    for folder in folders:
-        print('Reading data from {0}...'.format(folder))
-        current_df = pd.read_csv(os.path.join(folder, 'airsim_rec.txt'), sep='\t')
-        
-        for i in range(1, current_df.shape[0] - 1): 
-
-            
-            if current_df.iloc[i-1]['Brake'] != 0:   # Consider only training examples without breaks
-                continue
-
+    # Row i (from 1 to n - 2) is labelled with rows i-1, i and i+1, and row i-1 is its previous state
+    norm_steering = (current_df['Steering'].to_numpy(dtype=np.float64) + 1) / 2.0  # Normalize steering: between 0 and 1
+    norm_throttle = current_df['Throttle'].to_numpy(dtype=np.float64)
+    norm_speed = current_df['Speed (kmph)'].to_numpy(dtype=np.float64) / MAX_SPEED  # Normalize speed: between 0 and 1
+    previous, current, following = slice(0, -2), slice(1, -1), slice(2, None)
 
-            norm_steering = [ (float(current_df.iloc[i-1][['Steering']]) + 1) / 2.0 ]  # Normalize steering: between 0 and 1
-            norm_throttle = [ float(current_df.iloc[i-1][['Throttle']]) ]
-            norm_speed = [ float(current_df.iloc[i-1][['Speed (kmph)']]) / MAX_SPEED ]  # Normalize speed: between 0 and 1
+    keep = current_df['Brake'].to_numpy()[previous] == 0   # Consider only training examples without breaks
 
+    #compute average steering over 3 consecutive recorded images, this will serve as the label
+    labels = ((norm_steering[previous] + norm_steering[current] + norm_steering[following]) / 3.0)[keep, np.newaxis]
+    previous_states = np.column_stack((norm_steering[previous], norm_throttle[previous], norm_speed[previous]))[keep]
 
-            previous_state = norm_steering + norm_throttle + norm_speed   # Append lists
+    images_dir = os.path.join(folder, 'images', '').replace('\\', '/')
+    image_names = current_df['ImageName'].to_numpy()[current][keep]
+    image_filepaths = [images_dir + name.replace('\\', '/') for name in image_names]
 
+    return image_filepaths, labels, previous_states
 
-            #compute average steering over 3 consecutive recorded images, this will serve as the label
 
-            norm_steering0 = (float(current_df.iloc[i][['Steering']]) + 1) / 2.0
-            norm_steering1 = (float(current_df.iloc[i+1][['Steering']]) + 1) / 2.0
+def generateDataMapAirSim(folders, workers=None):
+    """ Data map generator for simulator(AirSim) data. Reads the driving_log csv file and returns a list of 'center camera image name - label(s)' tuples
+           Inputs:
+               folders: list of folders to collect data from
+               workers: number of processes reading folders in parallel, defaults to the number of CPUs
 
-            temp_sum_steering = norm_steering[0] + norm_steering0 + norm_steering1
-            average_steering = temp_sum_steering / 3.0
+           Returns:
+               mappings: All data mappings as a dictionary. Key is the image filepath, the values are a 2-tuple:
+                   0 -> label(s) as a list of double
+                   1 -> previous state as a list of double
+    """
 
-            current_label = [average_steering]
-            
-            image_filepath = os.path.join(os.path.join(folder, 'images'), current_df.iloc[i]['ImageName']).replace('\\', '/')
-            
-            if (image_filepath in all_mappings):
-                print('Error: attempting to add image {0} twice.'.format(image_filepath))
-            
-            all_mappings[image_filepath] = (current_label, previous_state)
+    if len(folders) > 1 and workers != 1:
+        with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+            folder_mappings = list(executor.map(readDataMapAirSim, folders))
+    else:
+        folder_mappings = [readDataMapAirSim(folder) for folder in folders]
+
+    # Building millions of small lists triggers the garbage collector over and over, none of them can be cyclic garbage
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        image_filepaths = [image_filepath for folder_filepaths, _, _ in folder_mappings for image_filepath in folder_filepaths]
+        labels = np.concatenate([labels for _, labels, _ in folder_mappings]).tolist() if folder_mappings else []
+        previous_states = np.concatenate([states for _, _, states in folder_mappings]).tolist() if folder_mappings else []
+
+        if len(set(image_filepaths)) == len(image_filepaths):
+            mappings = list(zip(image_filepaths, zip(labels, previous_states)))
+        else:
+            all_mappings = {}
+            for image_filepath, current_label, previous_state in zip(image_filepaths, labels, previous_states):
+                if (image_filepath in all_mappings):
+                    print('Error: attempting to add image {0} twice.'.format(image_filepath))
+
+                all_mappings[image_filepath] = (current_label, previous_state)
+
+            mappings = [(key, all_mappings[key]) for key in all_mappings]
+    finally:
+        if gc_was_enabled:
+            gc.enable()
 
-    mappings = [(key, all_mappings[key]) for key in all_mappings]
-    
     random.shuffle(mappings) 
     
     return mappings
@@ -151,75 +179,112 @@ def generatorForH5py(data_mappings, chunk_size=32):
             
             #Flatten and yield as tuple
             yield (image_names_chunk, labels_chunk.astype(float), previous_state_chunk.astype(float))
-            if chunk_id + chunk_size > len(data_mappings):
-                raise StopIteration
-    raise StopIteration
-    
-    
-def saveH5pyData(data_mappings, target_file_path, chunk_size):
+
+
+def readImageChunk(image_names):
+    """ Loads a chunk of images as a single array, run in the worker processes of saveH5pyData
+    """
+    return np.asarray(readImagesFromPath(image_names))
+
+
+def saveH5pyData(data_mappings, target_file_path, chunk_size, workers=None, compression=None, compression_opts=None, h5_chunk_rows=None):
     """
     Saves H5 data to file
+
+    Images are decoded by a pool of worker processes while a writer thread fills datasets preallocated for all the rows,
+    only complete chunks of chunk_size rows are saved.
+            Inputs:
+                data_mappings: mappings as returned by generateDataMapAirSim
+                target_file_path: path of the h5 file
+                chunk_size: number of images decoded per task
+                workers: number of decoding processes, defaults to the number of CPUs
+                compression: h5py compression of the datasets, e.g. 'gzip' or 'lzf', None for uncompressed
+                compression_opts: h5py compression settings, e.g. the gzip level
+                h5_chunk_rows: rows per HDF5 chunk of the image dataset, defaults to chunk_size
     """
-    gen = generatorForH5py(data_mappings,chunk_size)
+    row_count = (len(data_mappings) // chunk_size) * chunk_size
+    if row_count == 0:
+        print('Error: not enough data for a chunk of {0} images.'.format(chunk_size))
+        return
+    data_mappings = data_mappings[:row_count]
 
-    image_names_chunk, labels_chunk, previous_state_chunk = next(gen)
-    images_chunk = np.asarray(readImagesFromPath(image_names_chunk))
-    row_count = images_chunk.shape[0]
+    labels = np.asarray([b[0] for (a, b) in data_mappings]).astype(float)
+    previous_states = np.asarray([b[1] for (a, b) in data_mappings]).astype(float)
+    first_image = readImageChunk([data_mappings[0][0]])
 
     checkAndCreateDir(target_file_path)
     with h5py.File(target_file_path, 'w') as f:
 
-        # Initialize a resizable dataset to hold the output
-        images_chunk_maxshape = (None,) + images_chunk.shape[1:]
-        labels_chunk_maxshape = (None,) + labels_chunk.shape[1:]
-        previous_state_maxshape = (None,) + previous_state_chunk.shape[1:]
-
-        dset_images = f.create_dataset('image', shape=images_chunk.shape, maxshape=images_chunk_maxshape,
-                                chunks=images_chunk.shape, dtype=images_chunk.dtype)
-
-        dset_labels = f.create_dataset('label', shape=labels_chunk.shape, maxshape=labels_chunk_maxshape,
-                                       chunks=labels_chunk.shape, dtype=labels_chunk.dtype)
-        
-        dset_previous_state = f.create_dataset('previous_state', shape=previous_state_chunk.shape, maxshape=previous_state_maxshape,
-                                       chunks=previous_state_chunk.shape, dtype=previous_state_chunk.dtype)
-                                       
-        dset_images[:] = images_chunk
-        dset_labels[:] = labels_chunk
-        dset_previous_state[:] = previous_state_chunk
-
-        for image_names_chunk, label_chunk, previous_state_chunk in gen:
-            image_chunk = np.asarray(readImagesFromPath(image_names_chunk))
-            
-            # Resize the dataset to accommodate the next chunk of rows
-            dset_images.resize(row_count + image_chunk.shape[0], axis=0)
-            dset_labels.resize(row_count + label_chunk.shape[0], axis=0)
-            dset_previous_state.resize(row_count + previous_state_chunk.shape[0], axis=0)
-            # Create the next chunk
-            dset_images[row_count:] = image_chunk
-            dset_labels[row_count:] = label_chunk
-            dset_previous_state[row_count:] = previous_state_chunk
-
-            # Increment the row count
-            row_count += image_chunk.shape[0]
+        # Datasets are sized for all rows up front, resizable so that more data can be appended later
+        h5_chunk_rows = min(h5_chunk_rows or chunk_size, row_count)
+        dset_images = f.create_dataset('image', shape=(row_count,) + first_image.shape[1:], maxshape=(None,) + first_image.shape[1:],
+                                       chunks=(h5_chunk_rows,) + first_image.shape[1:], dtype=first_image.dtype,
+                                       compression=compression, compression_opts=compression_opts)
+
+        f.create_dataset('label', data=labels, maxshape=(None,) + labels.shape[1:], chunks=(min(chunk_size, row_count),) + labels.shape[1:])
+        f.create_dataset('previous_state', data=previous_states, maxshape=(None,) + previous_states.shape[1:],
+                         chunks=(min(chunk_size, row_count),) + previous_states.shape[1:])
+
+        # The writer thread writes chunks in order while the next ones are decoded
+        write_queue = queue.Queue(maxsize=4)
+        write_errors = []
+        def write_chunks():
+            while True:
+                item = write_queue.get()
+                if item is None:
+                    return
+                start, images_chunk = item
+                try:
+                    dset_images[start:start + images_chunk.shape[0]] = images_chunk
+                except Exception as e:
+                    write_errors.append(e)
+        writer = threading.Thread(target=write_chunks)
+        writer.start()
+
+        workers = workers or os.cpu_count() or 1
+        try:
+            with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+                # Keep a bounded number of decoded chunks in flight, so memory doesn't depend on the dataset size
+                pending = deque()
+                for start in range(0, row_count, chunk_size):
+                    image_names_chunk = [a for (a, b) in data_mappings[start:start + chunk_size]]
+                    pending.append((start, executor.submit(readImageChunk, image_names_chunk)))
+                    if len(pending) >= 2 * workers:
+                        decoded_start, future = pending.popleft()
+                        write_queue.put((decoded_start, future.result()))
+                    if write_errors:
+                        raise write_errors[0]
+                while pending:
+                    decoded_start, future = pending.popleft()
+                    write_queue.put((decoded_start, future.result()))
+        finally:
+            write_queue.put(None)
+            writer.join()
+        if write_errors:
+            raise write_errors[0]
             
             
-def cook(folders, output_directory, train_eval_test_split, chunk_size):
+def cook(folders, output_directory, train_eval_test_split, chunk_size, workers=None, compression=None, compression_opts=None, h5_chunk_rows=None):
     """ Primary function for data pre-processing. Reads and saves all data as h5 files.
             Inputs:
                 folders: a list of all data folders
                 output_directory: location for saving h5 files
                 train_eval_test_split: dataset split ratio
+                workers: number of processes reading folders and decoding images
+                compression: h5py compression of the image datasets, e.g. 'gzip' or 'lzf'
+                compression_opts: h5py compression settings, e.g. the gzip level
+                h5_chunk_rows: rows per HDF5 chunk of the image datasets, defaults to chunk_size
     """
     output_files = [os.path.join(output_directory, f) for f in ['train.h5', 'eval.h5', 'test.h5']]
     if (any([os.path.isfile(f) for f in output_files])):
        print("Preprocessed data already exists at: {0}. Skipping preprocessing.".format(output_directory))
 
     else:
-        all_data_mappings = generateDataMapAirSim(folders)
+        all_data_mappings = generateDataMapAirSim(folders, workers)
         
         split_mappings = splitTrainValidationAndTestData(all_data_mappings, split_ratio=train_eval_test_split)
         
         for i in range(0, len(split_mappings)-1, 1):
             print('Processing {0}...'.format(output_files[i]))
-            saveH5pyData(split_mappings[i], output_files[i], chunk_size)
+            saveH5pyData(split_mappings[i], output_files[i], chunk_size, workers, compression, compression_opts, h5_chunk_rows)
             print('Finished saving {0}.'.format(output_files[i]))
\ No newline at end of file
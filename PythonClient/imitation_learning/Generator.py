@@ -160,6 +160,50 @@ class DriveDataGenerator(image.ImageDataGenerator):
 
         return (x, is_image_horizontally_flipped)
 
+    def random_transform_batch_with_states(self, x):
+        """Randomly augment a batch of image tensors.
+        Flips and brightness are applied to the whole batch at once, other transforms fall back to random_transform_with_states per image.
+        # Arguments
+            x: 4D tensor, batch of images, modified in place.
+        # Returns
+            A tuple. 0 -> randomly transformed batch (same shape). 1 -> boolean array, true for the horizontally flipped images
+        """
+        if (self.rotation_range or self.height_shift_range or self.width_shift_range or self.shear_range
+                or self.zoom_range[0] != 1 or self.zoom_range[1] != 1 or self.channel_shift_range != 0):
+            transformed = [self.random_transform_with_states(x_image) for x_image in x]
+            return (np.stack([t[0] for t in transformed]), np.array([t[1] for t in transformed], dtype=bool))
+
+        batch_size = x.shape[0]
+        is_image_horizontally_flipped = np.zeros(batch_size, dtype=bool)
+        if self.horizontal_flip:
+            is_image_horizontally_flipped = np.random.random(batch_size) < 0.5
+            x[is_image_horizontally_flipped] = np.flip(x[is_image_horizontally_flipped], self.col_axis)
+
+        if self.vertical_flip:
+            is_image_vertically_flipped = np.random.random(batch_size) < 0.5
+            x[is_image_vertically_flipped] = np.flip(x[is_image_vertically_flipped], self.row_axis)
+
+        if self.brighten_range != 0:
+            random_bright = np.random.uniform(low = 1.0-self.brighten_range, high=1.0+self.brighten_range, size=batch_size)
+            random_bright = random_bright.reshape((batch_size, 1, 1, 1)).astype(x.dtype)
+
+            # Scaling V of HSV and converting back scales R, G and B alike, with V = max(R, G, B) clipped at 255
+            value = np.max(x, axis=self.channel_axis, keepdims=True)
+            x *= np.minimum(random_bright, 255.0 / np.maximum(value, 1e-6))
+            np.clip(x, 0, 255, out=x)
+
+        return (x, is_image_horizontally_flipped)
+
+    def standardize_batch(self, x):
+        """Applies the normalization configuration to a batch of images, rescaling is done on the whole batch at once.
+        """
+        if (self.preprocessing_function or self.samplewise_center or self.samplewise_std_normalization
+                or self.featurewise_center or self.featurewise_std_normalization or self.zca_whitening):
+            return np.stack([self.standardize(x_image) for x_image in x])
+        if self.rescale:
+            x *= self.rescale
+        return x
+
 
 
 class DriveIterator(image.Iterator):
@@ -182,6 +226,10 @@ class DriveIterator(image.Iterator):
             images (if `save_to_dir` is set).
         save_format: Format to use for saving sample images
             (if `save_to_dir` is set).
+    The inputs can be h5py datasets, batches are read with a single
+    indexed read of the region of interest, so the dataset doesn't need
+    to fit in memory. The iterator is a `Sequence`, pass `workers` to
+    `fit_generator` to prepare batches in the background.
     """
 
     def __init__(self, x_images, x_prev_states, y, image_data_generator,
@@ -247,49 +295,25 @@ class DriveIterator(image.Iterator):
         return self.__get_indexes(index_array)
 
     def __get_indexes(self, index_array):
-        index_array = sorted(index_array)
-        if self.x_prev_states is not None:
-            batch_x_images = np.zeros(tuple([self.batch_size]+ list(self.x_images.shape)[1:]),
-                                      dtype=K.floatx())
-            batch_x_prev_states = np.zeros(tuple([self.batch_size]+list(self.x_prev_states.shape)[1:]), dtype=K.floatx())
+        # h5py datasets need increasing indexes, the whole batch
+        # and only the region of interest is read at once
+        index_array = np.sort(index_array)
+        if self.roi is not None:
+            batch_x_images = self.x_images[index_array, self.roi[0]:self.roi[1], self.roi[2]:self.roi[3], :]
         else:
-            batch_x_images = np.zeros(tuple([self.batch_size] + list(self.x_images.shape)[1:]), dtype=K.floatx())
+            batch_x_images = self.x_images[index_array]
+        batch_x_images = np.asarray(batch_x_images, dtype=K.floatx())
 
-        if self.roi is not None:
-            batch_x_images = batch_x_images[:, self.roi[0]:self.roi[1], self.roi[2]:self.roi[3], :]
-            
-        used_indexes = []
-        is_horiz_flipped = []
-        for i, j in enumerate(index_array):
-            x_images = self.x_images[j]            
-            
-            if self.roi is not None:
-                x_images = x_images[self.roi[0]:self.roi[1], self.roi[2]:self.roi[3], :]
-                
-                
-            transformed = self.image_data_generator.random_transform_with_states(x_images.astype(K.floatx()))
-            x_images = transformed[0]
-            is_horiz_flipped.append(transformed[1])
-            x_images = self.image_data_generator.standardize(x_images)
-            batch_x_images[i] = x_images
-
-            if self.x_prev_states is not None:
-                x_prev_states = self.x_prev_states[j]
-                
-                if (transformed[1]):
-                    x_prev_states[0] *= -1.0
-                
-                batch_x_prev_states[i] = x_prev_states
-            
-            used_indexes.append(j)
+        batch_x_images, is_horiz_flipped = self.image_data_generator.random_transform_batch_with_states(batch_x_images)
+        batch_x_images = self.image_data_generator.standardize_batch(batch_x_images)
 
         if self.x_prev_states is not None:
-            batch_x = [np.asarray(batch_x_images)]
+            batch_x = [batch_x_images]
         else:
-            batch_x = np.asarray(batch_x_images)
+            batch_x = batch_x_images
             
         if self.save_to_dir:
-            for i in range(0, self.batch_size, 1):
+            for i in range(0, len(batch_x_images), 1):
                 hash = np.random.randint(1e4)
                
                 img = image.array_to_img(batch_x_images[i], self.data_format, scale=True)
@@ -299,37 +323,16 @@ class DriveIterator(image.Iterator):
                                                                         format=self.save_format)
                 img.save(os.path.join(self.save_to_dir, fname))
 
-        batch_y = self.y[list(sorted(used_indexes))]
-        idx = []
-        num_of_close_samples = 0
-        num_of_non_close_samples = 0
-        for i in range(0, len(is_horiz_flipped), 1):
-            if batch_y.shape[1] == 1:
-                
-                if (is_horiz_flipped[i]):
-                    batch_y[i] *= -1
-
-                if (np.isclose(batch_y[i], 0.5, rtol=0.005, atol=0.005)): 
-                    num_of_close_samples += 1
-                    if (np.random.uniform(low=0, high=1) > self.zero_drop_percentage):
-                        idx.append(True)
-                    else:
-                        idx.append(False)
-                else:
-                    num_of_non_close_samples += 1
-                    idx.append(True)
-            else:
-                
-                if (batch_y[i][int(len(batch_y[i])/2)] == 1):
-                    if (np.random.uniform(low=0, high=1) > self.zero_drop_percentage):
-                        idx.append(True)
-                    else:
-                        idx.append(False)
-                else:
-                    idx.append(True)
-                
-                if (is_horiz_flipped[i]):
-                    batch_y[i] = batch_y[i][::-1]
+        batch_y = np.array(self.y[index_array])
+        drop = np.random.uniform(low=0, high=1, size=len(index_array)) <= self.zero_drop_percentage
+        if batch_y.shape[1] == 1:
+            batch_y[is_horiz_flipped] *= -1
+            # Drop most of the samples driving straight ahead
+            is_close = np.isclose(batch_y[:, 0], 0.5, rtol=0.005, atol=0.005)
+        else:
+            is_close = batch_y[:, int(batch_y.shape[1]/2)] == 1
+            batch_y[is_horiz_flipped] = batch_y[is_horiz_flipped, ::-1]
+        idx = ~(is_close & drop)
 
         batch_y = batch_y[idx]
         batch_x[0] = batch_x[0][idx]
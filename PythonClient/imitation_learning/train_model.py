@@ -91,4 +91,5 @@ early_stopping_callback = EarlyStopping(monitor="val_loss", patience=training_pa
 callbacks=[plateau_callback, csv_callback, checkpoint_callback, early_stopping_callback, TQDMNotebookCallback()]
 
 history = model.fit_generator(train_generator, steps_per_epoch=num_train_examples//batch_size, epochs=number_of_epochs, callbacks=callbacks,\
-                   validation_data=eval_generator, validation_steps=num_eval_examples//batch_size, verbose=2)
+                   validation_data=eval_generator, validation_steps=num_eval_examples//batch_size, verbose=2,\
+                   workers=4, max_queue_size=8)
@@ -34,12 +34,12 @@ class KinectPublisher:
         self.msg_tf = TFMessage()
 
     def getDepthImage(self,response_d):
-        img_depth = np.array(response_d.image_data_float, dtype=np.float32)
+        img_depth = np.asarray(response_d.image_data_float, dtype=np.float32)
         img_depth = img_depth.reshape(response_d.height, response_d.width)
         return img_depth
 
     def getRGBImage(self,response_rgb):
-        img1d = np.fromstring(response_rgb.image_data_uint8, dtype=np.uint8)
+        img1d = np.frombuffer(response_rgb.image_data_uint8, dtype=np.uint8)
         img_rgb = img1d.reshape(response_rgb.height, response_rgb.width, 3)
         img_rgb = img_rgb[..., :3][..., ::-1]
         return img_rgb
@@ -195,7 +195,7 @@ if __name__ == "__main__":
 
     while not rospy.is_shutdown():
         responses = client.simGetImages([airsim.ImageRequest(0, airsim.ImageType.DepthPlanar, True, False),
-                                         airsim.ImageRequest(0, airsim.ImageType.Scene, False, False)])
+                                         airsim.ImageRequest(0, airsim.ImageType.Scene, False, False)], as_numpy=True)
         img_depth = pub.getDepthImage(responses[0])
         img_rgb = pub.getRGBImage(responses[1])
 
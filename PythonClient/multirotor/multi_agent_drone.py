@@ -1,6 +1,4 @@
 import airsim
-import cv2
-import numpy as np
 import os
 import pprint
 import setup_path 
@@ -68,27 +66,16 @@ print('Drone2: Retrieved images: %d' % len(responses2))
 
 tmp_dir = os.path.join(tempfile.gettempdir(), "airsim_drone")
 print ("Saving images to %s" % tmp_dir)
-try:
-    os.makedirs(tmp_dir)
-except OSError:
-    if not os.path.isdir(tmp_dir):
-        raise
 
+# the images are saved by worker threads, close() waits for them
+writer = airsim.ImageWriter(tmp_dir)
 for idx, response in enumerate(responses1 + responses2):
-
-    filename = os.path.join(tmp_dir, str(idx))
-
     if response.pixels_as_float:
         print("Type %d, size %d" % (response.image_type, len(response.image_data_float)))
-        airsim.write_pfm(os.path.normpath(filename + '.pfm'), airsim.get_pfm_array(response))
-    elif response.compress: #png format
-        print("Type %d, size %d" % (response.image_type, len(response.image_data_uint8)))
-        airsim.write_file(os.path.normpath(filename + '.png'), response.image_data_uint8)
-    else: #uncompressed array
+    else:
         print("Type %d, size %d" % (response.image_type, len(response.image_data_uint8)))
-        img1d = np.fromstring(response.image_data_uint8, dtype=np.uint8) #get numpy array
-        img_rgb = img1d.reshape(response.height, response.width, 3) #reshape array to 3 channel image array H X W X 3
-        cv2.imwrite(os.path.normpath(filename + '.png'), img_rgb) # write to png
+    writer.write(response, name=str(idx))
+writer.close()
 
 airsim.wait_key('Press any key to reset to original state')
 
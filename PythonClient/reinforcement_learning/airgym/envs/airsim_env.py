@@ -1,20 +1,49 @@
 import numpy as np
+from contextlib import nullcontext
 import airsim
 
 import gym
 from gym import spaces
+from airgym.envs.lockstep import Lockstep
+from airgym.envs.observation import DepthObservation
 
 
 class AirSimEnv(gym.Env):
     metadata = {"render.modes": ["rgb_array"]}
 
-    def __init__(self, image_shape):
-        self.observation_space = spaces.Box(0, 255, shape=image_shape, dtype=np.uint8)
+    def __init__(self, image_shape, frame_stack=1):
+        self.observation = DepthObservation(image_shape, frame_stack)
+        self.observation_space = spaces.Box(0, 255, shape=self.observation.shape, dtype=np.uint8)
         self.viewer = None
 
     def __del__(self):
         raise NotImplementedError()
 
+    def _setup_lockstep(self, client, lockstep, control_period, control_frames):
+        # lockstep is True for an env of its own, or the Lockstep shared by the envs of an AirSimVecEnv
+        self.shares_lockstep = isinstance(lockstep, Lockstep)
+        if lockstep is True:
+            lockstep = Lockstep(client, control_period, control_frames, sim_time=self._sim_time)
+        self.lockstep = lockstep or None
+
+    def _sim_time(self):
+        raise NotImplementedError()
+
+    def _sim_running(self):
+        # With a shared Lockstep the other vehicles are mid-episode, the simulation stays paused and the vehicle is
+        # reset without waiting for it to move
+        if self.lockstep is None or self.shares_lockstep:
+            return nullcontext()
+        return self.lockstep.running()
+
+    def _step_duration(self):
+        # Simulated seconds until the next step, how long the commands of a step have to last
+        return self.lockstep.step_duration if self.lockstep is not None else self.control_period
+
+    def _advance(self):
+        if self.lockstep is not None:
+            self.lockstep.advance()
+
     def _get_obs(self):
         raise NotImplementedError()
 
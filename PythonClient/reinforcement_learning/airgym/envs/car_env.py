@@ -1,19 +1,27 @@
 import setup_path
 import airsim
 import numpy as np
-import math
 import time
 
 import gym
 from gym import spaces
 from airgym.envs.airsim_env import AirSimEnv
+from airgym.envs.path import Path
+
+PATH_POINTS = [
+    (0, -1), (130, -1), (130, 125), (0, 125),
+    (0, -1), (130, -1), (130, -128), (0, -128),
+    (0, -1),
+]
 
 
 class AirSimCarEnv(AirSimEnv):
-    def __init__(self, ip_address, image_shape):
-        super().__init__(image_shape)
+    def __init__(self, ip_address, image_shape, vehicle_name="", client=None, frame_stack=1,
+                 lockstep=False, control_period=1, control_frames=None):
+        super().__init__(image_shape, frame_stack)
 
         self.image_shape = image_shape
+        self.vehicle_name = vehicle_name
         self.start_ts = 0
 
         self.state = {
@@ -24,24 +32,40 @@ class AirSimCarEnv(AirSimEnv):
             "collision": False,
         }
 
-        self.car = airsim.CarClient(ip=ip_address)
+        # Envs of an AirSimVecEnv share the client, each driving its own vehicle
+        self.shares_client = client is not None
+        self.car = client if self.shares_client else airsim.CarClient(ip=ip_address)
+        self.start_pose = self.car.simGetVehiclePose(vehicle_name=self.vehicle_name)
+        self.reset_collision_time_stamp = 0
         self.action_space = spaces.Discrete(6)
+        self.path = Path(PATH_POINTS)
+        self.control_period = control_period
+        self._setup_lockstep(self.car, lockstep, control_period, control_frames)
 
         self.image_request = airsim.ImageRequest(
-            "0", airsim.ImageType.DepthPerspective, True, False
+            "0", airsim.ImageType.DepthPerspective, True, False, float_as_bytes=True
         )
 
         self.car_controls = airsim.CarControls()
         self.car_state = None
 
     def _setup_car(self):
-        self.car.reset()
-        self.car.enableApiControl(True)
-        self.car.armDisarm(True)
+        if self.shares_client:
+            # reset() would reset all the vehicles, only move this one back to where it started
+            self.car.simSetVehiclePose(self.start_pose, True, vehicle_name=self.vehicle_name)
+        else:
+            self.car.reset()
+        self.car.enableApiControl(True, vehicle_name=self.vehicle_name)
+        self.car.armDisarm(True, vehicle_name=self.vehicle_name)
         time.sleep(0.01)
+        # Collisions from before the reset are still reported after a pose reset
+        self.reset_collision_time_stamp = self.car.simGetCollisionInfo(vehicle_name=self.vehicle_name).time_stamp
 
     def __del__(self):
-        self.car.reset()
+        if not self.shares_client:
+            if self.lockstep is not None:
+                self.lockstep.release()
+            self.car.reset()
 
     def _do_action(self, action):
         self.car_controls.brake = 0
@@ -61,88 +85,85 @@ class AirSimCarEnv(AirSimEnv):
         else:
             self.car_controls.steering = -0.25
 
-        self.car.setCarControls(self.car_controls)
-        time.sleep(1)
-
-    def transform_obs(self, response):
-        img1d = np.array(response.image_data_float, dtype=np.float)
-        img1d = 255 / np.maximum(np.ones(img1d.size), img1d)
-        img2d = np.reshape(img1d, (response.height, response.width))
+        self.car.setCarControls(self.car_controls, vehicle_name=self.vehicle_name)
+        # In lockstep the controls are applied while the simulation is advanced
+        if self.lockstep is None:
+            time.sleep(self.control_period)
 
-        from PIL import Image
+    def _sim_time(self):
+        return self.car.getCarState(vehicle_name=self.vehicle_name).timestamp * 1e-9
 
-        image = Image.fromarray(img2d)
-        im_final = np.array(image.resize((84, 84)).convert("L"))
+    def transform_obs(self, response, reset=False):
+        if reset:
+            return self.observation.reset(response)
+        return self.observation(response)
 
-        return im_final.reshape([84, 84, 1])
+    def _get_obs(self, reset=False):
+        responses = self.car.simGetImages([self.image_request], vehicle_name=self.vehicle_name)
+        image = self.transform_obs(responses[0], reset)
 
-    def _get_obs(self):
-        responses = self.car.simGetImages([self.image_request])
-        image = self.transform_obs(responses[0])
-
-        self.car_state = self.car.getCarState()
+        self.car_state = self.car.getCarState(vehicle_name=self.vehicle_name)
 
         self.state["prev_pose"] = self.state["pose"]
         self.state["pose"] = self.car_state.kinematics_estimated
-        self.state["collision"] = self.car.simGetCollisionInfo().has_collided
+        collision_info = self.car.simGetCollisionInfo(vehicle_name=self.vehicle_name)
+        self.state["collision"] = collision_info.has_collided and collision_info.time_stamp > self.reset_collision_time_stamp
 
         return image
 
-    def _compute_reward(self):
+    def reward_state(self):
+        """ Inputs of compute_rewards() for this vehicle """
+        return (
+            self.state["pose"].position.to_numpy_array(),
+            self.car_state.speed,
+            self.car_controls.brake,
+            self.state["collision"],
+        )
+
+    def compute_rewards(self, positions, speeds, brakes, collisions):
+        """
+        Rewards of a batch of cars driving along this env's path
+
+        Args:
+            positions (np.ndarray): (N, 3) positions
+            speeds (np.ndarray): (N,) speeds
+            brakes (np.ndarray): (N,) brake controls
+            collisions (np.ndarray): (N,) collision flags
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: (N,) rewards and (N,) done flags
+        """
         MAX_SPEED = 300
         MIN_SPEED = 10
         THRESH_DIST = 3.5
         BETA = 3
 
-        pts = [
-            np.array([x, y, 0])
-            for x, y in [
-                (0, -1), (130, -1), (130, 125), (0, 125),
-                (0, -1), (130, -1), (130, -128), (0, -128),
-                (0, -1),
-            ]
-        ]
-        car_pt = self.state["pose"].position.to_numpy_array()
-
-        dist = 10000000
-        for i in range(0, len(pts) - 1):
-            dist = min(
-                dist,
-                np.linalg.norm(
-                    np.cross((car_pt - pts[i]), (car_pt - pts[i + 1]))
-                )
-                / np.linalg.norm(pts[i] - pts[i + 1]),
-            )
-
-        # print(dist)
-        if dist > THRESH_DIST:
-            reward = -3
-        else:
-            reward_dist = math.exp(-BETA * dist) - 0.5
-            reward_speed = (
-                (self.car_state.speed - MIN_SPEED) / (MAX_SPEED - MIN_SPEED)
-            ) - 0.5
-            reward = reward_dist + reward_speed
-
-        done = 0
-        if reward < -1:
-            done = 1
-        if self.car_controls.brake == 0:
-            if self.car_state.speed <= 1:
-                done = 1
-        if self.state["collision"]:
-            done = 1
+        dist = self.path.distance(positions)
+        reward_dist = np.exp(-BETA * dist) - 0.5
+        reward_speed = ((speeds - MIN_SPEED) / (MAX_SPEED - MIN_SPEED)) - 0.5
+        reward = np.where(dist > THRESH_DIST, -3, reward_dist + reward_speed)
 
+        done = (reward < -1) | ((brakes == 0) & (speeds <= 1)) | collisions
         return reward, done
 
+    def _compute_reward(self):
+        reward, done = self.compute_rewards(*(np.asarray([value]) for value in self.reward_state()))
+        return float(reward[0]), int(done[0])
+
     def step(self, action):
         self._do_action(action)
+        self._advance()
         obs = self._get_obs()
         reward, done = self._compute_reward()
 
         return obs, reward, done, self.state
 
     def reset(self):
-        self._setup_car()
+        with self._sim_running():
+            self._setup_car()
         self._do_action(1)
-        return self._get_obs()
+        # Drives straight for a step before the first observation, with a shared Lockstep the car starts driving
+        # on the next step of all the vehicles
+        if not self.shares_lockstep:
+            self._advance()
+        return self._get_obs(reset=True)
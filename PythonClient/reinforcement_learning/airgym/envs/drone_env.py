@@ -1,20 +1,33 @@
 import setup_path
 import airsim
 import numpy as np
-import math
 import time
 from argparse import ArgumentParser
 
 import gym
 from gym import spaces
 from airgym.envs.airsim_env import AirSimEnv
+from airgym.envs.path import Path
+
+HOME_POSITION = (-0.55265, -31.9786, -19.0225)
+HOME_VELOCITY = (1, -0.67, -0.8)
+
+PATH_POINTS = [
+    [-0.55265, -31.9786, -19.0225],
+    [48.59735, -63.3286, -60.07256],
+    [193.5974, -55.0786, -46.32256],
+    [369.2474, 35.32137, -62.5725],
+    [541.3474, 143.6714, -32.07256],
+]
 
 
 class AirSimDroneEnv(AirSimEnv):
-    def __init__(self, ip_address, step_length, image_shape):
-        super().__init__(image_shape)
+    def __init__(self, ip_address, step_length, image_shape, vehicle_name="", client=None, frame_stack=1,
+                 lockstep=False, control_period=5, control_frames=None):
+        super().__init__(image_shape, frame_stack)
         self.step_length = step_length
         self.image_shape = image_shape
+        self.vehicle_name = vehicle_name
 
         self.state = {
             "position": np.zeros(3),
@@ -22,128 +35,135 @@ class AirSimDroneEnv(AirSimEnv):
             "prev_position": np.zeros(3),
         }
 
-        self.drone = airsim.MultirotorClient(ip=ip_address)
+        # Envs of an AirSimVecEnv share the client, each driving its own vehicle
+        self.shares_client = client is not None
+        self.drone = client if self.shares_client else airsim.MultirotorClient(ip=ip_address)
+        self.start_pose = self.drone.simGetVehiclePose(vehicle_name=self.vehicle_name)
         self.action_space = spaces.Discrete(7)
-        self._setup_flight()
+        self.path = Path(PATH_POINTS)
+        self.control_period = control_period
+        self._setup_lockstep(self.drone, lockstep, control_period, control_frames)
+        with self._sim_running():
+            self._setup_flight()
 
         self.image_request = airsim.ImageRequest(
-            3, airsim.ImageType.DepthPerspective, True, False
+            3, airsim.ImageType.DepthPerspective, True, False, float_as_bytes=True
         )
 
     def __del__(self):
-        self.drone.reset()
+        if not self.shares_client:
+            if self.lockstep is not None:
+                self.lockstep.release()
+            self.drone.reset()
 
     def _setup_flight(self):
-        self.drone.reset()
-        self.drone.enableApiControl(True)
-        self.drone.armDisarm(True)
+        if self.shares_client:
+            # reset() would reset all the vehicles, only move this one back to where it started
+            self.drone.simSetVehiclePose(self.start_pose, True, vehicle_name=self.vehicle_name)
+        else:
+            self.drone.reset()
+        self.drone.enableApiControl(True, vehicle_name=self.vehicle_name)
+        self.drone.armDisarm(True, vehicle_name=self.vehicle_name)
 
         # Set home position and velocity
-        self.drone.moveToPositionAsync(-0.55265, -31.9786, -19.0225, 10).join()
-        self.drone.moveByVelocityAsync(1, -0.67, -0.8, 5).join()
-
-    def transform_obs(self, responses):
-        img1d = np.array(responses[0].image_data_float, dtype=np.float)
-        img1d = 255 / np.maximum(np.ones(img1d.size), img1d)
-        img2d = np.reshape(img1d, (responses[0].height, responses[0].width))
-
-        from PIL import Image
+        if self.shares_lockstep:
+            # The simulation can't run for this vehicle alone, it's placed at home with the velocity instead
+            kinematics = airsim.KinematicsState(
+                position=airsim.Vector3r(*HOME_POSITION),
+                orientation=self.start_pose.orientation,
+                linear_velocity=airsim.Vector3r(*HOME_VELOCITY),
+            )
+            self.drone.simSetKinematics(kinematics, True, vehicle_name=self.vehicle_name)
+        else:
+            self.drone.moveToPositionAsync(*HOME_POSITION, 10, vehicle_name=self.vehicle_name).join()
+            self.drone.moveByVelocityAsync(*HOME_VELOCITY, 5, vehicle_name=self.vehicle_name).join()
+        # Collisions from before the reset are still reported after a pose reset
+        self.reset_collision_time_stamp = self.drone.simGetCollisionInfo(vehicle_name=self.vehicle_name).time_stamp
 
-        image = Image.fromarray(img2d)
-        im_final = np.array(image.resize((84, 84)).convert("L"))
+    def _sim_time(self):
+        return self.drone.getMultirotorState(vehicle_name=self.vehicle_name).timestamp * 1e-9
 
-        return im_final.reshape([84, 84, 1])
+    def transform_obs(self, responses, reset=False):
+        if reset:
+            return self.observation.reset(responses[0])
+        return self.observation(responses[0])
 
-    def _get_obs(self):
-        responses = self.drone.simGetImages([self.image_request])
-        image = self.transform_obs(responses)
-        self.drone_state = self.drone.getMultirotorState()
+    def _get_obs(self, reset=False):
+        responses = self.drone.simGetImages([self.image_request], vehicle_name=self.vehicle_name)
+        image = self.transform_obs(responses, reset)
+        self.drone_state = self.drone.getMultirotorState(vehicle_name=self.vehicle_name)
 
         self.state["prev_position"] = self.state["position"]
         self.state["position"] = self.drone_state.kinematics_estimated.position
         self.state["velocity"] = self.drone_state.kinematics_estimated.linear_velocity
 
-        collision = self.drone.simGetCollisionInfo().has_collided
-        self.state["collision"] = collision
+        collision_info = self.drone.simGetCollisionInfo(vehicle_name=self.vehicle_name)
+        self.state["collision"] = collision_info.has_collided and collision_info.time_stamp > self.reset_collision_time_stamp
 
         return image
 
     def _do_action(self, action):
         quad_offset = self.interpret_action(action)
-        quad_vel = self.drone.getMultirotorState().kinematics_estimated.linear_velocity
-        self.drone.moveByVelocityAsync(
+        quad_vel = self.drone.getMultirotorState(vehicle_name=self.vehicle_name).kinematics_estimated.linear_velocity
+        future = self.drone.moveByVelocityAsync(
             quad_vel.x_val + quad_offset[0],
             quad_vel.y_val + quad_offset[1],
             quad_vel.z_val + quad_offset[2],
-            5,
-        ).join()
+            self._step_duration(),
+            vehicle_name=self.vehicle_name,
+        )
+        # In lockstep the command runs while the simulation is advanced
+        if self.lockstep is None:
+            future.join()
+
+    def reward_state(self):
+        """ Inputs of compute_rewards() for this vehicle """
+        return (
+            self.state["position"].to_numpy_array(),
+            self.state["velocity"].to_numpy_array(),
+            self.state["collision"],
+        )
 
-    def _compute_reward(self):
+    def compute_rewards(self, positions, velocities, collisions):
+        """
+        Rewards of a batch of vehicles flying along this env's path
+
+        Args:
+            positions (np.ndarray): (N, 3) positions
+            velocities (np.ndarray): (N, 3) linear velocities
+            collisions (np.ndarray): (N,) collision flags
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: (N,) rewards and (N,) done flags
+        """
         thresh_dist = 7
         beta = 1
 
-        z = -10
-        pts = [
-            np.array([-0.55265, -31.9786, -19.0225]),
-            np.array([48.59735, -63.3286, -60.07256]),
-            np.array([193.5974, -55.0786, -46.32256]),
-            np.array([369.2474, 35.32137, -62.5725]),
-            np.array([541.3474, 143.6714, -32.07256]),
-        ]
-
-        quad_pt = np.array(
-            list(
-                (
-                    self.state["position"].x_val,
-                    self.state["position"].y_val,
-                    self.state["position"].z_val,
-                )
-            )
-        )
-
-        if self.state["collision"]:
-            reward = -100
-        else:
-            dist = 10000000
-            for i in range(0, len(pts) - 1):
-                dist = min(
-                    dist,
-                    np.linalg.norm(np.cross((quad_pt - pts[i]), (quad_pt - pts[i + 1])))
-                    / np.linalg.norm(pts[i] - pts[i + 1]),
-                )
-
-            if dist > thresh_dist:
-                reward = -10
-            else:
-                reward_dist = math.exp(-beta * dist) - 0.5
-                reward_speed = (
-                    np.linalg.norm(
-                        [
-                            self.state["velocity"].x_val,
-                            self.state["velocity"].y_val,
-                            self.state["velocity"].z_val,
-                        ]
-                    )
-                    - 0.5
-                )
-                reward = reward_dist + reward_speed
-
-        done = 0
-        if reward <= -10:
-            done = 1
+        dist = self.path.distance(positions)
+        reward_dist = np.exp(-beta * dist) - 0.5
+        reward_speed = np.linalg.norm(velocities, axis=1) - 0.5
+        reward = np.where(dist > thresh_dist, -10, reward_dist + reward_speed)
+        reward = np.where(collisions, -100, reward)
 
+        done = reward <= -10
         return reward, done
 
+    def _compute_reward(self):
+        reward, done = self.compute_rewards(*(np.asarray([value]) for value in self.reward_state()))
+        return float(reward[0]), int(done[0])
+
     def step(self, action):
         self._do_action(action)
+        self._advance()
         obs = self._get_obs()
         reward, done = self._compute_reward()
 
         return obs, reward, done, self.state
 
     def reset(self):
-        self._setup_flight()
-        return self._get_obs()
+        with self._sim_running():
+            self._setup_flight()
+        return self._get_obs(reset=True)
 
     def interpret_action(self, action):
         if action == 0:
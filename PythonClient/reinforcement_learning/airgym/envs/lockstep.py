@@ -0,0 +1,69 @@
+import threading
+import time
+from contextlib import contextmanager
+
+
+class Lockstep:
+    """
+    Keeps the simulation paused and advances it one control period at a time
+
+    The simulation is only running during advance(), so the time the learner spends between steps doesn't move the
+    vehicles, and steps per second are only limited by rendering and RPCs instead of the wall clock and ClockSpeed.
+    Commands that wait for the vehicle of a single env, like the ones resetting it, are run inside running().
+    The envs of one simulator share a Lockstep, advance() is serialized between them.
+
+    Args:
+        client (VehicleClient): Client of the simulator
+        control_period (float): Simulated seconds per advance()
+        control_frames (int, optional): Advance by this number of frames with simContinueForFrames instead
+        poll_interval (float, optional): Seconds between checks of whether the simulation paused again
+        sim_time (callable, optional): Returns the simulated time in seconds, measures step_duration when advancing by frames
+    """
+
+    def __init__(self, client, control_period, control_frames=None, poll_interval=0.001, sim_time=None):
+        self.client = client
+        self.control_period = control_period
+        self.control_frames = control_frames
+        self.poll_interval = poll_interval
+        self.sim_time = sim_time
+        # Simulated seconds of an advance(), with control_frames control_period until the first one is measured
+        self.step_duration = control_period
+        self._lock = threading.Lock()
+        self._advance_lock = threading.Lock()
+        self._running = 0
+        self.client.simPause(True)
+
+    def advance(self):
+        """ Runs the simulation for one control period, returns once it is paused again """
+        with self._advance_lock:
+            measure = self.control_frames is not None and self.sim_time is not None
+            if measure:
+                start = self.sim_time()
+            if self.control_frames is not None:
+                self.client.simContinueForFrames(self.control_frames)
+            else:
+                self.client.simContinueForTime(self.control_period)
+            # simContinueFor* only start the simulation
+            while not self.client.simIsPause():
+                time.sleep(self.poll_interval)
+            if measure:
+                self.step_duration = self.sim_time() - start
+
+    @contextmanager
+    def running(self):
+        """ Lets the simulation run in real time while in the context, e.g. to wait for a vehicle to reach its start """
+        with self._lock:
+            self._running += 1
+            if self._running == 1:
+                self.client.simPause(False)
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._running -= 1
+                if self._running == 0:
+                    self.client.simPause(True)
+
+    def release(self):
+        """ Lets the simulation run freely again """
+        self.client.simPause(False)
@@ -0,0 +1,66 @@
+import numpy as np
+
+
+class DepthObservation:
+    """
+    Turns depth images into uint8 observations of shape (height, width, frame_stack)
+
+    Pixels are 255 / max(depth, 1), so close obstacles are bright, resized to the observation size.
+    All the intermediate arrays are allocated once and reused, only the returned observation is a new array,
+    since the caller keeps it around, e.g. in a replay buffer. With frame_stack > 1 the last channel is the
+    newest frame, and reset() fills the whole stack with the first frame of an episode.
+    Resizes with OpenCV's area interpolation when it is installed, else picks pixels with precomputed indices.
+    """
+
+    def __init__(self, image_shape, frame_stack=1):
+        self.height, self.width = image_shape[0], image_shape[1]
+        self.frame_stack = frame_stack
+        self.shape = (self.height, self.width, frame_stack)
+        self.frames = np.zeros(self.shape, dtype=np.uint8)
+
+        try:
+            import cv2  # pip install opencv-python
+        except ImportError:
+            cv2 = None
+        self.cv2 = cv2
+
+        self.depth = None
+        self.resized = np.empty((self.height, self.width), dtype=np.float32)
+        self.rows = None
+        self.cols = None
+
+    def _allocate(self, height, width):
+        self.depth = np.empty((height, width), dtype=np.float32)
+        # pixel centers of the observation in the source image, for the resize without OpenCV
+        self.rows = ((np.arange(self.height) + 0.5) * height / self.height).astype(np.intp)[:, None]
+        self.cols = ((np.arange(self.width) + 0.5) * width / self.width).astype(np.intp)[None, :]
+
+    def _frame(self, response):
+        if self.depth is None or self.depth.shape != (response.height, response.width):
+            self._allocate(response.height, response.width)
+
+        depth = self.depth
+        # image_data_float is a list, or a float32 array with ImageRequest.float_as_bytes
+        depth.reshape(-1)[:] = response.image_data_float
+        np.maximum(depth, 1, out=depth)
+        np.divide(255, depth, out=depth)
+
+        if self.cv2 is not None:
+            self.cv2.resize(depth, (self.width, self.height), dst=self.resized, interpolation=self.cv2.INTER_AREA)
+        else:
+            self.resized[:] = depth[self.rows, self.cols]
+        # round to nearest, values are at most 255 so the cast can't overflow
+        np.add(self.resized, 0.5, out=self.resized)
+        return self.resized
+
+    def reset(self, response):
+        frame = self._frame(response)
+        self.frames[:] = frame[:, :, None]
+        return self.frames.copy()
+
+    def __call__(self, response):
+        frame = self._frame(response)
+        if self.frame_stack > 1:
+            self.frames[:, :, :-1] = self.frames[:, :, 1:]
+        self.frames[:, :, -1] = frame
+        return self.frames.copy()
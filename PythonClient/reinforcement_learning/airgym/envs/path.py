@@ -0,0 +1,38 @@
+import numpy as np
+
+
+class Path:
+    """
+    Polyline the vehicles should follow, the segments are precomputed once
+
+    distance() is the distance to the line through the closest segment, as in the original rewards,
+    |(p - a) x (p - b)| / |b - a| for the segments (a, b), evaluated for a batch of points at once.
+    """
+
+    def __init__(self, points):
+        points = np.asarray(points, dtype=np.float64)
+        if points.ndim != 2 or points.shape[1] not in (2, 3) or len(points) < 2:
+            raise ValueError("A path needs at least 2 points with 2 or 3 coordinates")
+        if points.shape[1] == 2:
+            points = np.hstack([points, np.zeros((len(points), 1))])
+        self.points = points
+        self.starts = points[:-1]
+        self.directions = points[1:] - points[:-1]
+        # |(p - a) x (p - b)| / |b - a| = |(p - a) x u| for the unit direction u of the segment
+        self.unit_directions = self.directions / np.linalg.norm(self.directions, axis=1, keepdims=True)
+
+    def distance(self, positions):
+        """
+        Args:
+            positions (np.ndarray): (3,) position or (N, 3) positions
+
+        Returns:
+            float or np.ndarray: Distance of the position to the path, or (N,) distances
+        """
+        positions = np.asarray(positions, dtype=np.float64)
+        offsets = positions[..., None, :] - self.starts
+        # |o x u|^2 = |o|^2 - (o . u)^2, much cheaper than np.cross for the few segments of a path
+        along = (offsets * self.unit_directions).sum(axis=-1)
+        squared = (offsets * offsets).sum(axis=-1) - along * along
+        np.maximum(squared, 0, out=squared)
+        return np.sqrt(squared.min(axis=-1))
@@ -0,0 +1,126 @@
+import setup_path
+import airsim
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+
+from stable_baselines3.common.vec_env.base_vec_env import VecEnv
+
+from airgym.envs.car_env import AirSimCarEnv
+from airgym.envs.drone_env import AirSimDroneEnv
+from airgym.envs.lockstep import Lockstep
+
+
+class AirSimVecEnv(VecEnv):
+    """
+    Vectorized env driving several vehicles of one simulator, one AirSim env per vehicle
+
+    The envs share a client with a connection per vehicle, and each vehicle is stepped from its own thread,
+    so the actions and observation requests of all the vehicles are in flight at the same time.
+    Vehicles are reset on their own when their episode ends, and the rewards of all the vehicles are computed in one call.
+    In lockstep the envs share a Lockstep, and the simulation is advanced once per step for all the vehicles.
+    Vehicles are then reset while the simulation is paused, so the others don't move between steps.
+    """
+
+    def __init__(self, envs, client):
+        self.envs = envs
+        self.client = client
+        super().__init__(len(envs), envs[0].observation_space, envs[0].action_space)
+        self.executor = ThreadPoolExecutor(len(envs))
+        self.actions = None
+
+    @classmethod
+    def drone(cls, ip_address, vehicle_names, step_length, image_shape, frame_stack=1,
+              lockstep=False, control_period=5, control_frames=None):
+        client = airsim.MultirotorClient(ip=ip_address, pool_size=len(vehicle_names))
+        if lockstep:
+            lockstep = Lockstep(
+                client, control_period, control_frames,
+                sim_time=lambda: client.getMultirotorState(vehicle_name=vehicle_names[0]).timestamp * 1e-9,
+            )
+        with ThreadPoolExecutor(len(vehicle_names)) as executor:
+            envs = list(executor.map(
+                lambda name: AirSimDroneEnv(
+                    ip_address, step_length, image_shape, vehicle_name=name, client=client, frame_stack=frame_stack,
+                    lockstep=lockstep, control_period=control_period,
+                ),
+                vehicle_names,
+            ))
+        return cls(envs, client)
+
+    @classmethod
+    def car(cls, ip_address, vehicle_names, image_shape, frame_stack=1,
+            lockstep=False, control_period=1, control_frames=None):
+        client = airsim.CarClient(ip=ip_address, pool_size=len(vehicle_names))
+        if lockstep:
+            lockstep = Lockstep(
+                client, control_period, control_frames,
+                sim_time=lambda: client.getCarState(vehicle_name=vehicle_names[0]).timestamp * 1e-9,
+            )
+        envs = [
+            AirSimCarEnv(
+                ip_address, image_shape, vehicle_name=name, client=client, frame_stack=frame_stack,
+                lockstep=lockstep, control_period=control_period,
+            )
+            for name in vehicle_names
+        ]
+        return cls(envs, client)
+
+    def _reset_done(self, env, done):
+        return env.reset() if done else None
+
+    def reset(self):
+        return np.stack(list(self.executor.map(lambda env: env.reset(), self.envs)))
+
+    def step_async(self, actions):
+        self.actions = actions
+
+    def step_wait(self):
+        list(self.executor.map(lambda env, action: env._do_action(action), self.envs, self.actions))
+        # the envs share the Lockstep, the simulation is advanced once for all the vehicles
+        self.envs[0]._advance()
+        obs = list(self.executor.map(lambda env: env._get_obs(), self.envs))
+        # the rewards of all the vehicles are computed in one call, the envs share the reward function
+        reward_states = [np.asarray(values) for values in zip(*(env.reward_state() for env in self.envs))]
+        rewards, dones = self.envs[0].compute_rewards(*reward_states)
+
+        # the envs update their state in place, copy it since it's kept by the caller
+        infos = [dict(env.state) for env in self.envs]
+        # vehicles are reset when their episode ends, as with stable-baselines3's DummyVecEnv
+        for i, reset_obs in enumerate(self.executor.map(self._reset_done, self.envs, dones)):
+            if reset_obs is not None:
+                infos[i]["terminal_observation"] = obs[i]
+                obs[i] = reset_obs
+        return np.stack(obs), rewards.astype(np.float32), dones.astype(bool), infos
+
+    def close(self):
+        self.executor.shutdown()
+        if self.envs[0].lockstep is not None:
+            self.envs[0].lockstep.release()
+        # the envs share the client and leave resetting the simulator to the vectorized env
+        self.client.reset()
+
+    def get_images(self):
+        return [env.render() for env in self.envs]
+
+    def _get_target_envs(self, indices):
+        if indices is None:
+            indices = range(self.num_envs)
+        elif isinstance(indices, int):
+            indices = [indices]
+        return [self.envs[i] for i in indices]
+
+    def get_attr(self, attr_name, indices=None):
+        return [getattr(env, attr_name) for env in self._get_target_envs(indices)]
+
+    def set_attr(self, attr_name, value, indices=None):
+        for env in self._get_target_envs(indices):
+            setattr(env, attr_name, value)
+
+    def env_method(self, method_name, *method_args, indices=None, **method_kwargs):
+        return [getattr(env, method_name)(*method_args, **method_kwargs) for env in self._get_target_envs(indices)]
+
+    def env_is_wrapped(self, wrapper_class, indices=None):
+        return [isinstance(env, wrapper_class) for env in self._get_target_envs(indices)]
+
+    def seed(self, seed=None):
+        return [None for _ in self.envs]
@@ -0,0 +1,52 @@
+import asyncio
+import time
+
+import pytest
+
+from airsim.aio.rpc import AsyncRpcClient, RpcServer
+
+
+class _Handler(object):
+    async def sleep_and_echo(self, delay, value):
+        await asyncio.sleep(delay)
+        return value
+
+    def add(self, a, b):
+        return a + b
+
+
+async def _with_server(test):
+    server = await RpcServer(_Handler()).start(port = 0)
+    try:
+        await test(server.port)
+    finally:
+        server.close()
+        await server.wait_closed()
+
+
+def test_concurrent_calls():
+    async def test(port):
+        client = AsyncRpcClient('127.0.0.1', port)
+        # later calls finish first, the responses are matched to their requests by message id
+        delays = [0.3, 0.2, 0.1, 0.0]
+        start = time.monotonic()
+        results = await asyncio.gather(*(client.call('sleep_and_echo', delay, i) for i, delay in enumerate(delays)))
+        elapsed = time.monotonic() - start
+        assert results == [0, 1, 2, 3]
+        assert elapsed < sum(delays)
+        assert await client.call('add', 2, 3) == 5
+        assert client._pending == {}
+        await client.close()
+    asyncio.run(_with_server(test))
+
+
+def test_timeout_drops_pending_call():
+    async def test(port):
+        client = AsyncRpcClient('127.0.0.1', port, timeout = 0.05)
+        with pytest.raises(asyncio.TimeoutError):
+            await client.call('sleep_and_echo', 1.0, 'late')
+        assert client._pending == {}
+        # the connection is still usable after a timeout
+        assert await client.call('add', 1, 1) == 2
+        await client.close()
+    asyncio.run(_with_server(test))
@@ -0,0 +1,52 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'eventcamera_sim'))
+from event_simulator import EVENT_TYPE
+from event_file import EventReader, EventWriter
+
+
+def _camera_events(rng, start, end):
+    # events of one camera between two frames, in pixel order like the simulator returns them before sorting
+    count = int(rng.integers(1, 40))
+    events = np.zeros(count, dtype = EVENT_TYPE)
+    events['timestamp'] = np.round(rng.uniform(start, end, count), 6)
+    events['x'] = rng.integers(0, 640, count)
+    events['polarity'] = rng.choice([-1, 1], count)
+    return events
+
+
+@pytest.mark.parametrize('buffer_events', [10, 100])
+@pytest.mark.parametrize('cameras', [3, 4])
+def test_interleaved_cameras(tmp_path, buffer_events, cameras):
+    rng = np.random.default_rng(0)
+    path = os.path.join(str(tmp_path), 'events.npy')
+    written = []
+    with EventWriter(path, buffer_events = buffer_events, overlapping_writes = cameras) as writer:
+        for frame in range(50):
+            for _ in range(cameras):
+                events = _camera_events(rng, frame * 0.01, (frame + 1) * 0.01)
+                written.append(events)
+                writer.write(events)
+
+    events = np.load(path)
+    expected = np.concatenate(written)
+    assert np.all(np.diff(events['timestamp']) >= 0)
+    assert np.array_equal(np.sort(events, order = ['timestamp', 'x', 'polarity']),
+                          np.sort(expected, order = ['timestamp', 'x', 'polarity']))
+
+    reader = EventReader(path)
+    window = reader.window(0.1, 0.2)
+    assert len(window) == np.count_nonzero((expected['timestamp'] >= 0.1) & (expected['timestamp'] < 0.2))
+
+
+def test_older_events_raise(tmp_path):
+    rng = np.random.default_rng(0)
+    with EventWriter(os.path.join(str(tmp_path), 'events.npy'), buffer_events = 10) as writer:
+        writer.write(_camera_events(rng, 1.0, 2.0))
+        writer.flush()
+        with pytest.raises(ValueError):
+            writer.write(_camera_events(rng, 0.0, 0.5))
@@ -0,0 +1,98 @@
+import threading
+
+import numpy as np
+import pytest
+from msgpackrpc.error import RPCError
+
+import airsim
+from airsim.mock import MockServer
+
+WIDTH, HEIGHT, LIDAR_POINTS = 64, 48, 512
+
+
+@pytest.fixture(scope = 'module')
+def server():
+    with MockServer(port = 0, width = WIDTH, height = HEIGHT, lidar_points = LIDAR_POINTS, vehicles = ('Drone1', 'Drone2')) as server:
+        yield server
+
+
+@pytest.fixture
+def client(server):
+    return airsim.MultirotorClient(port = server.port)
+
+
+def test_ping(client):
+    assert client.ping()
+
+
+def test_scene_images(client):
+    responses = client.simGetImages([airsim.ImageRequest('0', airsim.ImageType.Scene, False, False)])
+    assert len(responses) == 1
+    response = responses[0]
+    assert (response.width, response.height) == (WIDTH, HEIGHT)
+    assert len(response.image_data_uint8) == WIDTH * HEIGHT * 3
+
+
+@pytest.mark.parametrize('float_as_bytes', [False, True])
+def test_depth_images(client, float_as_bytes):
+    request = airsim.ImageRequest('0', airsim.ImageType.DepthPerspective, True, False, float_as_bytes = float_as_bytes)
+    response = client.simGetImages([request])[0]
+    depth = airsim.get_pfm_array(response)
+    assert depth.shape == (HEIGHT, WIDTH)
+    assert np.all(depth > 0)
+
+
+def test_float_as_bytes_matches_float_list(client):
+    requests = [airsim.ImageRequest('0', airsim.ImageType.DepthPerspective, True, False, float_as_bytes = as_bytes)
+                for as_bytes in (False, True)]
+    as_list, as_bytes = client.simGetImages(requests)
+    assert np.array_equal(np.asarray(as_list.image_data_float, dtype = np.float32), as_bytes.image_data_float)
+
+
+def test_lidar(client):
+    lidar = client.getLidarData(vehicle_name = 'Drone2')
+    points = np.asarray(lidar.point_cloud, dtype = np.float32).reshape(-1, 3)
+    assert points.shape == (LIDAR_POINTS, 3)
+    assert len(lidar.segmentation) == LIDAR_POINTS
+
+
+def test_call_many(client):
+    request = airsim.ImageRequest('0', airsim.ImageType.Scene, False, False)
+    state, imu, responses = client.call_many([
+        ('getMultirotorState', (), {'vehicle_name': 'Drone1'}),
+        ('getImuData', ('', 'Drone2')),
+        ('simGetImages', ([request],), {'as_numpy': True}),
+    ])
+    assert isinstance(state, airsim.MultirotorState)
+    assert isinstance(imu, airsim.ImuData)
+    assert responses[0].image_data_uint8.shape == (HEIGHT, WIDTH, 3)
+
+
+def test_pool(server):
+    client = airsim.MultirotorClient(port = server.port, pool_size = 4)
+    request = airsim.ImageRequest('0', airsim.ImageType.Scene, False, False)
+    results, errors = [], []
+
+    def fetch():
+        try:
+            for _ in range(5):
+                results.append(client.simGetImages([request])[0].width)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target = fetch) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert results == [WIDTH] * 20
+
+
+def test_unimplemented_rpc_is_rejected(client):
+    # commands the mock ignores are accepted
+    client.simSetWind(airsim.Vector3r(1, 0, 0))
+    with pytest.raises(RPCError):
+        client.simGetFocalLength('0')
+    with pytest.raises(RPCError):
+        client.client.call('simSetWindd', airsim.Vector3r(1, 0, 0))
@@ -0,0 +1,47 @@
+import os
+import threading
+import time
+
+from airsim.client import Subscription
+from airsim.recording import Recorder, RecordingReader
+
+
+def _blocking_fetch(count):
+    # returns 0 .. count - 1 and then blocks, so that the results stay buffered until they are consumed
+    values = iter(range(count))
+    release = threading.Event()
+
+    def fetch():
+        value = next(values, None)
+        if value is None:
+            release.wait()
+        return value
+    return fetch, release
+
+
+def test_stop_writes_buffered_results(tmp_path):
+    fetch, release = _blocking_fetch(200)
+    subscription = Subscription(fetch, maxsize = 1000)
+    while len(subscription._buffer) < 200:
+        time.sleep(0.001)
+
+    path = os.path.join(str(tmp_path), 'buffered.rec')
+    recorder = Recorder(path)
+    recorder.record('values', subscription)
+    recorder.stop()
+    release.set()
+
+    with RecordingReader(path) as reader:
+        assert [record.data for record in reader.records()] == list(range(200))
+    assert subscription.dropped == 0
+
+
+def test_close_discards_buffered_results():
+    fetch, release = _blocking_fetch(10)
+    subscription = Subscription(fetch, maxsize = 100)
+    while len(subscription._buffer) < 10:
+        time.sleep(0.001)
+
+    subscription.close()
+    release.set()
+    assert list(subscription) == []